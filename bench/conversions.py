@@ -0,0 +1,92 @@
+"""
+Benchmark the number of rows per second converted by
+:func:`petl.transform.conversions.convert` on a wide table with a few
+converted fields, against converting every value of every row via a nested
+function, as :func:`petl.transform.conversions.iterfieldconvert` used to.
+
+Run from the command line, e.g.::
+
+    $ python bench/conversions.py 100000
+
+"""
+from __future__ import absolute_import, print_function, division
+
+
+import random
+import sys
+import timeit
+
+
+import petl as etl
+from petl.util.base import Table
+
+
+def make_table(n, width, seed=42):
+    rnd = random.Random(seed)
+    table = [tuple('f%s' % i for i in range(width))]
+    table.extend([str(rnd.randint(0, 1000)) for _ in range(width)]
+                 for _ in range(n))
+    return table
+
+
+class PerCellConvertView(Table):
+    # baseline, calling a function for every value
+
+    def __init__(self, source, converters, failonerror=False,
+                 errorvalue=None):
+        self.source = source
+        self.converters = converters
+        self.failonerror = failonerror
+        self.errorvalue = errorvalue
+
+    def __iter__(self):
+        it = iter(self.source)
+        hdr = next(it)
+        flds = list(hdr)
+        yield tuple(hdr)
+        converter_functions = dict((flds.index(k), c)
+                                   for k, c in self.converters.items())
+        failonerror, errorvalue = self.failonerror, self.errorvalue
+
+        def transform_value(i, v):
+            if i not in converter_functions:
+                return v
+            else:
+                try:
+                    return converter_functions[i](v)
+                except Exception as e:
+                    if failonerror == 'inline':
+                        return e
+                    elif failonerror:
+                        raise e
+                    else:
+                        return errorvalue
+
+        for row in it:
+            yield tuple(transform_value(i, v) for i, v in enumerate(row))
+
+
+def bench(label, f, repeat=3):
+    nrows = f()
+    t = min(timeit.repeat(f, number=1, repeat=repeat))
+    print('%-16s %9s rows %8.3fs %12.0f rows/s' % (label, nrows, t, nrows / t))
+
+
+def main(n):
+    width = 80
+    table = make_table(n, width)
+    converters = dict(('f%s' % i, int) for i in range(0, width, width // 5))
+    print('%s rows, %s fields, %s converted' % (n, width, len(converters)))
+    bench('percell', lambda: etl.nrows(
+        PerCellConvertView(table, converters)))
+    bench('convert', lambda: etl.nrows(etl.convert(table, converters)))
+    bench('convert inline', lambda: etl.nrows(
+        etl.convert(table, converters, failonerror='inline')))
+    bench('convert strict', lambda: etl.nrows(
+        etl.convert(table, converters, failonerror=True)))
+    bench('convert where', lambda: etl.nrows(
+        etl.convert(table, converters, where=lambda row: True)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
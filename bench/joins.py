@@ -0,0 +1,62 @@
+"""
+Benchmark the number of output rows per second for each join variant,
+with tables already sorted by key so the merge joins don't measure sorting,
+and a right hand table small enough for the hash joins to hold in memory.
+
+Run from the command line, e.g.::
+
+    $ python bench/joins.py 100000
+
+"""
+from __future__ import absolute_import, print_function, division
+
+
+import random
+import sys
+import timeit
+
+
+import petl as etl
+
+
+def make_table(n, nkeys, width, seed=42):
+    rnd = random.Random(seed)
+    table = [tuple(['id'] + ['f%s' % i for i in range(width - 1)])]
+    rows = [tuple([rnd.randint(0, nkeys - 1)]
+                  + [rnd.random() for _ in range(width - 1)])
+            for _ in range(n)]
+    table.extend(sorted(rows))
+    return table
+
+
+def bench(label, f, repeat=3):
+    nrows = f()
+    t = min(timeit.repeat(f, number=1, repeat=repeat))
+    print('%-16s %9s rows %8.3fs %12.0f rows/s' % (label, nrows, t, nrows / t))
+
+
+def main(n):
+    left = make_table(n, n // 2, 6)
+    right = make_table(n // 2, n // 2, 4, seed=24)
+    small = make_table(100, 100, 3, seed=7)
+    print('%s left rows, %s right rows' % (n, n // 2))
+    kw = dict(key='id', presorted=True)
+    bench('join', lambda: etl.nrows(etl.join(left, right, **kw)))
+    bench('leftjoin', lambda: etl.nrows(etl.leftjoin(left, right, **kw)))
+    bench('rightjoin', lambda: etl.nrows(etl.rightjoin(left, right, **kw)))
+    bench('outerjoin', lambda: etl.nrows(etl.outerjoin(left, right, **kw)))
+    bench('lookupjoin', lambda: etl.nrows(etl.lookupjoin(left, right, **kw)))
+    bench('hashjoin', lambda: etl.nrows(
+        etl.hashjoin(left, right, key='id', cache=False)))
+    bench('hashleftjoin', lambda: etl.nrows(
+        etl.hashleftjoin(left, right, key='id', cache=False)))
+    bench('hashrightjoin', lambda: etl.nrows(
+        etl.hashrightjoin(left, right, key='id', cache=False)))
+    bench('hashlookupjoin', lambda: etl.nrows(
+        etl.hashlookupjoin(left, right, key='id')))
+    bench('crossjoin', lambda: etl.nrows(
+        etl.crossjoin(left[:n // 100 + 1], small)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
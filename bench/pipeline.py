@@ -0,0 +1,57 @@
+"""
+Benchmark the number of rows per second output by a chain of row-wise views,
+with and without fusing the views into a single generator (see
+`petl.config.fusion`).
+
+Run from the command line, e.g.::
+
+    $ python bench/pipeline.py 100000
+
+"""
+from __future__ import absolute_import, print_function, division
+
+
+import random
+import sys
+import timeit
+
+
+import petl as etl
+import petl.config as config
+
+
+def make_table(n, width, seed=42):
+    rnd = random.Random(seed)
+    table = [tuple('f%s' % i for i in range(width))]
+    table.extend(tuple(str(rnd.randint(0, 100)) for _ in range(width))
+                 for _ in range(n))
+    return table
+
+
+def pipeline(table):
+    table = etl.convert(table, {'f0': int, 'f1': float})
+    table = etl.addfield(table, 'g', 1)
+    table = etl.select(table, 'f0', lambda v: v > 10)
+    table = etl.cut(table, 'f0', 'f1', 'g', 'f3')
+    table = etl.rename(table, 'f3', 'h')
+    return table
+
+
+def bench(label, f, repeat=3):
+    nrows = f()
+    t = min(timeit.repeat(f, number=1, repeat=repeat))
+    print('%-16s %9s rows %8.3fs %12.0f rows/s' % (label, nrows, t, nrows / t))
+
+
+def main(n):
+    table = make_table(n, 8)
+    print('%s rows' % n)
+    saved = config.fusion
+    for fusion in False, True:
+        config.fusion = fusion
+        bench('fusion=%s' % fusion, lambda: etl.nrows(pipeline(table)))
+    config.fusion = saved
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
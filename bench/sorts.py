@@ -0,0 +1,115 @@
+"""
+Benchmark sorting with native key comparison against sorting with keys
+wrapped in :class:`petl.comparison.Comparable`, for :func:`petl.sort` and
+the transformations which sort via :class:`petl.transform.sorts.SortView`,
+and the block format of temporary files written when sorting in chunks
+against pickling one row at a time.
+
+Run from the command line, e.g.::
+
+    $ python bench/sorts.py 100000
+
+"""
+from __future__ import absolute_import, print_function, division
+
+
+import os
+import pickle
+import random
+import sys
+import tempfile
+import timeit
+
+
+import petl as etl
+import petl.config as config
+from petl.transform.sorts import _writechunk, _iterchunk, _mergesorted
+
+
+def make_table(n, seed=42):
+    rnd = random.Random(seed)
+    table = [('id', 'name', 'value')]
+    for _ in range(n):
+        table.append((rnd.randint(0, n // 10),
+                      'name%06d' % rnd.randint(0, 1000),
+                      rnd.random()))
+    return table
+
+
+def bench(label, f, repeat=3):
+    timings = list()
+    for native in False, True:
+        config.sort_native_keys = native
+        timings.append(min(timeit.repeat(f, number=1, repeat=repeat)))
+    config.sort_native_keys = True
+    print('%-24s comparable %7.3fs  native %7.3fs  speedup %.2fx'
+          % (label, timings[0], timings[1], timings[0] / timings[1]))
+
+
+def write_rowwise(rows):
+    # the format used before rows were written in blocks
+    with tempfile.NamedTemporaryFile(delete=False, mode='wb') as f:
+        for row in rows:
+            pickle.dump(row, f, protocol=-1)
+    return f.name
+
+
+def iter_rowwise(fn):
+    with open(fn, 'rb') as f:
+        try:
+            while True:
+                yield pickle.load(f)
+        except EOFError:
+            pass
+
+
+def bench_spill(label, chunks, write, read, repeat=3):
+    filenames = list()
+
+    def _write():
+        del filenames[:]
+        filenames.extend(write(rows) for rows in chunks)
+
+    def _merge():
+        for _ in _mergesorted(None, False, *[read(fn) for fn in filenames]):
+            pass
+
+    try:
+        t_write = min(timeit.repeat(_write, number=1, repeat=repeat))
+        t_merge = min(timeit.repeat(_merge, number=1, repeat=repeat))
+        size = sum(os.path.getsize(fn) for fn in filenames)
+    finally:
+        for fn in filenames:
+            os.remove(fn)
+    print('%-24s write %7.3fs  merge %7.3fs  size %7.1f MB'
+          % (label, t_write, t_merge, size / 2**20))
+
+
+def main(n):
+    table = make_table(n)
+    other = make_table(n // 10, seed=24)
+    chunk = n // 4
+    print('%s rows' % n)
+    bench('sort int', lambda: etl.nrows(etl.sort(table, 'id')))
+    bench('sort str,int', lambda: etl.nrows(etl.sort(table, ('name', 'id'))))
+    bench('sort float (external)', lambda: etl.nrows(
+        etl.sort(table, 'value', buffersize=chunk)))
+    bench('mergesort', lambda: etl.nrows(
+        etl.mergesort(table, other, key='id')))
+    bench('aggregate', lambda: etl.nrows(
+        etl.aggregate(table, 'name', len)))
+    bench('join', lambda: etl.nrows(etl.join(table, other, key='id')))
+
+    chunks = [sorted(table[i:i+chunk]) for i in range(1, n + 1, chunk)]
+    bench_spill('spill rowwise', chunks, write_rowwise, iter_rowwise)
+    for compression in None, 'zlib', 'bz2':
+        bench_spill(
+            'spill blocks %s' % compression, chunks,
+            lambda rows: _writechunk(rows, None, config.sort_blocksize,
+                                     compression),
+            lambda fn: _iterchunk(fn, compression)
+        )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -16,6 +16,37 @@ display_limit = 5
 display_index_header = False
 display_vrepr = text_type
 sort_buffersize = 100000
+"""
+Default `buffersize` for :func:`petl.transform.sorts.sort`, either a number
+of rows, or a memory budget in bytes given as a string such as `'512MB'`.
+"""
+sort_native_keys = True
+"""
+If `True`, :func:`petl.transform.sorts.sort` checks the types of the key
+values in each chunk of rows and, where all values of each key field are of
+the same natively comparable type (numbers, text, bytes, dates, times or
+datetimes), sorts by the plain values rather than wrapping each key in a
+:class:`petl.comparison.Comparable`. The output order is the same either way.
+"""
+sort_blocksize = 1000
+"""
+Number of rows written to each block of a temporary file when
+:func:`petl.transform.sorts.sort` sorts in chunks. Each block is pickled as a
+single frame, and read back a block at a time during the merge.
+"""
+sort_compression = None
+"""
+Compression applied to each block of rows written to temporary files when
+sorting in chunks. One of `None` (no compression), `'zlib'`, `'bz2'` or
+`'lzma'`, all from the Python standard library.
+"""
+sort_max_fanin = 128
+"""
+Maximum number of temporary files merged at once when
+:func:`petl.transform.sorts.sort` sorts in chunks. If there are more chunks,
+groups of chunks are first merged into intermediate files, over as many
+passes as needed. If `None`, all chunks are merged at once.
+"""
 failonerror=False # False, True, 'inline'
 """
 Controls what happens when unhandled exceptions are raised in a
@@ -28,3 +59,14 @@ transformation:
 
     - If `'inline'`, unhandled exceptions are returned.
 """
+fusion = True
+"""
+If `True`, iterating over a chain of row-wise views (such as those returned
+by :func:`petl.transform.conversions.convert`,
+:func:`petl.transform.basics.addfield`,
+:func:`petl.transform.selects.select`, :func:`petl.transform.basics.cut`,
+:func:`petl.transform.headers.rename` and
+:func:`petl.transform.maps.rowmap`) passes each row through all of them in a
+single generator, rather than one generator per view. The output is the
+same either way.
+"""
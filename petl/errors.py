@@ -26,3 +26,16 @@ class ArgumentError(Exception):
 
     def __str__(self):
         return 'argument error: %s' % self.message
+
+
+class NotSortedError(Exception):
+
+    def __init__(self, key, prev, curr):
+        self.key = key
+        self.prev = prev
+        self.curr = curr
+
+    def __str__(self):
+        return 'table is not sorted by %r: %r follows %r' % (self.key,
+                                                            self.curr,
+                                                            self.prev)
@@ -7,6 +7,7 @@ import codecs
 from petl.compat import izip_longest
 
 from petl.util.base import Table
+from petl.util.columnar import ColumnarTable
 
 
 def getcodec(encoding):
@@ -49,12 +50,21 @@ def fromcolumns(cols, header=None, missing=None):
         |  2 | 'NA' |
         +----+------+
 
+    If all columns are sequences of the same length, a
+    :class:`petl.util.columnar.ColumnarTable` is returned, which holds the
+    columns as given.
+
     See also :func:`petl.io.json.fromdicts`.
 
     .. versionadded:: 1.1.0
 
     """
 
+    if (all(hasattr(c, '__len__') and hasattr(c, '__getitem__')
+            for c in cols)
+            and len(set(len(c) for c in cols)) <= 1
+            and (header is None or len(header) == len(cols))):
+        return ColumnarTable(cols, header=header)
     return ColumnsView(cols, header=header, missing=missing)
 
 
@@ -5,6 +5,7 @@ from __future__ import division, print_function, absolute_import
 from petl.compat import next, string_types
 from petl.util.base import iterpeek, ValuesView, Table
 from petl.util.materialise import columns
+from petl.util.columnar import ColumnarTable
 
 
 def infer_dtype(table):
@@ -135,20 +136,26 @@ def fromarray(a):
         | 'pears'   | 7  | 0.1 |
         +-----------+----+-----+
 
+    The returned table is a :class:`petl.util.columnar.ColumnarTable`, where
+    the values of each field are held in a view of the array.
+
     """
 
     return ArrayView(a)
 
 
-class ArrayView(Table):
+class ArrayView(ColumnarTable):
 
     def __init__(self, a):
         self.a = a
 
-    def __iter__(self):
-        yield tuple(self.a.dtype.names)
-        for row in self.a:
-            yield tuple(row)
+    @property
+    def hdr(self):
+        return tuple(self.a.dtype.names)
+
+    @property
+    def cols(self):
+        return [self.a[f] for f in self.a.dtype.names]
 
 
 def valuestoarray(vals, dtype=None, count=-1, sample=1000):
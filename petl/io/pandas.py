@@ -6,6 +6,7 @@ import inspect
 
 
 from petl.util.base import Table
+from petl.util.columnar import ColumnarTable
 
 
 def todataframe(table, index=None, exclude=None, columns=None,
@@ -62,12 +63,16 @@ def fromdataframe(df, include_index=False):
         | 'pears'   |   7 | 0.1 |
         +-----------+-----+-----+
 
+    The returned table is a :class:`petl.util.columnar.ColumnarTable`, where
+    the values of each field are held in a column of the data frame, so values
+    keep the type of their column.
+
     """
 
     return DataFrameView(df, include_index=include_index)
 
 
-class DataFrameView(Table):
+class DataFrameView(ColumnarTable):
 
     def __init__(self, df, include_index=False):
         assert hasattr(df, 'columns') \
@@ -77,12 +82,17 @@ class DataFrameView(Table):
         self.df = df
         self.include_index = include_index
 
-    def __iter__(self):
+    @property
+    def hdr(self):
         if self.include_index:
-            yield ('index',) + tuple(self.df.columns)
-            for i, row in self.df.iterrows():
-                yield (i,) + tuple(row)
+            return ('index',) + tuple(self.df.columns)
         else:
-            yield tuple(self.df.columns)
-            for _, row in self.df.iterrows():
-                yield tuple(row)
+            return tuple(self.df.columns)
+
+    @property
+    def cols(self):
+        # N.B., iterating a series gives python scalars, as for rows
+        cols = [self.df.iloc[:, i] for i in range(len(self.df.columns))]
+        if self.include_index:
+            cols.insert(0, self.df.index)
+        return cols
@@ -302,6 +302,38 @@ def test_convert_failonerror():
             expected_output=expect_)
 
 
+def test_convert_short_long_rows():
+
+    table = (('foo', 'bar', 'baz'),
+             ('1', '2', '3'),
+             ('4',),
+             ('5', 'x', '6', 'quux'),
+             ())
+    converters = {'foo': int, 'baz': int, -1: str.upper}
+    expect = (('foo', 'bar', 'baz'),
+              (1, '2', 3),
+              (4,),
+              (5, 'x', 6, 'quux'),
+              ())
+    ieq(expect, convert(table, converters))
+    expect = (('foo', 'bar', 'baz'),
+              ('1', 2, '3'),
+              ('4',),
+              ('5', 'NA', '6', 'quux'),
+              ())
+    ieq(expect, convert(table, 'bar', int, errorvalue='NA'))
+    actual = convert(table, 'bar', lambda v, row: int(v) + int(row.foo),
+                     pass_row=True, failonerror='inline')
+    ieq((expect[0], ('1', 3, '3')), actual.head(1))
+    assert isinstance(actual[3][1], ValueError)
+    try:
+        convert(table, 'bar', int, failonerror=True).nrows()
+    except ValueError:
+        pass
+    else:
+        assert False, 'expected exception'
+
+
 def test_replace_where():
 
     tbl1 = (('foo', 'bar'),
@@ -2,6 +2,7 @@ from __future__ import absolute_import, print_function, division
 
 
 from petl.test.helpers import ieq
+from petl.errors import ArgumentError
 from petl.transform.dedup import duplicates, unique, conflicts, distinct, \
     isunique
 
@@ -258,6 +259,47 @@ def test_key_distinct_count():
     ieq(expect, result)
 
 
+def test_dedup_hash():
+
+    table = [('foo', 'bar')] + [(i * 7 % 31, i) for i in range(100)]
+
+    def inorder(rows):
+        # expected output via the sorted path, restored to input order
+        return [rows[0]] + sorted(rows[1:],
+                                  key=lambda row: table.index(row[:2]))
+
+    for f in duplicates, unique, distinct:
+        for key in 'foo', None, ('foo', 'bar'):
+            expect = inorder(list(f(table, key)))
+            # spilling partitions with few keys in memory
+            for buffersize in None, 4, '1KB':
+                ieq(expect, f(table, key, strategy='hash',
+                              buffersize=buffersize))
+            ieq(expect, f(table, key, strategy='bloom'))
+    for key in 'foo', None:
+        expect = inorder(list(distinct(table, key, count='n')))
+        for buffersize in None, 4:
+            ieq(expect, distinct(table, key, count='n', strategy='hash',
+                                 buffersize=buffersize))
+
+    # keys first seen in input order
+    ieq([('foo', 'bar'), (7, 1), (0, 0)],
+        distinct([('foo', 'bar'), (7, 1), (0, 0), (7, 2)], 'foo',
+                 strategy='hash'))
+    ieq([('foo', 'bar', 'n'), (7, 1, 2), (0, 0, 1)],
+        distinct([('foo', 'bar'), (7, 1), (0, 0), (7, 2)], 'foo', count='n',
+                 strategy='hash', buffersize=1))
+    ieq([('foo', 'bar')], unique([('foo', 'bar')], strategy='hash'))
+
+    for kwargs in dict(strategy='quux'), dict(strategy='bloom', count='n'):
+        try:
+            distinct(table, **kwargs)
+        except ArgumentError:
+            pass
+        else:
+            assert False, 'expected exception'
+
+
 def test_isunique():
 
     table = (('foo', 'bar'), ('a', 1), ('b',), ('b', 2), ('c', 3, True))
@@ -0,0 +1,111 @@
+from __future__ import absolute_import, print_function, division
+
+
+import petl.config as config
+from petl.errors import FieldSelectionError
+from petl.test.helpers import ieq, eq_
+from petl.transform.basics import cut, addfield, stack
+from petl.transform.conversions import convert
+from petl.transform.headers import rename
+from petl.transform.maps import rowmap
+from petl.transform.selects import select
+from petl.transform.fusion import _isfusable
+
+
+table1 = (('foo', 'bar', 'baz'),
+          ('1', 'a', '2.5'),
+          ('2', 'b'),
+          ('x', 'c', '7', True),
+          ['4', 'd', 'y'],
+          ('5', 'e', '1'))
+
+
+def _unfused(table):
+    saved = config.fusion
+    config.fusion = False
+    try:
+        return list(table)
+    finally:
+        config.fusion = saved
+
+
+def _check(table):
+    expect = _unfused(table)
+    assert config.fusion
+    ieq(expect, table)
+    ieq(expect, table)
+    for row in table:
+        eq_(type(row), tuple)
+
+
+def test_fusion():
+
+    t1 = convert(table1, {'foo': int, 'baz': float}, errorvalue='NA')
+    t2 = addfield(t1, 'quux', lambda row: row.bar.upper(), index=1)
+    t3 = select(t2, 'foo', lambda v: v != 'NA')
+    t4 = cut(t3, 'baz', 'foo', 'quux')
+    t5 = rename(t4, 'foo', 'FOO')
+    t6 = rowmap(t5, lambda row: (row.FOO * 2, row.quux), header=('x', 'y'))
+    for t in t2, t3, t4, t5, t6:
+        assert _isfusable(t)
+        _check(t)
+    ieq((('x', 'y'), (2, 'A'), (4, 'B'), (8, 'D'), (10, 'E')), t6)
+
+    # rows selected via records, and fields added with fixed values
+    _check(select(addfield(rename(table1, 'foo', 'f'), 'n', 1),
+                  lambda row: row.bar in 'abd', complement=True))
+    _check(addfield(select(table1, "{bar} != 'c'"), 'n', None, index=-1))
+    _check(cut(select(table1, 'baz', lambda v: v is None), 'bar'))
+    # conversions with rows passed, or where
+    _check(cut(convert(table1, 'bar', lambda v, row: v + row.foo,
+                       pass_row=True), 'bar', 'foo'))
+    _check(rename(convert(table1, 'foo', int, where=lambda row: row.bar > 'b',
+                          errorvalue=0), 'foo', 'f'))
+    _check(rename(convert(rename(table1, 'bar', 'b')), 'b', 'B'))
+
+
+def test_fusion_rowmap_errors():
+
+    mapper = lambda row: (int(row.foo), row.bar)
+    t = rowmap(cut(table1, 'foo', 'bar'), mapper, header=('foo', 'bar'))
+    _check(t)
+    eq_(4, len(list(t)) - 1)
+    t = rowmap(cut(table1, 'foo', 'bar'), mapper, header=('foo', 'bar'),
+               failonerror='inline')
+    assert isinstance(t[3][0], ValueError)
+    t = rowmap(cut(table1, 'foo', 'bar'), mapper, header=('foo', 'bar'),
+               failonerror=True)
+    try:
+        list(t)
+    except ValueError:
+        pass
+    else:
+        assert False, 'expected exception'
+
+
+def test_fusion_lazy():
+
+    t = cut(convert(table1, 'foo', int), 'bar', 'foo')
+    # converters set after the view is constructed
+    t.source['bar'] = 'upper'
+    ieq((('bar', 'foo'), ('A', 1), ('B', 2), ('C', None), ('D', 4),
+         ('E', 5)), t)
+    # errors are raised during iteration as before
+    t = rename(convert(table1, 'foo', int), 'quux', 'q')
+    it = iter(t)
+    try:
+        next(it)
+    except FieldSelectionError:
+        pass
+    else:
+        assert False, 'expected exception'
+
+
+def test_fusion_not_fused():
+
+    # stacking more than one table can't be fused
+    t = cut(stack(table1, table1), 'foo')
+    assert not _isfusable(t)
+    _check(t)
+    # views whose source isn't a row-wise view aren't fused
+    assert not _isfusable(cut(table1, 'foo'))
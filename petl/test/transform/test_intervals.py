@@ -1052,3 +1052,138 @@ else:
                   (1, 8, 'j', 4, 9, 'baz'))
         ieq(expect, actual)
         ieq(expect, actual)
+
+    def test_interval_sweep():
+
+        left = (('fruit', 'begin', 'end', 'quux'),
+                ('apple', 9, 14, 'd'),
+                ('apple', 2, 5, 'c'),
+                ('orange', 2, 5, 'c'),
+                ('apple', 1, 1, 'e'),
+                ('apple', 2, 4, 'b'),
+                ('orange', 19, 140, 'f'),
+                ('pear', 1, 3, 'g'),
+                ('apple', 1, 2, 'a'))
+        right = (('type', 'start', 'stop', 'value'),
+                 ('apple', 3, 7, 'bar'),
+                 ('apple', 1, 4, 'foo'),
+                 ('orange', 4, 9, 'baz'),
+                 ('apple', 1, 4, 'foo'),
+                 ('banana', 1, 9, 'qux'))
+        sortedleft = etl.sort(left, 'begin')
+        facetleft = etl.sort(left, ('fruit', 'begin'))
+        for f, kwargs in ((intervaljoin, dict()),
+                          (intervaljoin, dict(lprefix='l_', rprefix='r_')),
+                          (intervalleftjoin, dict(missing='NA')),
+                          (intervalantijoin, dict()),
+                          (intervalsubtract, dict())):
+            for include_stop in False, True:
+                expect = f(sortedleft, right, lstart='begin', lstop='end',
+                           include_stop=include_stop, **kwargs)
+                actual = f(left, right, lstart='begin', lstop='end',
+                           include_stop=include_stop, sweep=True, **kwargs)
+                ieq(expect, actual)
+                ieq(expect, actual)
+                expect = f(facetleft, right, lstart='begin', lstop='end',
+                           lkey='fruit', rkey='type',
+                           include_stop=include_stop, **kwargs)
+                actual = f(left, right, lstart='begin', lstop='end',
+                           lkey='fruit', rkey='type',
+                           include_stop=include_stop, sweep=True,
+                           buffersize=2, **kwargs)
+                ieq(expect, actual)
+
+        # already sorted
+        actual = intervaljoin(facetleft, etl.sort(right, ('type', 'start')),
+                              lstart='begin', lstop='end', lkey='fruit',
+                              rkey='type', sweep=True, presorted='verify')
+        ieq(intervaljoin(facetleft, right, lstart='begin', lstop='end',
+                         lkey='fruit', rkey='type'), actual)
+        actual = intervaljoin(left, right, lstart='begin', lstop='end',
+                              sweep=True, presorted='verify')
+        try:
+            actual.nrows()
+        except etl.NotSortedError:
+            pass
+        else:
+            assert False, 'expected exception'
+
+        # null intervals in the right table aren't allowed, as for a lookup
+        right = (('start', 'stop', 'value'),
+                 (1, 4, 'foo'),
+                 (3, 3, 'bar'))
+        for include_stop in False, True:
+            for sweep in False, True:
+                actual = intervaljoin(left, right, lstart='begin', lstop='end',
+                                      include_stop=include_stop, sweep=sweep)
+                try:
+                    actual.nrows()
+                except ValueError:
+                    pass
+                else:
+                    assert False, 'expected exception'
+
+    def test_intervalindex_intervaltree():
+
+        import pickle
+        from petl.transform.intervals import IntervalIndex, tupletree, \
+            IntervalTreeLookup
+
+        table = (('start', 'stop', 'value'),
+                 (4, 9, 'baz'),
+                 (1, 4, 'foo'),
+                 (3, 7, 'bar'),
+                 (1, 4, 'foo'),
+                 (1, 4, 'aaa'),
+                 (2, 30, 'qux'),
+                 (10, 12, 'quux'))
+        for include_stop in False, True:
+            expect = IntervalTreeLookup(tupletree(table),
+                                        include_stop=include_stop)
+            actual = intervallookup(table, include_stop=include_stop)
+            assert isinstance(actual.tree, IntervalIndex)
+            eq_(6, len(actual.tree))
+            actual = pickle.loads(pickle.dumps(actual))
+            for start in range(0, 14):
+                eq_(expect.search(start), actual.search(start))
+                for stop in range(start - 1, 16):
+                    eq_(expect.search(start, stop),
+                        actual.search(start, stop))
+
+
+def test_intervalindex():
+
+    import pickle
+    import random
+    from petl.transform.intervals import IntervalIndex
+
+    # compare with a scan over all intervals, with some long intervals
+    rnd = random.Random(42)
+    for n in 0, 1, 2, 3, 7, 8, 9, 100:
+        intervals = list()
+        for _ in range(n):
+            start = rnd.randint(0, 100)
+            stop = start + rnd.randint(1, rnd.choice([5, 100]))
+            intervals.append((start, stop, rnd.randint(0, 3)))
+        index = pickle.loads(pickle.dumps(IntervalIndex(intervals)))
+        intervals = sorted(set(intervals))
+        eq_(intervals, list(index))
+        for start in range(-2, 210, 3):
+            for stop in start - 1, start + 1, start + 10:
+                expect = [v for x, y, v in intervals
+                          if x < stop and y > start]
+                eq_(expect if start < stop else [],
+                    index.overlap(start, stop))
+            eq_([v for x, y, v in intervals if x <= start < y],
+                index.at(start))
+
+    index = IntervalIndex([(2.5, 3.5, 'a'), (1, 2, 'b')])
+    eq_(['b', 'a'], index.overlap(0, 3))
+    eq_(['a'], index.at(3))
+    eq_([], index.overlap(3, 3))
+    try:
+        IntervalIndex([(1, 1, 'a')])
+    except ValueError:
+        pass
+    else:
+        assert False, 'expected exception'
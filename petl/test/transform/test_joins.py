@@ -1,9 +1,14 @@
 from __future__ import absolute_import, print_function, division
 
 
-from petl.test.helpers import ieq
-from petl import join, leftjoin, rightjoin, outerjoin, crossjoin, antijoin, \
-    lookupjoin, hashjoin, hashleftjoin, hashrightjoin, hashantijoin, \
+from petl.test.helpers import ieq, eq_
+from petl.errors import ArgumentError, NotSortedError
+import petl.config as config
+from petl.util.bloom import bloomfilter
+import petl.transform.hashjoins as hashjoins
+import petl.transform.sorts as sorts
+from petl import wrap, join, leftjoin, rightjoin, outerjoin, crossjoin, \
+    antijoin, lookupjoin, hashjoin, hashleftjoin, hashrightjoin, hashantijoin, \
     hashlookupjoin, unjoin, sort, cut
 
 
@@ -1211,6 +1216,244 @@ def test_hashlookupjoin():
     _test_lookupjoin(hashlookupjoin)
 
 
+def test_hashjoins_buffersize():
+
+    def buffered(impl):
+        def f(*args, **kwargs):
+            return impl(*args, buffersize=1000, **kwargs)
+        return f
+
+    # not partitioned
+    _test_join(buffered(hashjoin))
+    _test_leftjoin(buffered(hashleftjoin))
+    _test_rightjoin(buffered(hashrightjoin))
+    _test_antijoin(buffered(hashantijoin))
+    _test_lookupjoin(buffered(hashlookupjoin))
+
+
+def test_hashjoins_partitioned():
+
+    left = [('id', 'lv')] + [(i % 37, 'l%s' % i) for i in range(150)]
+    right = [('id', 'rv')] + [(i % 53, 'r%s' % i) for i in range(0, 300, 3)]
+    for buffersize in 10, '2KB':
+        for impl in hashjoin, hashleftjoin, hashrightjoin, hashlookupjoin:
+            expect = impl(left, right, key='id', lprefix='l_', rprefix='r_')
+            actual = impl(left, right, key='id', lprefix='l_', rprefix='r_',
+                          buffersize=buffersize)
+            ieq(sort(expect), sort(actual))
+            ieq(sort(expect), sort(actual))
+        ieq(sort(hashantijoin(left, right, key='id')),
+            sort(hashantijoin(left, right, key='id', buffersize=buffersize)))
+
+
+def test_hashjoins_partitioned_hot_key():
+
+    # most rows on the build side share one key, which can't be split up by
+    # partitioning again
+    left = [('id', 'lv')] + [(i % 5, 'l%s' % i) for i in range(20)]
+    right = [('id', 'rv')] + [(0, 'r%s' % i) for i in range(100)]
+    right += [(i, 'r%s' % i) for i in range(1, 5)]
+    nwriters = [0]
+    PartitionWriter = hashjoins._PartitionWriter
+
+    def _PartitionWriter(*args):
+        nwriters[0] += 1
+        return PartitionWriter(*args)
+    hashjoins._PartitionWriter = _PartitionWriter
+    try:
+        actual = hashjoin(left, right, key='id', buffersize=10)
+        ieq(sort(hashjoin(left, right, key='id')), sort(actual))
+    finally:
+        hashjoins._PartitionWriter = PartitionWriter
+    # partitioned once, for each side
+    eq_(2, nwriters[0])
+
+
+def test_hashjoins_default_buffersize():
+
+    # tables aren't partitioned unless a buffersize is given, so rows are
+    # output in left table order whatever the size of the right table
+    left = [('id', 'lv')] + [(i, 'l%s' % i) for i in range(299, -1, -1)]
+    right = [('id', 'rv')] + [(i, 'r%s' % i) for i in range(0, 300, 2)]
+    saved = config.sort_buffersize
+    config.sort_buffersize = 50
+    try:
+        expect = [('id', 'lv')] + [row for row in left[1:] if row[0] % 2]
+        ieq(expect, hashantijoin(left, right, key='id'))
+        expect = [('id', 'lv', 'rv')]
+        expect += [row + (None if row[0] % 2 else 'r%s' % row[0],)
+                   for row in left[1:]]
+        ieq(expect, hashlookupjoin(left, right, key='id'))
+    finally:
+        config.sort_buffersize = saved
+
+
+def test_hashjoins_bloom():
+
+    left = [('id', 'lv')] + [(i, 'l%s' % i) for i in range(300)]
+    right = [('id', 'rv')] + [(i * 10, 'r%s' % i) for i in range(20)]
+    for bloom in True, False, bloomfilter(right, 'id'):
+        for buffersize in None, 5:
+            ieq(sort(hashjoin(left, right, key='id')),
+                sort(hashjoin(left, right, key='id', buffersize=buffersize,
+                              bloom=bloom)))
+            ieq(sort(hashantijoin(left, right, key='id')),
+                sort(hashantijoin(left, right, key='id',
+                                  buffersize=buffersize, bloom=bloom)))
+
+
+def test_join_sorted():
+
+    table1 = (('id', 'colour'),
+              (3, 'purple'),
+              (1, 'blue'),
+              (2, 'red'))
+    table2 = (('id', 'shape'),
+              (4, 'ellipse'),
+              (1, 'circle'),
+              (3, 'square'))
+    sorted1 = sort(table1, ['id', 'colour'])
+    sorted2 = sort(table2, 'id')
+    actual = join(sorted1, sorted2, key='id')
+    # inputs sorted by a compatible key are not sorted again
+    assert actual.left is sorted1
+    assert actual.right is sorted2
+    ieq(join(table1, table2, key='id'), actual)
+    actual = antijoin(sorted1, table2, key='id')
+    assert actual.left is sorted1
+    assert actual.right is not table2
+    ieq(antijoin(table1, table2, key='id'), actual)
+
+
+def test_join_presorted_verify():
+
+    table1 = (('id', 'colour'),
+              (1, 'blue'),
+              (2, 'red'),
+              (3, 'purple'))
+    table2 = (('id', 'shape'),
+              (3, 'square'),
+              (1, 'circle'),
+              (4, 'ellipse'))
+    for impl in join, leftjoin, rightjoin, outerjoin, antijoin, lookupjoin:
+        actual = impl(table1, table2, key='id', presorted='verify')
+        try:
+            list(actual)
+        except NotSortedError as e:
+            eq_('id', e.key)
+            eq_(3, e.prev)
+            eq_(1, e.curr)
+        else:
+            assert False, 'expected exception'
+        actual = impl(table1, sort(table2, 'id'), key='id',
+                      presorted='verify')
+        ieq(impl(table1, table2, key='id'), actual)
+
+        actual = impl(table1, table2, key='id', presorted='fallback')
+        ieq(impl(table1, table2, key='id'), actual)
+        ieq(impl(table1, table2, key='id'), actual)
+
+    # interleaved iterations are independent
+    left = [('id', 'lv')] + [(i, 'l%s' % i) for i in range(10)]
+    right = [('id', 'rv')] + [(i, 'r%s' % i) for i in range(10)]
+    actual = join(left, right, key='id', presorted='verify')
+    it1 = iter(actual)
+    it2 = iter(actual)
+    eq_(next(it1), next(it2))
+    eq_(next(it1), next(it2))
+    eq_(9, len(list(it1)))
+    eq_(9, len(list(it2)))
+
+    try:
+        join(table1, table2, key='id', presorted='foo')
+    except ArgumentError:
+        pass
+    else:
+        assert False, 'expected exception'
+
+
+def test_joins_auto():
+
+    table1 = (('id', 'colour'),
+              (1, 'blue'),
+              (2, 'red'),
+              (3, 'purple'))
+    table2 = (('id', 'shape'),
+              (1, 'circle'),
+              (3, 'square'),
+              (4, 'ellipse'))
+    # both tables are sorted, so are merged directly
+    for impl in join, leftjoin, outerjoin, antijoin:
+        actual = impl(table1, table2, key='id', strategy='auto')
+        ieq(impl(table1, table2, key='id'), actual)
+        ieq(impl(table1, table2, key='id'), actual)
+        eq_('presorted', actual.plan['strategy'])
+        eq_(3, actual.plan['lrows'])
+        eq_(3, actual.plan['rkeys'])
+
+    # not sorted, so joined via hash lookup where possible
+    table3 = (('id', 'shape'),
+              (4, 'ellipse'),
+              (1, 'circle'),
+              (3, 'square'),
+              (1, 'square'))
+    for impl in join, leftjoin, antijoin:
+        actual = impl(table1, table3, key='id', strategy='auto')
+        ieq(sort(impl(table1, table3, key='id')), sort(actual))
+        eq_('hash', actual.plan['strategy'])
+        assert not actual.plan['rsorted']
+    actual = outerjoin(table1, table3, key='id', strategy='auto')
+    ieq(outerjoin(table1, table3, key='id'), actual)
+    eq_('sort', actual.plan['strategy'])
+
+    # unhashable keys
+    table4 = (('id', 'colour'), ([2], 'red'), ([1], 'blue'))
+    table5 = (('id', 'shape'), ([1], 'circle'))
+    actual = join(table4, table5, key='id', strategy='auto')
+    ieq(join(table4, table5, key='id'), actual)
+    eq_('sort', actual.plan['strategy'])
+
+    try:
+        join(table1, table2, key='id', strategy='foo')
+    except ArgumentError:
+        pass
+    else:
+        assert False, 'expected exception'
+
+
+def test_joins_auto_large():
+
+    # tables of unknown length, larger than the sample
+    left = wrap([('id', 'lv')] + [(i * 7 % 1500, 'l%s' % i)
+                                  for i in range(3000)])
+    right = wrap([('id', 'rv')] + [(i, 'r%s' % i) for i in range(2000)])
+    actual = join(left, right, key='id', strategy='auto', buffersize=500)
+    ieq(sort(join(left, right, key='id')), sort(actual))
+    eq_('hash', actual.plan['strategy'])
+    assert actual.plan['spill']
+    assert actual.plan['rsorted']
+
+    actual = join(sort(left, 'id'), right, key='id', strategy='auto',
+                  buffersize=500)
+    ieq(join(left, right, key='id'), actual)
+    eq_('presorted', actual.plan['strategy'])
+    assert not actual.plan['lverify']
+    # the rest of the right table is checked as rows are merged
+    assert actual.plan['rverify']
+
+    # sorted in the sample only
+    left = wrap([('id', 'lv')] + [(i % 1500, 'l%s' % i)
+                                  for i in range(3000)])
+    actual = join(left, right, key='id', strategy='auto')
+    eq_('presorted', actual.plan['strategy'])
+    try:
+        actual.nrows()
+    except NotSortedError:
+        pass
+    else:
+        assert False, 'expected exception'
+
+
 def test_unjoin_implicit_key():
 
     # test the case where the join key needs to be reconstructed
@@ -1380,3 +1623,142 @@ def test_unjoin_explicit_key_5():
     ieq(expect_left, left)
     ieq(expect_right, right)
     ieq(expect_right, right)
+
+
+def test_join_columnar():
+
+    try:
+        import numpy as np
+    except ImportError:
+        return
+    from petl.util.columnar import columnar
+    from petl.io.numpy import fromarray
+    from petl.transform.joins import ColumnarJoinView, _columnarjoin
+
+    a1 = np.array([(3, 'c', 1.5), (1, 'a', 2.5), (2, 'b', 0.5),
+                   (1, 'b', 4.0), (5, 'e', 3.0)],
+                  dtype=[('id', 'i8'), ('code', 'U1'), ('x', 'f8')])
+    a2 = np.array([(1, 'a', 10), (3, 'c', 30), (1, 'b', 11), (4, 'd', 40),
+                   (1, 'a', 12)],
+                  dtype=[('id', 'i8'), ('code', 'U1'), ('y', 'i4')])
+    table1 = fromarray(a1)
+    table2 = fromarray(a2)
+    rows1 = [tuple(row) for row in table1]
+    rows2 = [tuple(row) for row in table2]
+    for key in 'id', ('id', 'code'):
+        for f, kwargs in ((join, dict()),
+                          (join, dict(rprefix='r_')),
+                          (leftjoin, dict(missing='NA')),
+                          (hashjoin, dict(lprefix='l_')),
+                          (hashleftjoin, dict())):
+            actual = f(table1, table2, key=key, **kwargs)
+            assert isinstance(actual, ColumnarJoinView)
+            ieq(f(rows1, rows2, key=key, **kwargs), actual)
+            ieq(f(rows1, rows2, key=key, **kwargs), actual)
+    # values are python objects, whether or not rows are matched
+    for row in leftjoin(table1, table2, key='id'):
+        for v in row:
+            assert not isinstance(v, np.generic), (row, type(v))
+
+    # tables are joined when iterated
+    t1 = columnar([('id', 'foo'), (1, 'a'), (2, 'b')])
+    t2 = columnar([('id', 'bar'), (1, 10), (2, 20)])
+    actual = join(t1, t2, key='id')
+    t2.column('bar')[1] = 21
+    ieq((('id', 'foo', 'bar'), (1, 'a', 10), (2, 'b', 21)), actual)
+
+    # typed array buffers stay typed arrays
+    table3 = columnar([('id', 'foo')] + [(i % 3, i) for i in range(10)])
+    table4 = columnar([('id', 'bar')] + [(i, i * 0.5) for i in range(2)])
+    actual = join(table3, table4, key='id')
+    ieq(join(list(table3), list(table4), key='id'), actual)
+    eq_('q', _columnarjoin(table3, table4, 'id', 'id').column('foo').typecode)
+    ieq(leftjoin(list(table3), list(table4), key='id'),
+        leftjoin(table3, table4, key='id'))
+
+    # keys of different kinds or held in lists are joined row by row
+    table5 = fromarray(np.array([(1.0, 'x')],
+                                dtype=[('id', 'f8'), ('z', 'U1')]))
+    eq_(None, _columnarjoin(table1, table5, 'id', 'id'))
+    ieq(join(rows1, list(table5), key='id'), join(table1, table5, key='id'))
+    table6 = columnar([('id', 'z'), ('a', 1)])
+    eq_(None, _columnarjoin(table6, table6, 'id', 'id'))
+    ieq(join(list(table6), list(table6), key='id'),
+        join(table6, table6, key='id'))
+    assert not isinstance(join(table1, table2, key='id', strategy='auto'),
+                          ColumnarJoinView)
+
+
+def test_join_rows_unmatched_compound_key():
+
+    # key fields at different positions and in a different order, rows as
+    # lists
+    table1 = [['x', 'k1', 'k2'],
+              ['a', 1, 'p'],
+              ['b', 2, 'q']]
+    table2 = [['k2', 'y', 'k1'],
+              ['p', True, 1],
+              ['r', False, 3]]
+    expect = (('x', 'k1', 'k2', 'y'),
+              ('a', 1, 'p', True),
+              ('b', 2, 'q', 'NA'),
+              ('NA', 3, 'r', False))
+    actual = outerjoin(table1, table2, lkey=('k1', 'k2'), rkey=('k1', 'k2'),
+                       missing='NA')
+    ieq(expect, actual)
+    actual = hashrightjoin(table1, table2, lkey=('k1', 'k2'),
+                           rkey=('k1', 'k2'), missing='NA')
+    ieq((expect[0], expect[1], expect[3]), actual)
+    ieq((expect[0], expect[1], expect[2]),
+        hashleftjoin(table1, table2, key=('k1', 'k2'), missing='NA'))
+
+
+def test_crossjoin_three():
+
+    table1 = [['a'], [1], [2]]
+    table2 = [['b', 'c'], ['x', True]]
+    table3 = (('d',), (None,), (3,))
+    expect = (('a', 'b', 'c', 'd'),
+              (1, 'x', True, None),
+              (1, 'x', True, 3),
+              (2, 'x', True, None),
+              (2, 'x', True, 3))
+    ieq(expect, crossjoin(table1, table2, table3))
+
+
+def test_hashjoin_workers():
+
+    table1 = [('id', 'x')] + [(i * 7 % 23, i) for i in range(200)]
+    table2 = [('id', 'y', 'z')] + [(i % 29, i, 'z%s' % i) for i in range(60)]
+    expect = hashjoin(table1, table2, key='id', rprefix='r_')
+    actual = hashjoin(table1, table2, key='id', rprefix='r_', workers=3)
+    ieq(sort(expect), sort(actual))
+    # output in the order of the left table, also where partitions are
+    # partitioned again in workers
+    for kwargs in (dict(), dict(buffersize=5), dict(bloom=True),
+                   dict(bloom=False)):
+        actual = hashjoin(table1, table2, key='id', rprefix='r_', workers=3,
+                          stable=True, **kwargs)
+        ieq(expect, actual)
+        ieq(expect, actual)
+    actual = hashjoin(table1, [('id', 'y')], key='id', workers=2)
+    ieq([('id', 'x', 'y')], actual)
+
+
+def test_hashjoin_workers_py2():
+
+    table1 = [('id', 'x'), (1, 'a'), (2, 'b')]
+    table2 = [('id', 'y'), (1, 'c')]
+    saved = sorts.PY2
+    sorts.PY2 = True
+    try:
+        try:
+            hashjoin(table1, table2, key='id', workers=2)
+        except ArgumentError:
+            pass
+        else:
+            assert False, 'expected exception'
+        ieq([('id', 'x', 'y'), (1, 'a', 'c')],
+            hashjoin(table1, table2, key='id'))
+    finally:
+        sorts.PY2 = saved
@@ -5,10 +5,13 @@ import operator
 
 
 from collections import OrderedDict
-from petl.test.helpers import ieq
+from petl.test.helpers import ieq, eq_
 from petl.util import strjoin
+from petl.transform.sorts import sort
 from petl.transform.reductions import rowreduce, aggregate, \
-    mergeduplicates, Conflict, fold
+    mergeduplicates, Conflict, fold, hashaggregate, Count, Sum, Min, Max, \
+    Mean, Variance, First, Last, CountDistinct, Accumulator, \
+    _PartialAggregateView, _combinable
 
 
 def test_rowreduce():
@@ -215,8 +218,285 @@ def test_aggregate_more():
     table3['listbar'] = 'bar'  # default aggregation is list
     table3['bars'] = 'bar', strjoin(', ')
     ieq(expect2, table3)
-    
-    
+
+
+def test_aggregate_buffersize_bytes():
+
+    table1 = [('foo', 'bar')] + [('k%s' % (i % 3), i) for i in range(300)]
+    aggregators = OrderedDict()
+    aggregators['count'] = len
+    aggregators['sumbar'] = 'bar', sum
+    expect2 = (('foo', 'count', 'sumbar'),
+               ('k0', 100, sum(range(0, 300, 3))),
+               ('k1', 100, sum(range(1, 300, 3))),
+               ('k2', 100, sum(range(2, 300, 3))))
+    table2 = aggregate(table1, 'foo', aggregators, buffersize='4KB')
+    ieq(expect2, table2)
+    ieq(expect2, table2)
+
+
+def test_hashaggregate():
+
+    table1 = (('foo', 'bar', 'baz'),
+              ('b', 2, True),
+              ('a', 3, True),
+              ('a', 7, False),
+              ('b', 1, False),
+              ('b', 9, False),
+              ('c', 4, True))
+
+    # simple aggregation
+    ieq(aggregate(table1, 'foo', len).cut(0, 1).sort(),
+        hashaggregate(table1, 'foo', len).sort())
+    expect = (('foo', 'value'),
+              ('b', 12),
+              ('a', 10),
+              ('c', 4))
+    actual = hashaggregate(table1, 'foo', sum, 'bar')
+    ieq(expect, actual)
+    ieq(expect, actual)
+    for key, value in (('foo', ('bar', 'baz')), (('foo', 'bar'), 'baz'),
+                       (('foo',), None)):
+        ieq(sort(aggregate(table1, key, list, value)),
+            sort(hashaggregate(table1, key, list, value)))
+
+    # multiple aggregations
+    aggregators = OrderedDict()
+    aggregators['count'] = len
+    aggregators['minbar'] = 'bar', min
+    aggregators['maxbar'] = 'bar', max
+    aggregators['sumbar'] = 'bar', sum
+    aggregators['listbar'] = 'bar'
+    aggregators['listbarbaz'] = ('bar', 'baz'), list
+    aggregators['bars'] = 'bar', strjoin(', ')
+    aggregators['first'] = lambda rows: rows[0].bar,
+    expect = (('foo', 'count', 'minbar', 'maxbar', 'sumbar', 'listbar',
+               'listbarbaz', 'bars', 'first'),
+              ('b', 3, 1, 9, 12, [2, 1, 9], [(2, True), (1, False), (9, False)],
+               '2, 1, 9', 2),
+              ('a', 2, 3, 7, 10, [3, 7], [(3, True), (7, False)], '3, 7', 3),
+              ('c', 1, 4, 4, 4, [4], [(4, True)], '4', 4))
+    actual = hashaggregate(table1, 'foo', aggregators)
+    ieq(expect, actual)
+    actual = hashaggregate(table1, 'foo', [
+        (k,) + (v if isinstance(v, tuple) else (v,))
+        for k, v in aggregators.items()
+    ])
+    ieq(expect, actual)
+    actual = hashaggregate(table1, 'foo')
+    for k, v in aggregators.items():
+        actual[k] = v
+    ieq(expect, actual)
+
+    # callable key
+    expect = (('key', 'value'),
+              (False, 3),
+              (True, 3))
+    actual = hashaggregate(table1, lambda rec: rec.bar > 3, len)
+    ieq(expect, actual)
+
+
+def test_hashaggregate_spill():
+
+    table1 = [('foo', 'bar')]
+    for i in range(1000):
+        table1.append(('k%s' % (i % 37), i))
+    expect = aggregate(table1, 'foo', sum, 'bar')
+    for buffersize in 50, 200, '2KB', 10000:
+        actual = hashaggregate(table1, 'foo', sum, 'bar',
+                               buffersize=buffersize)
+        ieq(expect, sort(actual, 'foo'))
+
+    # a single large group cannot be split
+    table2 = [('foo', 'bar')] + [('a', i) for i in range(100)]
+    table2.append(('b', 1))
+    actual = hashaggregate(table2, 'foo', len, buffersize=10)
+    ieq((('foo', 'value'), ('a', 100), ('b', 1)), sort(actual, 'foo'))
+
+
+def test_hashaggregate_empty():
+
+    table = (('foo', 'bar'),)
+    ieq((('foo', 'value'),), hashaggregate(table, 'foo', sum, 'bar'))
+
+
+def test_accumulators():
+
+    values = [3, 1, 4, 1, 5, 9, 2, 6]
+    eq_(8, Count()(values))
+    eq_(31, Sum()(values))
+    eq_(1, Min()(values))
+    eq_(9, Max()(values))
+    eq_(3.875, Mean()(values))
+    eq_(3, First()(values))
+    eq_(6, Last()(values))
+    eq_(7, CountDistinct()(values))
+    mean = sum(values) / len(values)
+    expect = sum((v - mean)**2 for v in values) / len(values)
+    assert abs(expect - Variance()(values)) < 1e-9
+    for acc in Min(), Max(), Mean(), Variance(), First(), Last():
+        eq_(None, acc([]))
+
+    # merging states accumulated over separate runs of values
+    for acc in (Count(), Sum(), Min(), Max(), Mean(), Variance(), First(),
+                Last(), CountDistinct()):
+        for i in range(len(values) + 1):
+            a = b = acc.init()
+            for v in values[:i]:
+                a = acc.step(a, v)
+            for v in values[i:]:
+                b = acc.step(b, v)
+            actual = acc.finalize(acc.merge(a, b))
+            expect = acc(values)
+            if isinstance(expect, float):
+                assert abs(expect - actual) < 1e-9, (acc, i, actual)
+            else:
+                eq_(expect, actual)
+
+
+def test_aggregate_accumulators():
+
+    table1 = (('foo', 'bar', 'baz'),
+              ('a', 3, True),
+              ('a', 7, False),
+              ('b', 2, True),
+              ('b', 2, False),
+              ('b', 9, False),
+              ('c', 4, True))
+
+    aggregators = OrderedDict()
+    aggregators['count'] = len
+    aggregators['rows'] = Count(),
+    aggregators['minbar'] = 'bar', Min()
+    aggregators['maxbar'] = 'bar', Max()
+    aggregators['sumbar'] = 'bar', Sum()
+    aggregators['meanbar'] = 'bar', Mean()
+    aggregators['firstbaz'] = 'baz', First()
+    aggregators['lastbarbaz'] = ('bar', 'baz'), Last()
+    aggregators['distinctbar'] = 'bar', CountDistinct()
+    expect = (('foo', 'count', 'rows', 'minbar', 'maxbar', 'sumbar',
+               'meanbar', 'firstbaz', 'lastbarbaz', 'distinctbar'),
+              ('a', 2, 2, 3, 7, 10, 5.0, True, (7, False), 2),
+              ('b', 3, 3, 2, 9, 13, 13 / 3, True, (9, False), 2),
+              ('c', 1, 1, 4, 4, 4, 4.0, True, (4, True), 1))
+    ieq(expect, aggregate(table1, 'foo', aggregators))
+    ieq(expect, sort(hashaggregate(table1, 'foo', aggregators), 'foo'))
+
+    # simple aggregation
+    ieq((('foo', 'value'), ('a', 10), ('b', 13), ('c', 4)),
+        aggregate(table1, 'foo', Sum(), 'bar'))
+    ieq((('foo', 'value'), ('a', 2), ('b', 3), ('c', 1)),
+        sort(hashaggregate(table1, 'foo', Count()), 'foo'))
+
+    # mixed with other aggregation functions
+    aggregators['bars'] = 'bar', strjoin(', ')
+    actual = aggregate(table1, 'foo', aggregators)
+    ieq(('a', 'b', 'c'), actual.values('foo'))
+    ieq(('3, 7', '2, 2, 9', '4'), actual.values('bars'))
+    ieq((5.0, 13 / 3, 4.0), actual.values('meanbar'))
+
+
+def test_hashaggregate_accumulators_spill():
+
+    table1 = [('foo', 'bar')]
+    for i in range(1000):
+        table1.append(('k%s' % (i % 37), i))
+    aggregators = OrderedDict()
+    aggregators['sum'] = 'bar', Sum()
+    aggregators['max'] = 'bar', Max()
+    expect = aggregate(table1, 'foo', aggregators)
+    for buffersize in 5, 20, 10000:
+        actual = hashaggregate(table1, 'foo', aggregators,
+                               buffersize=buffersize)
+        ieq(expect, sort(actual, 'foo'))
+
+
+def test_aggregate_combine():
+
+    table1 = [('foo', 'bar')]
+    for i in range(1000):
+        table1.append(('k%s' % (i % 7), i))
+    aggregators = OrderedDict()
+    aggregators['count'] = len
+    aggregators['sum'] = 'bar', Sum()
+    aggregators['first'] = 'bar', First()
+    aggregators['last'] = 'bar', Last()
+    aggregators['mean'] = 'bar', Mean()
+    expect = sort(hashaggregate(table1, 'foo', aggregators), 'foo')
+    for buffersize in 3, 10, 50, None:
+        actual = aggregate(table1, 'foo', aggregators, buffersize=buffersize)
+        ieq(expect, actual)
+        ieq(expect, actual)
+    ieq(expect.cut('foo', 'sum').rename('sum', 'value'),
+        aggregate(table1, 'foo', Sum(), 'bar', buffersize=10))
+
+    # only partial states for each buffer of rows are sorted
+    partials = _PartialAggregateView(table1, 'foo', [('bar', Sum())],
+                                     buffersize=100)
+    eq_(7, partials.nrows())
+
+    # accumulators without merge are not combined
+    class Concat(Accumulator):
+        def init(self):
+            return ''
+
+        def step(self, state, value):
+            return state + str(value)
+
+    assert not Concat().combinable
+    assert Sum().combinable
+    table2 = (('foo', 'bar'), ('b', 1), ('a', 2), ('b', 3))
+    ieq((('foo', 'value'), ('a', '2'), ('b', '13')),
+        aggregate(table2, 'foo', Concat(), 'bar', buffersize=1))
+
+    # counting alone, or no aggregation, isn't combined
+    assert not _combinable([len])
+    assert not _combinable([])
+    assert _combinable([len, Sum()])
+
+
+class _CountingTable(object):
+    # a table which counts how many times it has been iterated
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.n = 0
+
+    def __iter__(self):
+        self.n += 1
+        return iter(self.rows)
+
+
+def test_aggregate_combine_cache():
+
+    table1 = _CountingTable([('foo', 'bar')] +
+                            [('k%s' % (i % 7), i) for i in range(100)])
+    expect = sort(hashaggregate(table1.rows, 'foo', Sum(), 'bar'), 'foo')
+    actual = aggregate(table1, 'foo', Sum(), 'bar', buffersize=10)
+    ieq(expect, actual)
+    ieq(expect, actual)
+    eq_(1, table1.n)
+    actual = aggregate(table1, 'foo', {'sum': ('bar', Sum())}, buffersize=10)
+    ieq(expect.rename('value', 'sum'), actual)
+    ieq(expect.rename('value', 'sum'), actual)
+    eq_(2, table1.n)
+    # changing the aggregation combines again
+    actual['max'] = 'bar', Max()
+    ieq(sort(hashaggregate(table1.rows, 'foo', actual.aggregation), 'foo'),
+        actual)
+    eq_(3, table1.n)
+    actual = fold(table1, 'foo', operator.add, 'bar', combiner=True,
+                  buffersize=10)
+    ieq(expect.rename('foo', 'key'), actual)
+    ieq(expect.rename('foo', 'key'), actual)
+    eq_(4, table1.n)
+    actual = aggregate(table1, 'foo', Sum(), 'bar', buffersize=10,
+                       cache=False)
+    ieq(expect, actual)
+    ieq(expect, actual)
+    eq_(6, table1.n)
+
+
 def test_aggregate_multiple_source_fields():
     
     table = (('foo', 'bar', 'baz'),
@@ -327,3 +607,18 @@ def test_fold():
     expect = (('key', 'value'), (1, 8), (2, 12))
     ieq(expect, t2)
     ieq(expect, t2)
+
+
+def test_fold_combiner():
+
+    t1 = (('id', 'count'), (2, 4), (1, 3), (2, 8), (1, 5), (3, 1))
+    expect = (('key', 'value'), (1, 8), (2, 12), (3, 1))
+    for buffersize in 1, 2, None:
+        ieq(expect, fold(t1, 'id', operator.add, 'count', combiner=True,
+                         buffersize=buffersize))
+    # order of values is kept
+    t2 = (('id', 'name'), (2, 'd'), (1, 'a'), (2, 'e'), (1, 'b'), (1, 'c'))
+    expect = (('key', 'value'), (1, 'abc'), (2, 'de'))
+    for buffersize in 1, 2, None:
+        ieq(expect, fold(t2, 'id', operator.add, 'name',
+                         combiner=operator.add, buffersize=buffersize))
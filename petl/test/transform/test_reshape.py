@@ -1,10 +1,13 @@
 from __future__ import absolute_import, print_function, division
 
 
+import os
+import shutil
+import tempfile
 from datetime import datetime
 
 
-from petl.test.helpers import ieq
+from petl.test.helpers import ieq, eq_
 from petl.transform.reshape import melt, recast, transpose, pivot, flatten, \
     unflatten
 from petl.transform.regex import split, capture
@@ -247,6 +250,35 @@ def test_recast4():
     ieq(expect, result)
 
 
+class _OnceTable(object):
+    # a table which can only be iterated once
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __iter__(self):
+        assert self.rows is not None, 'table iterated twice'
+        rows, self.rows = self.rows, None
+        return iter(rows)
+
+
+def test_recast_onepass():
+
+    table = [('id', 'variable', 'value')]
+    table += [(i % 7, 'v%s' % (i % 5), i) for i in range(100)]
+    table += [(None, 'v9', 1), (3.0, 'v1', 2)]
+    expect = list(recast(table, key='id', samplesize=50))
+    # values for v9 are beyond the sample, so are left out
+    assert 'v9' not in expect[0]
+    ieq(expect, recast(_OnceTable(table), key='id', samplesize=50))
+    for buffersize in 1, 7, '1KB':
+        ieq(expect, recast(table, key='id', samplesize=50,
+                           buffersize=buffersize))
+    reducers = dict(v1=sum)
+    ieq(recast(table, key='id', reducers=reducers),
+        recast(table, key='id', reducers=reducers, buffersize=3))
+
+
 def test_recast_empty():
     table = (('foo', 'variable', 'value'),)
     expect = (('foo',),)
@@ -343,6 +375,38 @@ def test_transpose():
     ieq(expect2, table2)
 
 
+def test_transpose_buffersize():
+
+    table1 = [tuple('f%s' % j for j in range(5))]
+    table1 += [tuple(i * 10 + j for j in range(5)) for i in range(23)]
+    expect = [tuple(row[j] for row in table1) for j in range(5)]
+    for buffersize in None, 1, 5, 22, 23, 24, '1KB':
+        ieq(expect, transpose(table1, buffersize=buffersize))
+    table2 = [('foo',), (1,), (2,)]
+    ieq([('foo', 1, 2)], transpose(table2, buffersize=1))
+    table3 = [('foo', 'bar'), (1, 2), (3,)]
+    try:
+        list(transpose(table3, buffersize=1))
+    except IndexError:
+        pass
+    else:
+        assert False, 'expected exception'
+
+    # no column store left behind on errors
+    tempdir = tempfile.mkdtemp()
+    try:
+        for table in table3, [('foo',), (1,), (lambda: 2,)]:
+            try:
+                list(transpose(table, buffersize=1, tempdir=tempdir))
+            except Exception:
+                pass
+            else:
+                assert False, 'expected exception'
+            eq_([], os.listdir(tempdir))
+    finally:
+        shutil.rmtree(tempdir)
+
+
 def test_transpose_empty():
     table1 = (('id', 'colour'),)
     table2 = transpose(table1)
@@ -375,6 +439,22 @@ def test_pivot():
     ieq(expect2, table2)
 
 
+def test_pivot_onepass():
+
+    table1 = [('region', 'gender', 'style', 'units')]
+    table1 += [('r%s' % (i % 4), 'g%s' % (i % 3), 's%s' % (i % 5), i)
+               for i in range(60)]
+    # reference via the sorted path
+    sorted1 = table1[:1] + sorted(table1[1:], key=lambda row: row[:2])
+    expect = list(pivot(sorted1, 'region', 'gender', 'units', sum,
+                        presorted=True))
+    eq_(('r0', 120, 140, 160), expect[1])
+    ieq(expect, pivot(_OnceTable(table1), 'region', 'gender', 'units', sum))
+    for buffersize in 1, 7, '1KB':
+        ieq(expect, pivot(table1, 'region', 'gender', 'units', sum,
+                          buffersize=buffersize))
+
+
 def test_pivot_empty():
 
     table1 = (('region', 'gender', 'style', 'units'),)
@@ -7,6 +7,7 @@ from datetime import datetime
 from petl.test.helpers import ieq
 from petl.transform.setops import complement, intersection, diff, \
     recordcomplement, recorddiff, hashcomplement, hashintersection
+from petl.util.bloom import bloomfilter
 
 
 def _test_complement_1(complement_impl):
@@ -429,3 +430,22 @@ def test_hashcomplement():
 
 def test_hashintersection():
     _test_intersection(hashintersection)
+
+
+def test_hash_bloom():
+
+    def filtered(impl):
+        def f(a, b, **kwargs):
+            return impl(a, b, bloom=bloomfilter(b), **kwargs)
+        return f
+
+    _test_complement(filtered(hashcomplement))
+    _test_intersection(filtered(hashintersection))
+
+    def unfiltered(impl):
+        def f(a, b, **kwargs):
+            return impl(a, b, bloom=False, **kwargs)
+        return f
+
+    _test_complement(unfiltered(hashcomplement))
+    _test_intersection(unfiltered(hashintersection))
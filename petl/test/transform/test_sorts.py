@@ -3,16 +3,26 @@ from __future__ import absolute_import, print_function, division
 
 import os
 import gc
+import shutil
+import tempfile
 import logging
 from datetime import datetime
 import sys
-from petl.compat import next
+from petl.compat import next, PY2
+
+
+import petl.config as config
+from petl.errors import ArgumentError
 
 
 from petl.test.helpers import ieq, eq_
 from petl.util import nrows
 from petl.transform.basics import cat
-from petl.transform.sorts import sort, mergesort, issorted
+from petl.transform.reductions import rowreduce
+from petl.transform.basics import head
+import petl.transform.sorts as sorts
+from petl.transform.sorts import sort, mergesort, issorted, topn, \
+    grouptopn, _ChunkReader, _rowsizeof
 
 
 logger = logging.getLogger(__name__)
@@ -317,6 +327,196 @@ else:
             assert not os.path.exists(fn), fn
 
 
+def test_sort_buffered_workers():
+
+    table = (('foo', 'bar'),
+             ('C', 2),
+             ('A', 9),
+             ('A', 6),
+             ('F', 1),
+             ('D', 10),
+             ('B', 6),
+             ('E', 3))
+    expectation = (('foo', 'bar'),
+                   ('F', 1),
+                   ('C', 2),
+                   ('E', 3),
+                   ('A', 6),
+                   ('B', 6),
+                   ('A', 9),
+                   ('D', 10))
+
+    result = sort(table, 'bar', buffersize=2, workers=2)
+    ieq(expectation, result)
+    eq_(4, len(result._filecache))
+    # second pass should iterate from the file cache
+    ieq(expectation, result)
+    expectation = (('foo', 'bar'),
+                   ('D', 10),
+                   ('A', 9),
+                   ('A', 6),
+                   ('B', 6),
+                   ('E', 3),
+                   ('C', 2),
+                   ('F', 1))
+    result = sort(table, 'bar', reverse=True, buffersize=3, workers=2)
+    ieq(expectation, result)
+
+    # mixed key types
+    table = (('foo', 'bar'),
+             ('C', 2),
+             ('A', 9),
+             ('F', None),
+             ('D', 'x'),
+             ('E', 10))
+    expectation = (('foo', 'bar'),
+                   ('F', None),
+                   ('C', 2),
+                   ('A', 9),
+                   ('E', 10),
+                   ('D', 'x'))
+    result = sort(table, 'bar', buffersize=2, workers=2)
+    ieq(expectation, result)
+
+
+def test_sort_buffered_compression():
+
+    table = [('foo', 'bar')] + [(i % 5, 'x' * i) for i in range(20)]
+    expectation = [('foo', 'bar')] + sorted(table[1:], key=lambda r: r[0])
+    blocksize, compression = config.sort_blocksize, config.sort_compression
+    try:
+        for config.sort_blocksize in None, 0, 1, 2, 1000:
+            for config.sort_compression in None, 'zlib', 'bz2':
+                result = sort(table, 'foo', buffersize=7)
+                ieq(expectation, result)
+                ieq(expectation, result)
+        config.sort_compression = 'foo'
+        try:
+            nrows(sort(table, 'foo', buffersize=7))
+        except ArgumentError:
+            pass
+        else:
+            assert False, 'expected exception'
+    finally:
+        config.sort_blocksize = blocksize
+        config.sort_compression = compression
+
+
+def test_sort_buffered_max_fanin():
+
+    table = [('foo', 'bar')] + [(i % 7, i) for i in range(50)]
+    expectation = [('foo', 'bar')] + sorted(table[1:], key=lambda r: r[0])
+    rexpectation = ([('foo', 'bar')] +
+                    sorted(table[1:], key=lambda r: r[0], reverse=True))
+    max_fanin = config.sort_max_fanin
+    try:
+        config.sort_max_fanin = 3
+        result = sort(table, 'foo', buffersize=4)
+        eq_(None, result.spillstats)
+        ieq(expectation, result)
+        eq_(13, result.spillstats['runs'])
+        eq_(3, result.spillstats['passes'])
+        assert result.spillstats['bytes'] > 0
+        eq_(2, len(result._filecache))
+        ieq(expectation, result)
+        result = sort(table, 'foo', reverse=True, buffersize=4)
+        ieq(rexpectation, result)
+        result = sort(table, 'foo', buffersize=4, workers=2)
+        ieq(expectation, result)
+        # intermediate files are deleted as each group is merged
+        tempdir = tempfile.mkdtemp()
+        nfiles = []
+        writechunk = sorts._writechunk
+
+        def _writechunk(*args):
+            fn = writechunk(*args)
+            nfiles.append(len(os.listdir(tempdir)))
+            return fn
+        sorts._writechunk = _writechunk
+        try:
+            ieq(expectation, sort(table, 'foo', buffersize=4,
+                                  tempdir=tempdir))
+            eq_(13 + 4 + 2, len(nfiles))
+            eq_(14, max(nfiles))
+        finally:
+            sorts._writechunk = writechunk
+            shutil.rmtree(tempdir)
+        config.sort_max_fanin = 1
+        try:
+            nrows(sort(table, 'foo', buffersize=4))
+        except ArgumentError:
+            pass
+        else:
+            assert False, 'expected exception'
+        config.sort_max_fanin = None
+        result = sort(table, 'foo', buffersize=4)
+        ieq(expectation, result)
+        eq_(1, result.spillstats['passes'])
+        eq_(13, len(result._filecache))
+    finally:
+        config.sort_max_fanin = max_fanin
+
+
+def test_sort_buffered_bytes():
+
+    table = [('foo', 'bar')] + [(i % 7, 'x' * 100) for i in range(1000)]
+    expectation = [('foo', 'bar')] + sorted(table[1:], key=lambda r: r[0])
+
+    # all fits in memory
+    result = sort(table, 'foo', buffersize='1GB')
+    ieq(expectation, result)
+    eq_(None, result._filecache)
+
+    # roughly 200 bytes per row, so should need several chunks
+    result = sort(table, 'foo', buffersize='20KB')
+    ieq(expectation, result)
+    assert result.spillstats['runs'] > 5, result.spillstats
+    ieq(expectation, result)
+    result = sort(table, 'foo', buffersize='20KB', workers=2)
+    ieq(expectation, result)
+
+    # budget smaller than a single row
+    result = sort(table[:20], 'foo', buffersize='10B')
+    ieq(expectation[:1] + sorted(table[1:20], key=lambda r: r[0]), result)
+
+    for buffersize in 'foo', '10 XB', '0MB':
+        try:
+            sort(table, 'foo', buffersize=buffersize)
+        except ArgumentError:
+            pass
+        else:
+            assert False, 'expected exception for %r' % buffersize
+
+
+def test_sort_buffered_bytes_estimate():
+
+    # rows get wider as the table goes on, total about 12MB
+    table = [('foo', 'bar')] + [(i, 'x' * (i // 20)) for i in range(20000)]
+    result = sort(table, 'foo', buffersize='20MB')
+    ieq(table, result)
+    eq_(None, result._filecache)
+    result = sort(table, 'foo', buffersize='2MB')
+    ieq(table, result)
+    assert result.spillstats['runs'] >= 6, result.spillstats
+
+    # chunks should stay within budget as rows get wider
+    reader = _ChunkReader('2MB', maxbatch=1000)
+    it = iter(table[1:])
+    exhausted = False
+    while not exhausted:
+        rows, exhausted = reader.read(it)
+        assert sum(map(_rowsizeof, rows)) <= 2 * 2**20 * 1.05
+
+    # the first batch shouldn't overshoot a tiny budget
+    rows, exhausted = _ChunkReader('2KB').read(iter(table[10000:]))
+    assert 1 <= len(rows) <= 10, len(rows)
+    assert sum(map(_rowsizeof, rows)) <= 2 * 2**10 * 1.5
+
+    # chunks sorted by workers share the budget
+    eq_(2 * 2**20 // 3, _ChunkReader('2MB').share(3).nbytes)
+    eq_(100, _ChunkReader(100).share(3).nrows)
+
+
 def test_sort_empty():
     table = (('foo', 'bar'),)
     expect = (('foo', 'bar'),)
@@ -362,7 +562,89 @@ def test_sort_none():
     ieq(expectation, result)
 
 
-# TODO test sort with native comparison
+def test_sort_native_keys():
+
+    table = (('foo', 'bar', 'baz'),
+             ('C', 2, 1.5),
+             ('A', 9, 2.5),
+             ('A', 6, True),
+             ('F', 1, 0),
+             ('D', 10, -1.))
+    expectation = (('foo', 'bar', 'baz'),
+                   ('A', 6, True),
+                   ('A', 9, 2.5),
+                   ('C', 2, 1.5),
+                   ('D', 10, -1.),
+                   ('F', 1, 0))
+
+    result = sort(table, key=('foo', 'bar'))
+    ieq(expectation, result)
+    ieq(expectation, result)
+    result = sort(table, key=('foo', 'bar'), buffersize=2)
+    ieq(expectation, result)
+    ieq(expectation, result)
+
+    # mixed int, float and bool values are all numbers
+    expectation = (('foo', 'bar', 'baz'),
+                   ('D', 10, -1.),
+                   ('F', 1, 0),
+                   ('A', 6, True),
+                   ('C', 2, 1.5),
+                   ('A', 9, 2.5))
+    result = sort(table, 'baz', buffersize=2)
+    ieq(expectation, result)
+    result = sort(table, 'baz', reverse=True, buffersize=2)
+    ieq(expectation[:1] + expectation[:0:-1], result)
+
+
+def test_sort_native_keys_fallback():
+
+    # key types change after the first chunk has been sorted natively
+    table = (('foo', 'bar'),
+             ('C', 2),
+             ('A', 9),
+             ('A', 6),
+             ('F', None),
+             ('D', 'x'),
+             ('B', b'y'),
+             ('E', 10))
+    expectation = (('foo', 'bar'),
+                   ('F', None),
+                   ('C', 2),
+                   ('A', 6),
+                   ('A', 9),
+                   ('E', 10),
+                   ('B', b'y'),
+                   ('D', 'x'))
+
+    for buffersize in None, 2, 3:
+        result = sort(table, 'bar', buffersize=buffersize)
+        ieq(expectation, result)
+        ieq(expectation, result)
+        result = sort(table, 'bar', reverse=True, buffersize=buffersize)
+        ieq(expectation[:1] + expectation[:0:-1], result)
+
+    # compare with sorting using comparable keys throughout
+    table = [('foo', 'bar')] + [(i % 7, i) for i in range(20)]
+    table.extend([('x', 1), (None, 2), (3, 'y')])
+    native_keys = config.sort_native_keys
+    try:
+        config.sort_native_keys = False
+        expectation = list(sort(table, 'foo'))
+    finally:
+        config.sort_native_keys = native_keys
+    for buffersize in None, 3, 7, 20:
+        ieq(expectation, sort(table, 'foo', buffersize=buffersize))
+
+    if not PY2:
+        # naive and aware datetimes cannot be compared natively, and compare
+        # as equal when wrapped as comparable, so the sort leaves them be
+        from datetime import timezone
+        table = (('foo', 'bar'),
+                 ('A', datetime(2020, 1, 2)),
+                 ('B', datetime(2020, 1, 1, tzinfo=timezone.utc)),
+                 ('C', datetime(2020, 1, 3)))
+        ieq(table, sort(table, 'bar'))
 
 
 def test_mergesort_1():
@@ -523,3 +805,136 @@ def test_issorted():
     assert not issorted(table5, key='foo')
     assert issorted(table5, key='foo', reverse=True)
     assert not issorted(table5, key='foo', reverse=True, strict=True)
+
+
+def test_topn():
+
+    table = (('foo', 'bar'),
+             ('C', 2),
+             ('A', 9),
+             ('A', 6),
+             ('F', 1),
+             ('B', 6),
+             ('D', None),
+             ('E', 'x'))
+
+    for n in 0, 1, 3, 7, 10:
+        for key in None, 'foo', 'bar', ('bar', 'foo'):
+            for reverse in False, True:
+                expect = head(sort(table, key, reverse=reverse), n)
+                ieq(expect, topn(table, n, key, reverse=reverse))
+                ieq(expect, sort(table, key, reverse=reverse, limit=n))
+
+    expect = (('foo', 'bar'),
+              ('E', 'x'),
+              ('A', 9),
+              ('A', 6),
+              ('B', 6))
+    actual = topn(table, 4, 'bar', reverse=True)
+    ieq(expect, actual)
+    ieq(expect, actual)
+
+
+def test_topn_empty():
+
+    table = (('foo', 'bar'),)
+    ieq(table, topn(table, 3, 'bar'))
+    ieq(table, grouptopn(table, 'foo', 'bar', 3))
+
+
+def test_grouptopn():
+
+    table = [('foo', 'bar', 'baz')]
+    for i in range(100):
+        table.append(('abc'[i % 3], (i * 7) % 11, i))
+
+    for n in 0, 1, 2, 5, 50:
+        for reverse in False, True:
+            expect = [table[0]]
+            for g in 'abc':
+                rows = [row for row in table[1:] if row[0] == g]
+                rows.sort(key=lambda row: row[1], reverse=reverse)
+                expect.extend(rows[:n])
+            actual = grouptopn(table, 'foo', 'bar', n, reverse=reverse)
+            ieq(expect, actual)
+            ieq(expect, actual)
+
+    # compound key and value
+    expect = (('foo', 'bar', 'baz'),
+              ('a', 0, 0),
+              ('a', 0, 33),
+              ('b', 0, 22),
+              ('b', 0, 55),
+              ('c', 0, 11),
+              ('c', 0, 44))
+    actual = grouptopn(table, 'foo', ('bar', 'baz'), 2)
+    ieq(expect, actual)
+    actual = grouptopn(table, ('foo', 'bar'), 'baz', 1, reverse=True)
+    # rowreduce sorts stably, so the last row of each group has the
+    # largest baz
+    expect = rowreduce(table, ('foo', 'bar'), lambda k, rows: list(rows)[-1])
+    ieq(expect, actual)
+
+
+def test_sort_sorted():
+
+    table = (('foo', 'bar', 'baz'),
+             ('C', 2, True),
+             ('A', 9, False),
+             ('A', 6, True),
+             ('F', 1, False))
+    sorted1 = sort(table, ('foo', 'bar'))
+    # already sorted by the same key or a prefix of the key
+    assert sort(sorted1, ('foo', 'bar')) is sorted1
+    assert sort(sorted1, ['foo']) is sorted1
+    assert sort(sorted1, 'foo') is sorted1
+    ieq(sort(table, ('foo', 'bar')), sort(sorted1, 'foo'))
+    # otherwise sorted again
+    for key, reverse in ((('foo', 'baz'), False), ('bar', False),
+                         ('foo', True), (None, False), (0, False)):
+        actual = sort(sorted1, key, reverse=reverse)
+        assert actual is not sorted1
+        ieq(sort(tuple(sorted1), key, reverse=reverse), actual)
+    sorted2 = sort(table, 'foo', reverse=True)
+    assert sort(sorted2, 'foo', reverse=True) is sorted2
+
+
+def test_sort_workers_py2():
+
+    table = (('foo', 'bar'),
+             ('C', 2),
+             ('A', 9))
+    saved = sorts.PY2
+    sorts.PY2 = True
+    try:
+        try:
+            sort(table, 'bar', buffersize=2, workers=2)
+        except ArgumentError:
+            pass
+        else:
+            assert False, 'expected exception'
+        ieq(sort(table, 'bar'), sort(table, 'bar', buffersize=2))
+    finally:
+        sorts.PY2 = saved
+
+
+def test_sort_buffered_workers_cleanup():
+
+    # a value which can't be sent to a worker, with chunks either side
+    table = [('foo', 'bar')]
+    table.extend((i, i % 7) for i in range(20))
+    table.append((lambda v: v, 3))
+    table.extend((i, i % 7) for i in range(20))
+    tempdir = tempfile.mkdtemp()
+    try:
+        result = sort(table, 'bar', buffersize=2, workers=2, tempdir=tempdir)
+        try:
+            nrows(result)
+        except Exception:
+            pass
+        else:
+            assert False, 'expected exception'
+        gc.collect()
+        eq_([], os.listdir(tempdir))
+    finally:
+        shutil.rmtree(tempdir)
@@ -0,0 +1,51 @@
+from __future__ import absolute_import, print_function, division
+
+
+from petl.test.helpers import eq_
+from petl.errors import ArgumentError
+from petl.util.bloom import bloomfilter, BloomFilter
+
+
+def test_bloomfilter():
+
+    table = [('foo', 'bar')] + [('k%s' % i, i % 10) for i in range(5000)]
+    bf = bloomfilter(table, 'foo', fpp=0.01)
+    eq_(5000, len(bf))
+    for i in range(5000):
+        assert 'k%s' % i in bf
+    nfalse = sum(1 for i in range(5000, 25000) if 'k%s' % i in bf)
+    assert nfalse < 20000 * 0.02, nfalse
+    assert bf.fpp <= 0.01
+
+    # compound keys and whole rows
+    bf = bloomfilter(table, ('foo', 'bar'))
+    assert ('k3', 3) in bf
+    assert ('k3', 4) not in bf
+    bf = bloomfilter(table)
+    assert ('k3', 3) in bf
+
+
+def test_bloomfilter_capacity():
+
+    bf = BloomFilter(capacity=1000, fpp=0.001)
+    nbytes = bf.nbytes
+    bf.update(range(1000))
+    eq_(nbytes, bf.nbytes)
+    for i in range(1000):
+        assert i in bf
+    assert 0.0005 < bf.fpp < 0.002
+
+    # memory is bounded, at the expense of false positives
+    bf = BloomFilter(fpp=0.01, maxbytes=2000)
+    bf.update(range(10000))
+    eq_(2000, bf.nbytes)
+    for i in range(10000):
+        assert i in bf
+    assert bf.fpp > 0.01
+
+    try:
+        BloomFilter(fpp=1)
+    except ArgumentError:
+        pass
+    else:
+        assert False, 'expected exception'
@@ -0,0 +1,201 @@
+from __future__ import absolute_import, print_function, division
+
+
+from array import array
+import operator
+
+
+from petl.test.helpers import ieq, eq_
+from petl.errors import ArgumentError, FieldSelectionError
+from petl.io.base import fromcolumns
+from petl.util.columnar import columnar, ColumnarTable
+from petl.util.counting import valuecounts, valuecounter
+from petl.util.statistics import stats, limits
+from petl.util.materialise import columns
+from petl.transform.selects import select, selectgt, selecteq, \
+    _columnarselect, _OpPredicate
+from petl.transform.conversions import convert, convertcolumns
+
+
+table1 = (('foo', 'bar', 'baz'),
+          ('a', 1, 2.5),
+          ('b', 3, 4.4),
+          ('b', 7, 4.4),
+          ('c', 2, 0.1))
+
+
+def test_columnar():
+
+    tbl = columnar(table1)
+    assert isinstance(tbl, ColumnarTable)
+    ieq(table1, tbl)
+    ieq(table1, tbl)
+    eq_(['a', 'b', 'b', 'c'], tbl.column('foo'))
+    assert isinstance(tbl.column('bar'), array)
+    assert isinstance(tbl.column(2), array)
+
+    # short rows are padded
+    tbl = columnar((('foo', 'bar'), ('a', 1), ('b',)))
+    ieq((('foo', 'bar'), ('a', 1), ('b', None)), tbl)
+    assert isinstance(tbl.column(1), list)
+    try:
+        tbl.column('quux')
+    except FieldSelectionError:
+        pass
+    else:
+        assert False, 'expected exception'
+
+    # columns must be the same length
+    try:
+        ColumnarTable([[1, 2], [3]])
+    except ArgumentError:
+        pass
+    else:
+        assert False, 'expected exception'
+
+
+def test_columnar_empty():
+
+    tbl = columnar([('foo', 'bar')])
+    ieq([('foo', 'bar')], tbl)
+    eq_((None, None), limits(tbl, 'bar'))
+    eq_(0, stats(tbl, 'bar').count)
+
+
+def test_fromcolumns_columnar():
+
+    tbl = fromcolumns([[1, 2, 3], ['a', 'b', 'c']], header=['foo', 'bar'])
+    assert isinstance(tbl, ColumnarTable)
+    ieq((('foo', 'bar'), (1, 'a'), (2, 'b'), (3, 'c')), tbl)
+    # columns of different lengths are padded as before
+    tbl = fromcolumns([[1, 2, 3], ['a']])
+    assert not isinstance(tbl, ColumnarTable)
+    ieq((('f0', 'f1'), (1, 'a'), (2, None), (3, None)), tbl)
+
+
+def test_stats_limits():
+
+    tbl = columnar(table1)
+    for field in 'foo', 'bar', 'baz':
+        eq_(limits(table1, field), limits(tbl, field))
+        expect = stats(table1, field)
+        actual = stats(tbl, field)
+        for e, a in zip(expect, actual):
+            if isinstance(e, float):
+                assert abs(e - a) < 1e-9, (field, expect, actual)
+            else:
+                eq_(e, a)
+
+
+def test_valuecounts():
+
+    tbl = columnar(table1)
+    eq_(valuecounter(table1, 'foo'), valuecounter(tbl, 'foo'))
+    ieq(valuecounts(table1, 'foo'), valuecounts(tbl, 'foo'))
+    ieq(valuecounts(table1, 'foo', 'baz'), valuecounts(tbl, 'foo', 'baz'))
+
+
+def test_select():
+
+    tbl = columnar(table1)
+    actual = select(tbl, 'bar', lambda v: v > 2)
+    assert isinstance(_columnarselect(tbl, 'bar', lambda v: v > 2, False),
+                      ColumnarTable)
+    ieq(select(table1, 'bar', lambda v: v > 2), actual)
+    ieq(select(table1, 'bar', lambda v: v > 2, complement=True),
+        select(tbl, 'bar', lambda v: v > 2, complement=True))
+    ieq(selectgt(table1, 'bar', 2), selectgt(tbl, 'bar', 2))
+    ieq(selecteq(table1, 'foo', 'b'), selecteq(tbl, 'foo', 'b'))
+    ieq(select(table1, ('foo', 'bar'), lambda v: v > ('b', 3)),
+        select(tbl, ('foo', 'bar'), lambda v: v > ('b', 3)))
+    # selecting on whole rows is not done on buffers
+    ieq(select(table1, lambda rec: rec.bar > 2),
+        select(tbl, lambda rec: rec.bar > 2))
+
+    # rows are selected from the buffers when iterated
+    actual = select(tbl, 'quux', lambda v: v > 2)
+    try:
+        actual.nrows()
+    except FieldSelectionError:
+        pass
+    else:
+        assert False, 'expected exception'
+    tbl2 = columnar(table1)
+    actual = selectgt(tbl2, 'bar', 2)
+    tbl2.column('bar')[0] = 10
+    ieq((('foo', 'bar', 'baz'), ('a', 10, 2.5), ('b', 3, 4.4), ('b', 7, 4.4)),
+        actual)
+
+
+def test_convert():
+
+    tbl = columnar(table1)
+    actual = convert(tbl, 'bar', lambda v: v * 2)
+    ieq(convert(table1, 'bar', lambda v: v * 2), actual)
+    # unchanged buffers are shared
+    actual = convertcolumns(tbl, {'bar': lambda v: v * 2})
+    assert isinstance(actual, ColumnarTable)
+    assert actual.column('foo') is tbl.column('foo')
+    actual = convert(tbl, {'foo': float, 'baz': int}, errorvalue='NA')
+    ieq(convert(table1, {'foo': float, 'baz': int}, errorvalue='NA'), actual)
+    # values are converted when iterated
+    actual = convert(tbl, 'foo', float, failonerror=True)
+    try:
+        actual.nrows()
+    except ValueError:
+        pass
+    else:
+        assert False, 'expected exception'
+    actual['foo'] = 'upper'
+    ieq(convert(table1, 'foo', 'upper'), actual)
+    # conversions on whole rows are not done on buffers
+    actual = convert(tbl, 'bar', lambda v, row: row.foo * v, pass_row=True)
+    assert not isinstance(actual, ColumnarTable)
+    ieq(convert(table1, 'bar', lambda v, row: row.foo * v, pass_row=True),
+        actual)
+
+
+def test_columns():
+
+    tbl = columnar(table1)
+    eq_(columns(table1), columns(tbl))
+
+
+try:
+    # noinspection PyUnresolvedReferences
+    import numpy as np
+except ImportError:
+    pass
+else:
+
+    def test_numpy_buffers():
+
+        tbl = ColumnarTable([np.array(['a', 'b', 'b', 'c']),
+                             np.array([1, 3, 7, 2]),
+                             np.array([2.5, 4.4, np.nan, 0.1])],
+                            header=['foo', 'bar', 'baz'])
+        rows = list(table1[1:])
+        rows[2] = ('b', 7, float('nan'))
+        rows[3] = ('c', 2, 0.1)
+        expect = [table1[0]] + rows
+
+        eq_((1, 7), limits(tbl, 'bar'))
+        eq_(limits(expect, 'baz'), limits(tbl, 'baz'))
+        s = stats(tbl, 'bar')
+        eq_((4, 0, 13.0, 1.0, 7.0, 3.25), s[:6])
+        assert abs(stats(expect, 'bar').pvariance - s.pvariance) < 1e-9
+
+        actual = _columnarselect(tbl, 'bar', _OpPredicate(operator.gt, 2),
+                                 False)
+        assert isinstance(actual.column('bar'), np.ndarray)
+        ieq((('foo', 'bar', 'baz'), ('b', 3, 4.4)),
+            selectgt(tbl, 'bar', 2).selectlt('bar', 5))
+        ieq(selectgt(expect, 'bar', 2, complement=True),
+            selectgt(tbl, 'bar', 2, complement=True))
+
+        actual = convertcolumns(tbl, {'bar': np.sqrt})
+        assert isinstance(actual.column('bar'), np.ndarray)
+        eq_(list(map(np.sqrt, [1, 3, 7, 2])),
+            list(convert(tbl, 'bar', np.sqrt).values('bar')))
+        eq_([2, 6, 14, 4],
+            list(convert(tbl, 'bar', lambda v: v * 2).values('bar')))
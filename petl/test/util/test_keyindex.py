@@ -0,0 +1,162 @@
+from __future__ import absolute_import, print_function, division
+
+
+from tempfile import NamedTemporaryFile
+
+
+from petl.test.helpers import ieq, eq_
+from petl.errors import ArgumentError, DuplicateKeyError
+from petl.util.keyindex import keyindex, KeyIndex
+from petl.util.lookups import lookup, lookupone, dictlookup, dictlookupone, \
+    recordlookup, recordlookupone
+from petl.transform.sorts import sort
+from petl.transform.joins import lookupjoin
+from petl.transform.hashjoins import hashlookupjoin
+
+
+table1 = [('foo', 'bar', 'baz')] + [('k%s' % (i % 7), i, i % 3)
+                                    for i in range(50)]
+
+
+def _tempfile():
+    f = NamedTemporaryFile(delete=False)
+    f.close()
+    return f.name
+
+
+def test_keyindex():
+
+    path = _tempfile()
+    idx = keyindex(table1, 'foo', path, blocksize=3, cachesize=2)
+    ieq(sort(table1, 'foo'), idx)
+    eq_(50, idx.nrows)
+    eq_(7, idx.nkeys)
+    expect = lookup(table1, 'foo')
+    for k in expect:
+        # rows for each key span several blocks
+        eq_(expect[k], idx.get(k))
+    eq_([], idx.get('k7'))
+    eq_([], idx.get(None))
+    eq_([], idx.get(1))
+    assert idx.cachestats['misses'] > 0
+    assert len(idx._cache) <= 2
+    idx.close()
+
+    # reopen
+    with KeyIndex(path) as idx:
+        eq_(expect['k3'], idx.get('k3'))
+        assert idx.haskey('foo')
+        assert not idx.haskey('bar')
+        assert not idx.haskey('quux')
+
+
+def test_keyindex_lookups():
+
+    idx = keyindex(table1, 'foo', _tempfile(), blocksize=4)
+    for f, kwargs in ((lookup, dict()),
+                      (lookup, dict(value='bar')),
+                      (lookup, dict(value=('bar', 'baz'))),
+                      (lookupone, dict()),
+                      (lookupone, dict(value='baz')),
+                      (dictlookup, dict()),
+                      (dictlookupone, dict()),
+                      (recordlookup, dict()),
+                      (recordlookupone, dict())):
+        expect = f(table1, 'foo', **kwargs)
+        actual = f(idx, 'foo', **kwargs)
+        assert not isinstance(actual, dict)
+        eq_(len(expect), len(actual))
+        eq_(sorted(expect), list(actual))
+        for k in expect:
+            assert k in actual
+            eq_(expect[k], actual[k])
+        assert 'k7' not in actual
+        eq_(None, actual.get('k7'))
+        try:
+            actual['k7']
+        except KeyError:
+            pass
+        else:
+            assert False, 'expected exception'
+
+    # lookups on another key load a dictionary as before
+    eq_(lookup(table1, 'bar'), lookup(idx, 'bar'))
+
+    for f in lookupone, dictlookupone, recordlookupone:
+        try:
+            f(idx, 'foo', strict=True)
+        except DuplicateKeyError:
+            pass
+        else:
+            assert False, 'expected exception'
+    idx = keyindex(table1, 'bar', _tempfile(), blocksize=4)
+    eq_(lookupone(table1, 'bar', strict=True),
+        dict(lookupone(idx, 'bar', strict=True)))
+
+
+def test_keyindex_compound_mixed():
+
+    table = (('foo', 'bar', 'baz'),
+             (None, 1, 'a'),
+             ('b', 2, 'b'),
+             (1, None, 'c'),
+             (2.5, 'x', 'd'),
+             ('b', 1, 'e'),
+             (1, None, 'f'))
+    idx = keyindex(table, ('foo', 'bar'), _tempfile(), blocksize=2)
+    expect = lookup(table, ('foo', 'bar'))
+    for k in expect:
+        eq_(expect[k], idx.get(k))
+    eq_([], idx.get(('b', 3)))
+    idx = keyindex(table, 'foo', _tempfile(), blocksize=2)
+    expect = lookup(table, 'foo')
+    for k in expect:
+        eq_(expect[k], idx.get(k))
+
+
+def test_keyindex_errors():
+
+    try:
+        keyindex(table1, 'foo', _tempfile(), presorted=True)
+    except ArgumentError:
+        pass
+    else:
+        assert False, 'expected exception'
+    path = _tempfile()
+    with open(path, 'wb') as f:
+        f.write(b'foo,bar\n' * 10)
+    try:
+        KeyIndex(path)
+    except ArgumentError:
+        pass
+    else:
+        assert False, 'expected exception'
+
+
+def test_keyindex_empty():
+
+    idx = keyindex([('foo', 'bar')], 'foo', _tempfile())
+    ieq([('foo', 'bar')], idx)
+    eq_([], idx.get('a'))
+    eq_(0, len(lookup(idx, 'foo')))
+
+
+def test_keyindex_lookupjoin():
+
+    left = (('foo', 'quux'),
+            ('k3', 2),
+            ('k9', 0),
+            ('k1', 5),
+            ('k3', 1))
+    idx = keyindex(table1, 'foo', _tempfile(), blocksize=3)
+    # rows are output in the order of the left table, which isn't sorted
+    expect = hashlookupjoin(left, table1, key='foo', missing='NA')
+    actual = lookupjoin(left, idx, key='foo', missing='NA')
+    assert actual.left is left
+    ieq(expect, actual)
+    ieq(expect, actual)
+    ieq(hashlookupjoin(left, table1, key='foo', rprefix='r_'),
+        hashlookupjoin(left, idx, key='foo', rprefix='r_'))
+    # not joined on the index key
+    ieq(lookupjoin(left, sort(table1, 'foo'), lkey='quux', rkey='baz'),
+        lookupjoin(left, idx, lkey='quux', rkey='baz'))
@@ -11,7 +11,7 @@ from petl.transform.conversions import convert, convertall, replace, \
     replaceall, update, convertnumbers, format, formatall, interpolate, \
     interpolateall
 
-from petl.transform.sorts import sort, mergesort, issorted
+from petl.transform.sorts import sort, mergesort, issorted, topn, grouptopn
 
 from petl.transform.selects import select, selectop, selectcontains, \
     selecteq, selectfalse, selectge, selectgt, selectin, selectis, \
@@ -28,7 +28,9 @@ from petl.transform.hashjoins import hashjoin, hashleftjoin, hashrightjoin, \
 
 from petl.transform.reductions import rowreduce, mergeduplicates,\
     aggregate, groupcountdistinctvalues, groupselectfirst, groupselectmax, \
-    groupselectmin, merge, fold, Conflict, groupselectlast
+    groupselectmin, merge, fold, Conflict, groupselectlast, hashaggregate, \
+    Accumulator, Count, Sum, Min, Max, Mean, Variance, First, Last, \
+    CountDistinct
 
 from petl.transform.fills import filldown, fillright, fillleft
 
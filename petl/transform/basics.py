@@ -10,6 +10,8 @@ from petl.compat import izip, izip_longest, next, string_types, text_type
 
 # internal dependencies
 from petl.util.base import asindices, rowgetter, Record, Table
+from petl.transform.fusion import _registerstage, _isfusable, iterfused, \
+    _bind
 
 
 import logging
@@ -122,6 +124,8 @@ class CutView(Table):
         self.missing = missing
 
     def __iter__(self):
+        if _isfusable(self):
+            return iterfused(self)
         return itercut(self.source, self.spec, self.missing)
 
 
@@ -149,6 +153,28 @@ def itercut(source, spec, missing=None):
             yield tuple(row[i] if i < len(row) else missing for i in indices)
 
 
+def _cutstage(view):
+    # N.B., as for itercut
+    spec = tuple(view.spec)
+    missing = view.missing
+
+    def stage(hdr, namespace, istuple):
+        indices = asindices(hdr, spec)
+        transform = rowgetter(*indices)
+        shortrow = lambda row: tuple(row[i] if i < len(row) else missing
+                                     for i in indices)
+        lines = ['try:',
+                 '    row = %s(row)' % _bind(namespace, transform),
+                 'except IndexError:',
+                 '    row = %s(row)' % _bind(namespace, shortrow)]
+        return transform(hdr), lines, True
+
+    return view.source, stage
+
+
+_registerstage(CutView, _cutstage)
+
+
 def cutout(table, *args, **kwargs):
     """
     Remove fields. E.g.::
@@ -446,6 +472,8 @@ class StackView(Table):
         self.pad = pad
 
     def __iter__(self):
+        if _isfusable(self):
+            return iterfused(self)
         return iterstack(self.sources, self.missing, self.trim, self.pad)
 
 
@@ -465,6 +493,33 @@ def iterstack(sources, missing, trim, pad):
             yield outrow
 
 
+def _stackstage(view):
+    # N.B., as for iterstack, where a single table is squared up
+    if len(view.sources) != 1:
+        return None
+    missing, trim, pad = view.missing, view.trim, view.pad
+
+    def stage(hdr, namespace, istuple):
+        n = len(hdr)
+
+        def stackrow(row):
+            if trim:
+                row = row[:n]
+            if pad and len(row) < n:
+                row += (missing,) * (n - len(row))
+            return row
+
+        lines = [] if istuple else ['row = tuple(row)']
+        lines.extend(['if len(row) != %s:' % n,
+                      '    row = %s(row)' % _bind(namespace, stackrow)])
+        return tuple(hdr), lines, True
+
+    return view.sources[0], stage
+
+
+_registerstage(StackView, _stackstage)
+
+
 def addfield(table, field, value=None, index=None, missing=None):
     """
     Add a field with a fixed or calculated value. E.g.::
@@ -521,6 +576,8 @@ class AddFieldView(Table):
         self.index = index
 
     def __iter__(self):
+        if _isfusable(self):
+            return iterfused(self)
         return iteraddfield(self.source, self.field, self.value, self.index)
 
 
@@ -553,6 +610,33 @@ def iteraddfield(source, field, value, index):
             yield tuple(outrow)
 
 
+def _addfieldstage(view):
+    # N.B., as for iteraddfield, slicing a tuple is the same as inserting
+    # into a list at the index
+    field, value, index = view.field, view.value, view.index
+
+    def stage(hdr, namespace, istuple):
+        flds = list(map(text_type, hdr))
+        i = len(hdr) if index is None else index
+        outhdr = list(hdr)
+        outhdr.insert(i, field)
+
+        lines = [] if istuple else ['row = tuple(row)']
+        if callable(value):
+            v = '%s(%s(row, %s))' % (_bind(namespace, value),
+                                     _bind(namespace, Record),
+                                     _bind(namespace, flds))
+        else:
+            v = _bind(namespace, value)
+        lines.append('row = row[:%s] + (%s,) + row[%s:]' % (i, v, i))
+        return tuple(outhdr), lines, True
+
+    return view.source, stage
+
+
+_registerstage(AddFieldView, _addfieldstage)
+
+
 def addfields(table, field_defs, missing=None):
     """
     Add fields with fixed or calculated values. E.g.::
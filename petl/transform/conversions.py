@@ -7,7 +7,10 @@ from petl.compat import next, integer_types, string_types, text_type
 import petl.config as config
 from petl.errors import ArgumentError, FieldSelectionError
 from petl.util.base import Table, expr, header, Record
+from petl.util.columnar import ColumnarTable, _tobuffer
 from petl.util.parsers import numparser
+from petl.transform.fusion import _registerstage, _isfusable, iterfused, \
+    _bind, _callstage
 
 
 def convert(table, *args, **kwargs):
@@ -169,6 +172,11 @@ def convert(table, *args, **kwargs):
     Also accepts `failonerror` and `errorvalue` keyword arguments,
     documented under :func:`petl.config.failonerror`
 
+    If `table` is a :class:`petl.util.columnar.ColumnarTable` and neither
+    ``where`` nor ``pass_row`` is given, values are converted field by field
+    via the buffers of the table when the view is iterated. Numpy ufuncs are
+    applied to whole numpy arrays.
+
     """
 
     converters = None
@@ -308,6 +316,12 @@ class FieldConvertView(Table):
         self.pass_row = pass_row
 
     def __iter__(self):
+        if (isinstance(self.source, ColumnarTable) and self.converters
+                and self.where is None and not self.pass_row):
+            return itercolumnarconvert(self.source, self.converters,
+                                       self.failonerror, self.errorvalue)
+        if _isfusable(self):
+            return iterfused(self)
         return iterfieldconvert(self.source, self.converters, self.failonerror,
                                 self.errorvalue, self.where, self.pass_row)
 
@@ -324,7 +338,140 @@ def iterfieldconvert(source, converters, failonerror, errorvalue, where,
     flds = list(map(text_type, hdr))
     yield tuple(hdr)  # these are not modified
 
-    # build converter functions
+    transform_row, where = _fieldconverter(flds, converters, failonerror,
+                                           errorvalue, where, pass_row)
+
+    # prepare iterator
+    if pass_row or where:
+        # wrap rows as records
+        it = (Record(row, flds) for row in it)
+
+    # construct the data rows
+    if where is None:
+        # simple case, transform all rows
+        for row in it:
+            yield transform_row(row)
+    else:
+        # conditionally transform rows
+        for row in it:
+            if where(row):
+                yield transform_row(row)
+            else:
+                yield row
+
+
+def _fieldconverter(flds, converters, failonerror, errorvalue, where,
+                    pass_row):
+    # return a function to transform a row, and the where function
+    converter_functions = _converterfunctions(flds, converters)
+
+    # compile a function to transform a row
+    transform_row = _compilerowconverter(converter_functions, failonerror,
+                                         errorvalue, pass_row)
+
+    # prepare where function
+    if isinstance(where, string_types):
+        where = expr(where)
+    elif where is not None:
+        assert callable(where), 'expected callable for "where" argument, ' \
+                                'found %r' % where
+
+    return transform_row, where
+
+
+def _fieldconvertstage(view):
+    # N.B., as for iterfieldconvert
+    converters, failonerror, errorvalue, where, pass_row = (
+        view.converters, view.failonerror, view.errorvalue, view.where,
+        view.pass_row
+    )
+
+    def stage(hdr, namespace, istuple):
+        flds = list(map(text_type, hdr))
+        if where is None and not pass_row:
+            # inline the conversion of each value
+            converter_functions = _converterfunctions(flds, converters)
+            lines = _rowconverterlines(converter_functions, failonerror,
+                                       errorvalue, pass_row, namespace)
+            if lines is None:
+                lines = [] if istuple else ['row = tuple(row)']
+            else:
+                lines.append('row = tuple(out)')
+            return tuple(hdr), lines, True
+
+        transform_row, fwhere = _fieldconverter(flds, converters,
+                                                failonerror, errorvalue,
+                                                where, pass_row)
+        if fwhere is None:
+            convertrow = lambda row: transform_row(Record(row, flds))
+        else:
+            def convertrow(row):
+                row = Record(row, flds)
+                if fwhere(row):
+                    return transform_row(row)
+                return row
+
+        # N.B., rows not converted are output as records
+        return tuple(hdr), _callstage(namespace, convertrow), False
+
+    return view.source, stage
+
+
+_registerstage(FieldConvertView, _fieldconvertstage)
+
+
+def _compilerowconverter(converter_functions, failonerror, errorvalue,
+                         pass_row):
+    # generate a function which copies a row and converts only the values
+    # with a converter
+    namespace = dict()
+    lines = _rowconverterlines(converter_functions, failonerror, errorvalue,
+                               pass_row, namespace)
+    if lines is None:
+        return tuple
+    source = ['def transform_row(row):']
+    source.extend('    ' + line for line in lines)
+    source.append('    return tuple(out)')
+    source = '\n'.join(source) + '\n'
+    exec(compile(source, '<fieldconvert>', 'exec'), namespace)
+    return namespace['transform_row']
+
+
+def _rowconverterlines(converter_functions, failonerror, errorvalue,
+                       pass_row, namespace):
+    # lines of code converting the values of the variable row into the list
+    # out, or None if there is nothing to convert, N.B., values beyond the
+    # end of a short row are left alone, and negative indices are ignored as
+    # before
+    indices = sorted(i for i in converter_functions if i >= 0)
+    if not indices:
+        return None
+    lines = ['out = list(row)',
+             'n = len(out)']
+    for i in indices:
+        c = _bind(namespace, converter_functions[i])
+        if pass_row:
+            call = '%s(out[%s], row)' % (c, i)
+        else:
+            call = '%s(out[%s])' % (c, i)
+        lines.append('if n > %s:' % i)
+        if failonerror and failonerror != 'inline':
+            # errors propagate
+            lines.append('    out[%s] = %s' % (i, call))
+        else:
+            lines.append('    try:')
+            lines.append('        out[%s] = %s' % (i, call))
+            lines.append('    except Exception as e:')
+            if failonerror == 'inline':
+                lines.append('        out[%s] = e' % i)
+            else:
+                lines.append('        out[%s] = %s'
+                             % (i, _bind(namespace, errorvalue)))
+    return lines
+
+
+def _converterfunctions(flds, converters):
+    # build converter functions, keyed by row index
     converter_functions = dict()
     for k, c in converters.items():
 
@@ -362,56 +509,50 @@ def iterfieldconvert(source, converters, failonerror, errorvalue, where,
                 'unexpected converter specification on field %r: %r' % (k, c)
             )
 
-    # define a function to transform a value
-    def transform_value(i, v, *args):
-        if i not in converter_functions:
-            # no converter defined on this field, return value as-is
-            return v
+    return converter_functions
+
+
+def itercolumnarconvert(source, converters, failonerror, errorvalue):
+    # N.B., values are converted from the buffers as they are when iteration
+    # begins
+    for row in convertcolumns(source, converters, failonerror, errorvalue):
+        yield row
+
+
+def convertcolumns(table, converters, failonerror=None, errorvalue=None):
+    # convert values in the buffers of a columnar table, returning a new
+    # columnar table
+    failonerror = config.failonerror if failonerror is None else failonerror
+    if isinstance(converters, (tuple, list)):
+        converters = dict(enumerate(converters))
+    flds = list(map(text_type, table.hdr))
+    converter_functions = _converterfunctions(flds, converters)
+    replacements = dict()
+    for i, f in converter_functions.items():
+        if i >= len(table.cols):
+            continue  # as for rows, no such field
+        buf = table.cols[i]
+        if getattr(buf, 'dtype', None) is not None:
+            import numpy as np
+            if isinstance(f, np.ufunc):
+                replacements[i] = f(buf)
+                continue
+        replacements[i] = _tobuffer([_convertvalue(f, v, failonerror,
+                                                   errorvalue)
+                                     for v in buf])
+    return table.withcolumns(replacements)
+
+
+def _convertvalue(f, v, failonerror, errorvalue):
+    try:
+        return f(v)
+    except Exception as e:
+        if failonerror == 'inline':
+            return e
+        elif failonerror:
+            raise e
         else:
-            try:
-                return converter_functions[i](v, *args)
-            except Exception as e:
-                if failonerror == 'inline':
-                    return e
-                elif failonerror:
-                    raise e
-                else:
-                    return errorvalue
-
-    # define a function to transform a row
-    if pass_row:
-        def transform_row(_row):
-            return tuple(transform_value(i, v, _row)
-                         for i, v in enumerate(_row))
-    else:
-        def transform_row(_row):
-            return tuple(transform_value(i, v)
-                         for i, v in enumerate(_row))
-
-    # prepare where function
-    if isinstance(where, string_types):
-        where = expr(where)
-    elif where is not None:
-        assert callable(where), 'expected callable for "where" argument, ' \
-                                'found %r' % where
-
-    # prepare iterator
-    if pass_row or where:
-        # wrap rows as records
-        it = (Record(row, flds) for row in it)
-
-    # construct the data rows
-    if where is None:
-        # simple case, transform all rows
-        for row in it:
-            yield transform_row(row)
-    else:
-        # conditionally transform rows
-        for row in it:
-            if where(row):
-                yield transform_row(row)
-            else:
-                yield row
+            return errorvalue
 
 
 def methodcaller(nm, *args):
@@ -2,15 +2,25 @@ from __future__ import absolute_import, print_function, division
 
 
 import operator
+import logging
+from itertools import chain, islice
+from functools import partial
 from petl.compat import text_type
 
 
-from petl.util.base import Table, asindices, itervalues
-from petl.transform.sorts import sort
+from petl.errors import ArgumentError
+from petl.util.base import Table, asindices, itervalues, iterpeek
+from petl.util.bloom import BloomFilter
+from petl.transform.sorts import sort, _PartitionWriter, _bufferrows, \
+    _iterchunk, _writechunk, _mergesorted, _NamedTempFileDeleteOnGC
+
+
+logger = logging.getLogger(__name__)
+debug = logger.debug
 
 
 def duplicates(table, key=None, presorted=False, buffersize=None, tempdir=None, 
-               cache=True):
+               cache=True, strategy=None):
     """
     Select rows with duplicate values under a given key (or duplicate
     rows where no key is given). E.g.::
@@ -56,14 +66,49 @@ def duplicates(table, key=None, presorted=False, buffersize=None, tempdir=None,
     ignored. Otherwise, the data are sorted, see also the discussion of the
     `buffersize`, `tempdir` and `cache` arguments under the
     :func:`petl.transform.sorts.sort` function.
+
+    If `strategy` is 'hash', the data are not sorted, but the number of rows
+    for each key is counted in a first pass through the table, and rows are
+    then selected in a second pass, so are output in their original order.
+    E.g.::
+
+        >>> table4 = etl.duplicates(table1, 'foo', strategy='hash')
+        >>> table4
+        +-----+-----+------+
+        | foo | bar | baz  |
+        +=====+=====+======+
+        | 'B' |   2 |  3.4 |
+        +-----+-----+------+
+        | 'D' |   6 |  9.3 |
+        +-----+-----+------+
+        | 'B' |   3 |  7.8 |
+        +-----+-----+------+
+        | 'B' |   2 | 12.3 |
+        +-----+-----+------+
+        | 'D' |   4 | 14.5 |
+        +-----+-----+------+
+
+    Keys must be hashable. If `buffersize` is also given (a number of keys, or
+    a memory budget such as ``'512MB'``) and the table holds more keys than
+    that, rows are instead numbered and partitioned by a hash of their key
+    into temporary files in `tempdir`, each partition is counted and selected
+    in turn, and the output of all partitions is merged back into the
+    original order. Rows must then be picklable.
+
+    If `strategy` is 'bloom', keys are counted approximately via a pair of
+    :class:`petl.util.bloom.BloomFilter` instances, using little memory, but
+    where a few rows with unique keys may be taken as duplicates (around 1%
+    of them), e.g., where an exact result isn't required.
     
     See also :func:`petl.transform.dedup.unique` and
     :func:`petl.transform.dedup.distinct`.
     
     """
 
+    _checkstrategy(strategy)
     return DuplicatesView(table, key=key, presorted=presorted, 
-                          buffersize=buffersize, tempdir=tempdir, cache=cache)
+                          buffersize=buffersize, tempdir=tempdir, cache=cache,
+                          strategy=strategy)
 
 
 Table.duplicates = duplicates
@@ -72,15 +117,21 @@ Table.duplicates = duplicates
 class DuplicatesView(Table):
     
     def __init__(self, source, key=None, presorted=False, buffersize=None, 
-                 tempdir=None, cache=True):
-        if presorted:
+                 tempdir=None, cache=True, strategy=None):
+        if presorted or strategy is not None:
             self.source = source
         else:
             self.source = sort(source, key, buffersize=buffersize, 
                                tempdir=tempdir, cache=cache)
         self.key = key
+        self.buffersize = buffersize
+        self.tempdir = tempdir
+        self.strategy = strategy
         
     def __iter__(self):
+        if self.strategy is not None:
+            return iterhashdedup(self.source, self.key, 'duplicates',
+                                 self.strategy, self.buffersize, self.tempdir)
         return iterduplicates(self.source, self.key)
 
 
@@ -124,7 +175,7 @@ def iterduplicates(source, key):
     
     
 def unique(table, key=None, presorted=False, buffersize=None, tempdir=None,
-           cache=True):
+           cache=True, strategy=None):
     """
     Select rows with unique values under a given key (or unique rows
     if no key is given). E.g.::
@@ -157,13 +208,19 @@ def unique(table, key=None, presorted=False, buffersize=None, tempdir=None,
     `buffersize`, `tempdir` and `cache` arguments under the
     :func:`petl.transform.sorts.sort` function.
 
+    If `strategy` is 'hash' or 'bloom', rows are selected in their original
+    order without sorting, see :func:`petl.transform.dedup.duplicates`. With
+    'bloom', a few rows with unique keys may be left out.
+
     See also :func:`petl.transform.dedup.duplicates` and
     :func:`petl.transform.dedup.distinct`.
     
     """
 
+    _checkstrategy(strategy)
     return UniqueView(table, key=key, presorted=presorted, 
-                      buffersize=buffersize, tempdir=tempdir, cache=cache)
+                      buffersize=buffersize, tempdir=tempdir, cache=cache,
+                      strategy=strategy)
 
 
 Table.unique = unique
@@ -172,15 +229,21 @@ Table.unique = unique
 class UniqueView(Table):
     
     def __init__(self, source, key=None, presorted=False, buffersize=None,
-                 tempdir=None, cache=True):
-        if presorted:
+                 tempdir=None, cache=True, strategy=None):
+        if presorted or strategy is not None:
             self.source = source
         else:
             self.source = sort(source, key, buffersize=buffersize,
                                tempdir=tempdir, cache=cache)
         self.key = key
+        self.buffersize = buffersize
+        self.tempdir = tempdir
+        self.strategy = strategy
         
     def __iter__(self):
+        if self.strategy is not None:
+            return iterhashdedup(self.source, self.key, 'unique',
+                                 self.strategy, self.buffersize, self.tempdir)
         return iterunique(self.source, self.key)
 
 
@@ -369,7 +432,7 @@ def iterconflicts(source, key, missing, exclude, include):
 
 
 def distinct(table, key=None, count=None, presorted=False, buffersize=None,
-             tempdir=None, cache=True):
+             tempdir=None, cache=True, strategy=None):
     """
     Return only distinct rows in the table.
 
@@ -380,6 +443,41 @@ def distinct(table, key=None, count=None, presorted=False, buffersize=None,
     If the `key` keyword argument is passed, the comparison is done on the
     given key instead of the full row.
 
+    If `strategy` is 'hash', the data are not sorted, but the first row for
+    each key is output as soon as it is seen, in the original order, by
+    keeping the set of keys seen so far. E.g.::
+
+        >>> import petl as etl
+        >>> table1 = [['foo', 'bar'],
+        ...           ['b', 2],
+        ...           ['a', 1],
+        ...           ['b', 3],
+        ...           ['a', 1]]
+        >>> table2 = etl.distinct(table1, 'foo', strategy='hash')
+        >>> table2
+        +-----+-----+
+        | foo | bar |
+        +=====+=====+
+        | 'b' |   2 |
+        +-----+-----+
+        | 'a' |   1 |
+        +-----+-----+
+
+    Keys must be hashable. If `buffersize` is also given (a number of keys, or
+    a memory budget such as ``'512MB'``) and the table holds more keys than
+    that, the remaining rows with keys not seen so far are numbered and
+    partitioned by a hash of their key into temporary files in `tempdir`,
+    each partition is deduplicated in turn, and the output of all partitions
+    is merged back into the original order. Rows must then be picklable.
+    Where `count` is given, keys are counted in a first pass through the
+    table before rows are output in a second pass.
+
+    If `strategy` is 'bloom', keys seen so far are instead held in a
+    :class:`petl.util.bloom.BloomFilter`, using little memory, but where a
+    few rows with keys not seen before may be left out (around 1% of them),
+    e.g., where an exact result isn't required. Rows can't be counted in
+    that case.
+
     See also :func:`petl.transform.dedup.duplicates`,
     :func:`petl.transform.dedup.unique`,
     :func:`petl.transform.reductions.groupselectfirst`,
@@ -387,8 +485,12 @@ def distinct(table, key=None, count=None, presorted=False, buffersize=None,
 
     """
 
+    _checkstrategy(strategy)
+    if strategy == 'bloom' and count:
+        raise ArgumentError("count is not supported with strategy 'bloom'")
     return DistinctView(table, key=key, count=count, presorted=presorted,
-                        buffersize=buffersize, tempdir=tempdir, cache=cache)
+                        buffersize=buffersize, tempdir=tempdir, cache=cache,
+                        strategy=strategy)
 
 
 Table.distinct = distinct
@@ -396,16 +498,26 @@ Table.distinct = distinct
 
 class DistinctView(Table):
     def __init__(self, table, key=None, count=None, presorted=False,
-                 buffersize=None, tempdir=None, cache=True):
-        if presorted:
+                 buffersize=None, tempdir=None, cache=True, strategy=None):
+        if presorted or strategy is not None:
             self.table = table
         else:
             self.table = sort(table, key=key, buffersize=buffersize,
                               tempdir=tempdir, cache=cache)
         self.key = key
         self.count = count
+        self.buffersize = buffersize
+        self.tempdir = tempdir
+        self.strategy = strategy
 
     def __iter__(self):
+        if self.strategy is not None:
+            return iterhashdedup(self.table, self.key, 'distinct',
+                                 self.strategy, self.buffersize, self.tempdir,
+                                 self.count)
+        return self._itersorted()
+
+    def _itersorted(self):
         it = iter(self.table)
         hdr = next(it)
 
@@ -450,6 +562,195 @@ class DistinctView(Table):
                 previous_keys = keys
 
 
+def _checkstrategy(strategy):
+    if strategy not in (None, 'hash', 'bloom'):
+        raise ArgumentError("strategy must be None, 'hash' or 'bloom', "
+                            "found %r" % (strategy,))
+
+
+# maximum number of times rows are partitioned by hash before deduplicating
+# partitions in memory regardless of buffer size
+_dedup_maxlevels = 4
+_dedup_npartitions = 16
+
+
+def iterhashdedup(source, key, mode, strategy, buffersize=None, tempdir=None,
+                  count=None):
+    # N.B., mode is one of 'distinct', 'unique' or 'duplicates'
+    it = iter(source)
+
+    hdr = next(it)
+    if count:
+        yield tuple(hdr) + (count,)
+    else:
+        yield tuple(hdr)
+
+    # convert field selection into field indices
+    if key is None:
+        indices = range(len(hdr))
+    else:
+        indices = asindices(hdr, key)
+    getkey = operator.itemgetter(*indices)
+
+    def rowsfn():
+        # another pass through the data rows
+        return islice(source, 1, None)
+
+    if strategy == 'bloom':
+        if mode == 'distinct':
+            rows = _iterbloomdistinct(it, getkey)
+        else:
+            rows = _iterbloomselect(rowsfn, getkey, mode == 'unique')
+        for row in rows:
+            yield tuple(row)
+        return
+
+    if buffersize is None:
+        limit = None
+    else:
+        sample, it = iterpeek(it, 100)
+        limit = _bufferrows(buffersize, sample)
+
+    if mode == 'distinct' and not count:
+        for row in _iterhashdistinct(it, getkey, limit, tempdir, 0):
+            yield tuple(row)
+    elif count:
+        for row, n in _iterhashcounts(rowsfn, getkey, mode, limit, tempdir, 0):
+            yield tuple(row) + (n,)
+    else:
+        for row, _ in _iterhashcounts(rowsfn, getkey, mode, limit, tempdir, 0):
+            yield tuple(row)
+
+
+def _itemkey(getkey):
+    # key of a row numbered for merging
+    return lambda item: getkey(item[1])
+
+
+def _iterhashdistinct(it, getkey, limit, tempdir, level):
+    # yield the first row for each key as soon as it is seen
+    seen = set()
+    add = seen.add
+    for row in it:
+        k = getkey(row)
+        if k in seen:
+            continue
+        if (limit is not None and len(seen) >= limit
+                and level < _dedup_maxlevels):
+            it = chain([row], it)
+            break
+        add(k)
+        yield row
+    else:
+        return
+
+    # too many keys to hold in memory, so partition the remaining rows with
+    # keys not seen so far by hash of key, numbering rows so the output of
+    # each partition can be merged back into order
+    debug('partitioning rows for distinct at level %s' % level)
+    npartitions = _dedup_npartitions
+    parts = _PartitionWriter(npartitions, tempdir)
+    for seq, row in enumerate(it):
+        k = getkey(row)
+        if k not in seen:
+            parts.write(hash((level, k)) % npartitions, (seq, row))
+    seen = None
+    runs = list()
+    for part in parts.iterpartitions():
+        items = _iterhashdistinct(part, _itemkey(getkey), limit, tempdir,
+                                  level + 1)
+        runs.append(_NamedTempFileDeleteOnGC(
+            _writechunk(items, tempdir, parts.blocksize, parts.compression)
+        ))
+    chunkiters = [_iterchunk(f.name, parts.compression) for f in runs]
+    for seq, row in _mergesorted(operator.itemgetter(0), False, *chunkiters):
+        yield row
+
+
+def _iterhashcounts(rowsfn, getkey, mode, limit, tempdir, level):
+    # count rows for each key in a first pass, then yield rows selected
+    # according to the mode in a second pass, with the count for their key
+    counts = dict()
+    for row in rowsfn():
+        k = getkey(row)
+        if k in counts:
+            counts[k] += 1
+        elif (limit is not None and len(counts) >= limit
+                and level < _dedup_maxlevels):
+            counts = None
+            break
+        else:
+            counts[k] = 1
+
+    if counts is not None:
+        if mode == 'distinct':
+            # only the first row for each key
+            pop = counts.pop
+            for row in rowsfn():
+                n = pop(getkey(row), None)
+                if n is not None:
+                    yield row, n
+        else:
+            unique = mode == 'unique'
+            for row in rowsfn():
+                n = counts[getkey(row)]
+                if (n == 1) == unique:
+                    yield row, n
+        return
+
+    # too many keys to count in memory, so partition all rows by hash of
+    # key, numbering rows so the output of each partition can be merged
+    # back into order
+    debug('partitioning rows for %s at level %s' % (mode, level))
+    npartitions = _dedup_npartitions
+    parts = _PartitionWriter(npartitions, tempdir)
+    for seq, row in enumerate(rowsfn()):
+        parts.write(hash((level, getkey(row))) % npartitions, (seq, row))
+    compression = parts.compression
+    files = parts.close()
+    runs = list()
+    while files:
+        # N.B., each partition is read twice, then deleted
+        f = files.pop(0)
+        items = _iterhashcounts(partial(_iterchunk, f.name, compression),
+                                _itemkey(getkey), mode, limit, tempdir,
+                                level + 1)
+        runs.append(_NamedTempFileDeleteOnGC(
+            _writechunk(items, tempdir, parts.blocksize, compression)
+        ))
+        f = None
+    chunkiters = [_iterchunk(f.name, compression) for f in runs]
+    for (seq, row), n in _mergesorted(lambda item: item[0][0], False,
+                                      *chunkiters):
+        yield row, n
+
+
+def _iterbloomdistinct(it, getkey):
+    seen = BloomFilter()
+    add = seen.add
+    for row in it:
+        k = getkey(row)
+        if k not in seen:
+            add(k)
+            yield row
+
+
+def _iterbloomselect(rowsfn, getkey, unique):
+    # keys seen once and keys seen more than once, approximately
+    seen = BloomFilter()
+    dups = BloomFilter()
+    for row in rowsfn():
+        k = getkey(row)
+        if k not in seen:
+            seen.add(k)
+        elif k not in dups:
+            dups.add(k)
+    seen = None
+    for row in rowsfn():
+        if (getkey(row) in dups) != unique:
+            yield row
+
+
 def isunique(table, field):
     """
     Return True if there are no duplicate values for the given field(s),
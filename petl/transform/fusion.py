@@ -0,0 +1,107 @@
+from __future__ import absolute_import, print_function, division
+
+
+from itertools import chain
+
+
+import petl.config as config
+
+
+# functions returning the stage for a view of a given type, see
+# _registerstage
+_stagebuilders = dict()
+
+
+def _registerstage(cls, builder):
+    """Register a function returning the stage for views of type `cls`, which
+    must transform each row independently of all others. The function is
+    called with the view and should return a tuple ``(source, stage)``, or
+    None if the view can't be fused.
+
+    When iteration begins, `stage` is called with the header of `source`, a
+    namespace dict (see :func:`_bind`) and whether rows from `source` are
+    known to be tuples. It should return the output header, lines of code
+    transforming the variable ``row`` (or skipping it via ``continue``), and
+    whether rows output are tuples."""
+
+    _stagebuilders[cls] = builder
+
+
+def _stage(table):
+    # N.B., exact types only, as subclasses may override __iter__
+    builder = _stagebuilders.get(type(table))
+    if builder is None:
+        return None
+    return builder(table)
+
+
+def _bind(namespace, obj):
+    """Add an object referred to by generated code to the namespace, and
+    return its name."""
+
+    name = '_%s' % len(namespace)
+    namespace[name] = obj
+    return name
+
+
+def _callstage(namespace, func, maydrop=False):
+    """Lines of code transforming a row via a function, which returns None to
+    drop the row if `maydrop` is True."""
+
+    lines = ['row = %s(row)' % _bind(namespace, func)]
+    if maydrop:
+        lines.extend(['if row is None:',
+                      '    continue'])
+    return lines
+
+
+def _isfusable(view):
+    """Return True if the given view and its source are both row-wise views
+    which can be fused, so iterating via :func:`iterfused` saves a layer of
+    generators."""
+
+    if not config.fusion:
+        return False
+    stage = _stage(view)
+    return stage is not None and _stage(stage[0]) is not None
+
+
+def iterfused(table):
+    """Iterate over a chain of row-wise views ending with the given table,
+    via a single generator with the code of every stage inlined, generated
+    when iteration begins."""
+
+    stages = list()
+    while True:
+        stage = _stage(table)
+        if stage is None:
+            break
+        table, stagefn = stage
+        stages.append(stagefn)
+    stages.reverse()
+    # N.B., the header is yielded first, then rows straight from the fused
+    # generator without another generator in between
+    return chain.from_iterable(_iterfusedparts(table, stages))
+
+
+def _iterfusedparts(source, stages):
+    it = iter(source)
+    hdr = next(it)
+    namespace = dict()
+    lines = list()
+    istuple = False
+    for stagefn in stages:
+        hdr, stagelines, istuple = stagefn(hdr, namespace, istuple)
+        lines.extend(stagelines)
+    yield (hdr,)
+    yield _compilefused(lines, namespace)(it)
+
+
+def _compilefused(lines, namespace):
+    source = ['def fused(it):',
+              '    for row in it:']
+    source.extend('        ' + line for line in lines)
+    source.append('        yield row')
+    source = '\n'.join(source) + '\n'
+    exec(compile(source, '<fused>', 'exec'), namespace)
+    return namespace['fused']
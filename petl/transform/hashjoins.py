@@ -2,16 +2,28 @@ from __future__ import absolute_import, print_function, division
 
 
 import operator
-from petl.compat import next, text_type
+import logging
+from itertools import chain, islice
+from petl.compat import next, text_type, izip
 
 
 from petl.util.base import Table, asindices, rowgetter, iterpeek
-from petl.util.lookups import lookup, lookupone
-from petl.transform.joins import keys_from_args
+from petl.util.lookups import lookup
+from petl.util.keyindex import KeyIndex
+from petl.util.bloom import BloomFilter
+from petl.transform.joins import keys_from_args, iterindexlookupjoin, \
+    _columnarjoinview, _rightrowbuilder
+from petl.transform.sorts import _PartitionWriter, _bufferrows, _iterchunk, \
+    _writechunk, _mergesorted, _NamedTempFileDeleteOnGC, _checkworkers
+
+
+logger = logging.getLogger(__name__)
+debug = logger.debug
 
 
 def hashjoin(left, right, key=None, lkey=None, rkey=None, cache=True,
-             lprefix=None, rprefix=None):
+             lprefix=None, rprefix=None, buffersize=None, tempdir=None,
+             bloom=None, workers=None, stable=False):
     """Alternative implementation of :func:`petl.transform.joins.join`, where
     the join is executed by constructing an in-memory lookup for the right
     hand table, then iterating over rows from the left hand table.
@@ -25,11 +37,71 @@ def hashjoin(left, right, key=None, lkey=None, rkey=None, cache=True,
     Left and right tables with different key fields can be handled via the
     `lkey` and `rkey` arguments.
 
+    If `buffersize` is given (a number of rows, or a memory budget such as
+    ``'512MB'``) and the right hand table is larger, both tables are instead
+    partitioned by a hash of their key into temporary files in `tempdir`, and
+    each pair of partitions is then joined in turn. In that case rows are
+    output one partition at a time. When `buffersize` is given, the lookup is
+    not cached.
+
+    If `bloom` is True, a Bloom filter (see
+    :func:`petl.util.bloom.bloomfilter`) is built from keys in the right hand
+    table while it is partitioned, and rows from the left hand table with
+    keys not found in the filter are not written out. A
+    :class:`petl.util.bloom.BloomFilter` built beforehand from keys in the
+    right hand table can also be given, e.g., where the same filter is used
+    to select rows earlier in the pipeline via
+    :func:`petl.transform.selects.selectin`. The filter is only used where
+    tables are partitioned, as the lookup is otherwise exact.
+
+    If `workers` is given, both tables are partitioned by a hash of their key
+    into that many pairs of temporary files in `tempdir`, and each pair of
+    partitions is joined in a pool of that many worker processes (via
+    :class:`concurrent.futures.ProcessPoolExecutor`), with `buffersize`
+    applying to each worker as above. Rows are output one partition at a
+    time, unless `stable` is True, in which case rows are output in the
+    order of the left hand table as usual, by numbering rows from the left
+    hand table as they are partitioned and merging the output of all
+    workers. Rows must be picklable, and the `workers` argument requires
+    Python 3. E.g.::
+
+        >>> import petl as etl
+        >>> table1 = [['id', 'colour'],
+        ...           [3, 'purple'],
+        ...           [1, 'blue'],
+        ...           [2, 'red']]
+        >>> table2 = [['id', 'shape'],
+        ...           [1, 'circle'],
+        ...           [3, 'square'],
+        ...           [4, 'ellipse']]
+        >>> table3 = etl.hashjoin(table1, table2, key='id', workers=2,
+        ...                       stable=True)
+        >>> table3
+        +----+----------+----------+
+        | id | colour   | shape    |
+        +====+==========+==========+
+        |  3 | 'purple' | 'square' |
+        +----+----------+----------+
+        |  1 | 'blue'   | 'circle' |
+        +----+----------+----------+
+
+    If both tables are :class:`petl.util.columnar.ColumnarTable` instances
+    with the key fields held in numpy arrays or typed arrays and neither
+    `buffersize` nor `workers` is given, the tables are joined via numpy when
+    the table is iterated, see :func:`petl.transform.joins.join`.
+
     """
     
     lkey, rkey = keys_from_args(left, right, key, lkey, rkey)
-    return HashJoinView(left, right, lkey=lkey, rkey=rkey, cache=cache,
-                        lprefix=lprefix, rprefix=rprefix)
+    view = HashJoinView(left, right, lkey=lkey, rkey=rkey, cache=cache,
+                        lprefix=lprefix, rprefix=rprefix,
+                        buffersize=buffersize, tempdir=tempdir, bloom=bloom,
+                        workers=workers, stable=stable)
+    if buffersize is None and workers is None:
+        view = _columnarjoinview(view, left, right, lkey, rkey,
+                                 lprefix=lprefix, rprefix=rprefix,
+                                 sortkeys=False)
+    return view
 
 
 Table.hashjoin = hashjoin
@@ -38,7 +110,8 @@ Table.hashjoin = hashjoin
 class HashJoinView(Table):
     
     def __init__(self, left, right, lkey, rkey, cache=True, lprefix=None,
-                 rprefix=None):
+                 rprefix=None, buffersize=None, tempdir=None, bloom=None,
+                 workers=None, stable=False):
         self.left = left
         self.right = right
         self.lkey = lkey
@@ -47,15 +120,32 @@ class HashJoinView(Table):
         self.rlookup = None
         self.lprefix = lprefix
         self.rprefix = rprefix
+        self.buffersize = buffersize
+        self.tempdir = tempdir
+        self.bloom = bloom
+        self.workers = _checkworkers(workers)
+        self.stable = stable
         
     def __iter__(self):
+        if self.workers is not None and self.workers > 1:
+            return iterparallelhashjoin(self.left, self.right, self.lkey,
+                                        self.rkey, self.lprefix, self.rprefix,
+                                        self.workers, self.stable,
+                                        self.buffersize, self.tempdir,
+                                        self.bloom)
+        if self.buffersize is not None:
+            # lookup is built while joining, partitioning if needed
+            return iterhashjoin(self.left, self.right, self.lkey, self.rkey,
+                                None, self.lprefix, self.rprefix,
+                                self.buffersize, self.tempdir, self.bloom)
         if not self.cache or self.rlookup is None:
             self.rlookup = lookup(self.right, self.rkey)
         return iterhashjoin(self.left, self.right, self.lkey, self.rkey,
                             self.rlookup, self.lprefix, self.rprefix)
     
 
-def iterhashjoin(left, right, lkey, rkey, rlookup, lprefix, rprefix):
+def iterhashjoin(left, right, lkey, rkey, rlookup, lprefix, rprefix,
+                 buffersize=None, tempdir=None, bloom=None):
     lit = iter(left)
     rit = iter(right)
 
@@ -87,25 +177,176 @@ def iterhashjoin(left, right, lkey, rkey, rlookup, lprefix, rprefix):
         outhdr.extend([(text_type(rprefix) + text_type(f)) for f in rgetv(rhdr)])
     yield tuple(outhdr)
 
-    # define a function to join rows
-    def joinrows(_lrow, _rrows):
-        for rrow in _rrows:
-            # start with the left row
-            _outrow = list(_lrow)
-            # extend with non-key values from the right row
-            _outrow.extend(rgetv(rrow))
-            yield tuple(_outrow)
+    if rlookup is None:
+        rgetk = operator.itemgetter(*rkind)
+        probes = _hashprobe(lit, rit, lgetk, rgetk, _lookup, buffersize,
+                            tempdir, bloom)
+    else:
+        probes = ((lrow, rlookup) for lrow in lit)
 
-    for lrow in lit:
+    for lrow, rlookup in probes:
         k = lgetk(lrow)
         if k in rlookup:
-            rrows = rlookup[k]
-            for outrow in joinrows(lrow, rrows):
-                yield outrow
-        
-        
+            # left row followed by non-key values from each right row
+            lrow = tuple(lrow)
+            for rrow in rlookup[k]:
+                yield lrow + rgetv(rrow)
+
+
+def iterparallelhashjoin(left, right, lkey, rkey, lprefix, rprefix, workers,
+                         stable=False, buffersize=None, tempdir=None,
+                         bloom=None):
+    from concurrent.futures import ProcessPoolExecutor
+
+    lit = iter(left)
+    rit = iter(right)
+
+    lhdr = next(lit)
+    rhdr = next(rit)
+
+    # determine indices of the key fields in left and right tables
+    lkind = asindices(lhdr, lkey)
+    rkind = asindices(rhdr, rkey)
+
+    # construct functions to extract key values from both tables
+    lgetk = operator.itemgetter(*lkind)
+    rgetk = operator.itemgetter(*rkind)
+
+    # determine indices of non-key fields in the right table
+    rvind = [i for i in range(len(rhdr)) if i not in rkind]
+    rgetv = rowgetter(*rvind)
+
+    # determine the output fields
+    if lprefix is None:
+        outhdr = list(lhdr)
+    else:
+        outhdr = [(text_type(lprefix) + text_type(f))
+                  for f in lhdr]
+    if rprefix is None:
+        outhdr.extend(rgetv(rhdr))
+    else:
+        outhdr.extend([(text_type(rprefix) + text_type(f))
+                       for f in rgetv(rhdr)])
+    yield tuple(outhdr)
+
+    # partition both tables by hash of key, N.B., hashes are only computed
+    # in this process, so needn't be the same in worker processes
+    debug('partitioning tables for join with %s workers' % workers)
+    rparts = _PartitionWriter(workers, tempdir)
+    if bloom is False:
+        bloom = None
+    if bloom is True:
+        # build a filter from keys in the right table while partitioning
+        bloom = BloomFilter()
+        add = bloom.add
+    else:
+        add = None
+    for row in rit:
+        k = rgetk(row)
+        if add is not None:
+            add(k)
+        rparts.write(hash(k) % workers, tuple(row))
+    lparts = _PartitionWriter(workers, tempdir)
+    lcounts = [0] * workers
+    for seq, row in enumerate(lit):
+        k = lgetk(row)
+        if bloom is not None and k not in bloom:
+            continue  # can't have a match
+        p = hash(k) % workers
+        if stable:
+            # number rows so output can be merged in input order
+            row = (seq,) + tuple(row)
+        lparts.write(p, tuple(row))
+        lcounts[p] += 1
+    rfiles = rparts.close()
+    lfiles = lparts.close()
+
+    if stable:
+        # key indices are shifted by the row number
+        lkind = [i + 1 for i in lkind]
+    compression = rparts.compression
+    blocksize = rparts.blocksize
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_hashjoinpartition, lf.name, rf.name,
+                                   lkind, rkind, rvind, stable, buffersize,
+                                   tempdir, blocksize, compression)
+                   for lf, rf, n in izip(lfiles, rfiles, lcounts) if n]
+        runs = list()
+        for future in futures:
+            runfiles = [_NamedTempFileDeleteOnGC(fn)
+                        for fn in future.result()]
+            if stable:
+                runs.extend(runfiles)
+            else:
+                # output each partition as soon as it has been joined
+                for f in runfiles:
+                    for row in _iterchunk(f.name, compression):
+                        yield row
+    del lfiles, rfiles
+
+    if stable:
+        # each run is in order of row number from the left table
+        debug('merging %s runs from workers' % len(runs))
+        chunkiters = [_iterchunk(f.name, compression) for f in runs]
+        for row in _mergesorted(operator.itemgetter(0), False, *chunkiters):
+            yield row[1:]
+
+
+def _hashjoinpartition(lfn, rfn, lkind, rkind, rvind, stable, buffersize,
+                       tempdir, blocksize, compression):
+    # join a pair of partition files and write the output to temporary files,
+    # N.B., runs in a worker process
+    lgetk = operator.itemgetter(*lkind)
+    rgetk = operator.itemgetter(*rkind)
+    rgetv = rowgetter(*rvind)
+    lit = _iterchunk(lfn, compression)
+    rit = _iterchunk(rfn, compression)
+    if buffersize is None:
+        probes = _iterhashprobe(lit, rit, lgetk, rgetk, _lookup, None,
+                                tempdir, 0)
+    else:
+        probes = _hashprobe(lit, rit, lgetk, rgetk, _lookup, buffersize,
+                            tempdir)
+
+    def joinrows():
+        for lrow, rlookup in probes:
+            k = lgetk(lrow)
+            if k in rlookup:
+                for rrow in rlookup[k]:
+                    yield lrow + rgetv(rrow)
+
+    if not stable:
+        return [_writechunk(joinrows(), tempdir, blocksize, compression)]
+    # N.B., rows are in the order of the left table except where the
+    # partition was partitioned again, so write out each ordered run
+    # separately
+    return [_writechunk(run, tempdir, blocksize, compression)
+            for run in _iterruns(joinrows())]
+
+
+def _iterruns(rows):
+    # split rows into runs in order of the first value of each row, each run
+    # must be consumed before the next
+    pending = list(islice(rows, 1))
+
+    def run():
+        row = pending.pop()
+        yield row
+        prev = row[0]
+        for row in rows:
+            if row[0] < prev:
+                pending.append(row)
+                return
+            prev = row[0]
+            yield row
+
+    while pending:
+        yield run()
+
+
 def hashleftjoin(left, right, key=None, lkey=None, rkey=None, missing=None,
-                 cache=True, lprefix=None, rprefix=None):
+                 cache=True, lprefix=None, rprefix=None, buffersize=None,
+                 tempdir=None):
     """Alternative implementation of :func:`petl.transform.joins.leftjoin`,
     where the join is executed by constructing an in-memory lookup for the
     right hand table, then iterating over rows from the left hand table.
@@ -119,11 +360,30 @@ def hashleftjoin(left, right, key=None, lkey=None, rkey=None, missing=None,
     Left and right tables with different key fields can be handled via the
     `lkey` and `rkey` arguments.
 
+    If `buffersize` is given (a number of rows, or a memory budget such as
+    ``'512MB'``) and the right hand table is larger, both tables are instead
+    partitioned by a hash of their key into temporary files in `tempdir`, and
+    each pair of partitions is then joined in turn. In that case rows are
+    output one partition at a time. When `buffersize` is given, the lookup is
+    not cached.
+
+    If both tables are :class:`petl.util.columnar.ColumnarTable` instances
+    with the key fields held in numpy arrays or typed arrays and `buffersize`
+    is not given, the tables are joined via numpy when the table is iterated,
+    see :func:`petl.transform.joins.leftjoin`.
+
     """
 
     lkey, rkey = keys_from_args(left, right, key, lkey, rkey)
-    return HashLeftJoinView(left, right, lkey, rkey, missing=missing,
-                            cache=cache, lprefix=lprefix, rprefix=rprefix)
+    view = HashLeftJoinView(left, right, lkey, rkey, missing=missing,
+                            cache=cache, lprefix=lprefix, rprefix=rprefix,
+                            buffersize=buffersize, tempdir=tempdir)
+    if buffersize is None:
+        view = _columnarjoinview(view, left, right, lkey, rkey,
+                                 leftouter=True, missing=missing,
+                                 lprefix=lprefix, rprefix=rprefix,
+                                 sortkeys=False)
+    return view
 
 
 Table.hashleftjoin = hashleftjoin
@@ -132,7 +392,7 @@ Table.hashleftjoin = hashleftjoin
 class HashLeftJoinView(Table):
     
     def __init__(self, left, right, lkey, rkey, missing=None, cache=True,
-                 lprefix=None, rprefix=None):
+                 lprefix=None, rprefix=None, buffersize=None, tempdir=None):
         self.left = left
         self.right = right
         self.lkey = lkey
@@ -142,8 +402,16 @@ class HashLeftJoinView(Table):
         self.rlookup = None
         self.lprefix = lprefix
         self.rprefix = rprefix
+        self.buffersize = buffersize
+        self.tempdir = tempdir
 
     def __iter__(self):
+        if self.buffersize is not None:
+            # lookup is built while joining, partitioning if needed
+            return iterhashleftjoin(self.left, self.right, self.lkey,
+                                    self.rkey, self.missing, None,
+                                    self.lprefix, self.rprefix,
+                                    self.buffersize, self.tempdir)
         if not self.cache or self.rlookup is None:
             self.rlookup = lookup(self.right, self.rkey)
         return iterhashleftjoin(self.left, self.right, self.lkey, self.rkey,
@@ -152,7 +420,7 @@ class HashLeftJoinView(Table):
     
 
 def iterhashleftjoin(left, right, lkey, rkey, missing, rlookup, lprefix,
-                     rprefix):
+                     rprefix, buffersize=None, tempdir=None):
     lit = iter(left)
     rit = iter(right)
 
@@ -184,30 +452,30 @@ def iterhashleftjoin(left, right, lkey, rkey, missing, rlookup, lprefix,
         outhdr.extend([(text_type(rprefix) + text_type(f)) for f in rgetv(rhdr)])
     yield tuple(outhdr)
 
-    # define a function to join rows
-    def joinrows(_lrow, _rrows):
-        for rrow in _rrows:
-            # start with the left row
-            _outrow = list(_lrow)
-            # extend with non-key values from the right row
-            _outrow.extend(rgetv(rrow))
-            yield tuple(_outrow)
+    rpad = (missing,) * len(rvind)
+
+    if rlookup is None:
+        rgetk = operator.itemgetter(*rkind)
+        probes = _hashprobe(lit, rit, lgetk, rgetk, _lookup, buffersize,
+                            tempdir)
+    else:
+        probes = ((lrow, rlookup) for lrow in lit)
 
-    for lrow in lit:
+    for lrow, rlookup in probes:
         k = lgetk(lrow)
         if k in rlookup:
-            rrows = rlookup[k]
-            for outrow in joinrows(lrow, rrows):
-                yield outrow
+            # left row followed by non-key values from each right row
+            lrow = tuple(lrow)
+            for rrow in rlookup[k]:
+                yield lrow + rgetv(rrow)
         else:
-            outrow = list(lrow)  # start with the left row
-            # extend with missing values in place of the right row
-            outrow.extend([missing] * len(rvind))
-            yield tuple(outrow)
+            # left row with missing values in place of the right row
+            yield tuple(lrow) + rpad
         
         
 def hashrightjoin(left, right, key=None, lkey=None, rkey=None, missing=None,
-                  cache=True, lprefix=None, rprefix=None):
+                  cache=True, lprefix=None, rprefix=None, buffersize=None,
+                  tempdir=None):
     """Alternative implementation of :func:`petl.transform.joins.rightjoin`,
     where the join is executed by constructing an in-memory lookup for the
     left hand table, then iterating over rows from the right hand table.
@@ -221,11 +489,19 @@ def hashrightjoin(left, right, key=None, lkey=None, rkey=None, missing=None,
     Left and right tables with different key fields can be handled via the
     `lkey` and `rkey` arguments.
 
+    If `buffersize` is given (a number of rows, or a memory budget such as
+    ``'512MB'``) and the left hand table is larger, both tables are instead
+    partitioned by a hash of their key into temporary files in `tempdir`, and
+    each pair of partitions is then joined in turn. In that case rows are
+    output one partition at a time. When `buffersize` is given, the lookup is
+    not cached.
+
     """
 
     lkey, rkey = keys_from_args(left, right, key, lkey, rkey)
     return HashRightJoinView(left, right, lkey, rkey, missing=missing,
-                             cache=cache, lprefix=lprefix, rprefix=rprefix)
+                             cache=cache, lprefix=lprefix, rprefix=rprefix,
+                             buffersize=buffersize, tempdir=tempdir)
 
 
 Table.hashrightjoin = hashrightjoin
@@ -234,7 +510,7 @@ Table.hashrightjoin = hashrightjoin
 class HashRightJoinView(Table):
     
     def __init__(self, left, right, lkey, rkey, missing=None, cache=True,
-                 lprefix=None, rprefix=None):
+                 lprefix=None, rprefix=None, buffersize=None, tempdir=None):
         self.left = left
         self.right = right
         self.lkey = lkey
@@ -244,8 +520,16 @@ class HashRightJoinView(Table):
         self.llookup = None
         self.lprefix = lprefix
         self.rprefix = rprefix
+        self.buffersize = buffersize
+        self.tempdir = tempdir
 
     def __iter__(self):
+        if self.buffersize is not None:
+            # lookup is built while joining, partitioning if needed
+            return iterhashrightjoin(self.left, self.right, self.lkey,
+                                     self.rkey, self.missing, None,
+                                     self.lprefix, self.rprefix,
+                                     self.buffersize, self.tempdir)
         if not self.cache or self.llookup is None:
             self.llookup = lookup(self.left, self.lkey)
         return iterhashrightjoin(self.left, self.right, self.lkey, self.rkey,
@@ -254,7 +538,7 @@ class HashRightJoinView(Table):
     
 
 def iterhashrightjoin(left, right, lkey, rkey, missing, llookup, lprefix,
-                      rprefix):
+                      rprefix, buffersize=None, tempdir=None):
     lit = iter(left)
     rit = iter(right)
 
@@ -287,33 +571,28 @@ def iterhashrightjoin(left, right, lkey, rkey, missing, llookup, lprefix,
                        for f in rgetv(rhdr)])
     yield tuple(outhdr)
 
-    # define a function to join rows
-    def joinrows(_rrow, _lrows):
-        for lrow in _lrows:
-            # start with the left row
-            _outrow = list(lrow)
-            # extend with non-key values from the right row
-            _outrow.extend(rgetv(_rrow))
-            yield tuple(_outrow)
+    rbuild = _rightrowbuilder(lhdr, lkind, rkind, rvind, missing)
+
+    if llookup is None:
+        lgetk = operator.itemgetter(*lkind)
+        probes = _hashprobe(rit, lit, rgetk, lgetk, _lookup, buffersize,
+                            tempdir)
+    else:
+        probes = ((rrow, llookup) for rrow in rit)
 
-    for rrow in rit:
+    for rrow, llookup in probes:
         k = rgetk(rrow)
         if k in llookup:
-            lrows = llookup[k]
-            for outrow in joinrows(rrow, lrows):
-                yield outrow
+            # each left row followed by non-key values from the right row
+            rv = rgetv(rrow)
+            for lrow in llookup[k]:
+                yield tuple(lrow) + rv
         else:
-            # start with missing values in place of the left row
-            outrow = [missing] * len(lhdr)
-            # set key values
-            for li, ri in zip(lkind, rkind):
-                outrow[li] = rrow[ri]
-            # extend with non-key values from the right row  
-            outrow.extend(rgetv(rrow))
-            yield tuple(outrow)
+            yield rbuild(rrow)
         
         
-def hashantijoin(left, right, key=None, lkey=None, rkey=None):
+def hashantijoin(left, right, key=None, lkey=None, rkey=None,
+                 buffersize=None, tempdir=None, bloom=None):
     """Alternative implementation of :func:`petl.transform.joins.antijoin`,
     where the join is executed by constructing an in-memory set for all keys
     found in the right hand table, then iterating over rows from the left
@@ -325,10 +604,25 @@ def hashantijoin(left, right, key=None, lkey=None, rkey=None):
     Left and right tables with different key fields can be handled via the
     `lkey` and `rkey` arguments.
 
+    If `buffersize` is given (a number of rows, or a memory budget such as
+    ``'512MB'``) and the right hand table is larger, both tables are instead
+    partitioned by a hash of their key into temporary files in `tempdir`, and
+    each pair of partitions is then joined in turn. In that case rows are
+    output one partition at a time.
+
+    If `bloom` is True, a Bloom filter (see
+    :func:`petl.util.bloom.bloomfilter`) is built from keys in the right hand
+    table while it is partitioned, and rows from the left hand table with
+    keys not found in the filter are output straight away rather than written
+    out. A :class:`petl.util.bloom.BloomFilter` built beforehand from keys in
+    the right hand table can also be given. The filter is only used where
+    tables are partitioned, as the lookup is otherwise exact.
+
     """
     
     lkey, rkey = keys_from_args(left, right, key, lkey, rkey)
-    return HashAntiJoinView(left, right, lkey, rkey)
+    return HashAntiJoinView(left, right, lkey, rkey, buffersize=buffersize,
+                            tempdir=tempdir, bloom=bloom)
 
 
 Table.hashantijoin = hashantijoin
@@ -336,17 +630,23 @@ Table.hashantijoin = hashantijoin
 
 class HashAntiJoinView(Table):
     
-    def __init__(self, left, right, lkey, rkey):
+    def __init__(self, left, right, lkey, rkey, buffersize=None,
+                 tempdir=None, bloom=None):
         self.left = left
         self.right = right
         self.lkey = lkey
         self.rkey = rkey
+        self.buffersize = buffersize
+        self.tempdir = tempdir
+        self.bloom = bloom
 
     def __iter__(self):
-        return iterhashantijoin(self.left, self.right, self.lkey, self.rkey)
+        return iterhashantijoin(self.left, self.right, self.lkey, self.rkey,
+                                self.buffersize, self.tempdir, self.bloom)
     
     
-def iterhashantijoin(left, right, lkey, rkey):
+def iterhashantijoin(left, right, lkey, rkey, buffersize=None, tempdir=None,
+                     bloom=None):
     lit = iter(left)
     rit = iter(right)
 
@@ -362,19 +662,22 @@ def iterhashantijoin(left, right, lkey, rkey):
     lgetk = operator.itemgetter(*lkind)
     rgetk = operator.itemgetter(*rkind)
     
-    rkeys = set()
-    for rrow in rit:
-        rk = rgetk(rrow)
-        rkeys.add(rk)
-        
-    for lrow in lit:
+    if buffersize is None:
+        # all keys held in memory, rows output in left table order
+        rkeys = _keyset(rit, rgetk)
+        probes = ((lrow, rkeys) for lrow in lit)
+    else:
+        probes = _hashprobe(lit, rit, lgetk, rgetk, _keyset, buffersize,
+                            tempdir, bloom)
+
+    for lrow, rkeys in probes:
         lk = lgetk(lrow)
         if lk not in rkeys:
             yield tuple(lrow)
 
 
 def hashlookupjoin(left, right, key=None, lkey=None, rkey=None, missing=None,
-                   lprefix=None, rprefix=None):
+                   lprefix=None, rprefix=None, buffersize=None, tempdir=None):
     """Alternative implementation of :func:`petl.transform.joins.lookupjoin`,
     where the join is executed by constructing an in-memory lookup for the
     right hand table, then iterating over rows from the left hand table.
@@ -385,11 +688,22 @@ def hashlookupjoin(left, right, key=None, lkey=None, rkey=None, missing=None,
     Left and right tables with different key fields can be handled via the
     `lkey` and `rkey` arguments.
 
+    If `buffersize` is given (a number of rows, or a memory budget such as
+    ``'512MB'``) and the right hand table is larger, both tables are instead
+    partitioned by a hash of their key into temporary files in `tempdir`, and
+    each pair of partitions is then joined in turn. In that case rows are
+    output one partition at a time.
+
+    If `right` is a :class:`petl.util.keyindex.KeyIndex` built on the right
+    key, each key of the left table is looked up in the index instead of
+    building a lookup.
+
     """
 
     lkey, rkey = keys_from_args(left, right, key, lkey, rkey)
     return HashLookupJoinView(left, right, lkey, rkey, missing=missing,
-                              lprefix=lprefix, rprefix=rprefix)
+                              lprefix=lprefix, rprefix=rprefix,
+                              buffersize=buffersize, tempdir=tempdir)
 
 
 Table.hashlookupjoin = hashlookupjoin
@@ -398,7 +712,7 @@ Table.hashlookupjoin = hashlookupjoin
 class HashLookupJoinView(Table):
 
     def __init__(self, left, right, lkey, rkey, missing=None, lprefix=None,
-                 rprefix=None):
+                 rprefix=None, buffersize=None, tempdir=None):
         self.left = left
         self.right = right
         self.lkey = lkey
@@ -406,18 +720,28 @@ class HashLookupJoinView(Table):
         self.missing = missing
         self.lprefix = lprefix
         self.rprefix = rprefix
+        self.buffersize = buffersize
+        self.tempdir = tempdir
 
     def __iter__(self):
+        if isinstance(self.right, KeyIndex) and self.right.haskey(self.rkey):
+            # look up keys in the index rather than building a lookup
+            return iterindexlookupjoin(self.left, self.right, self.lkey,
+                                       missing=self.missing,
+                                       lprefix=self.lprefix,
+                                       rprefix=self.rprefix)
         return iterhashlookupjoin(self.left, self.right, self.lkey, self.rkey,
-                                  self.missing, self.lprefix, self.rprefix)
+                                  self.missing, self.lprefix, self.rprefix,
+                                  self.buffersize, self.tempdir)
 
 
-def iterhashlookupjoin(left, right, lkey, rkey, missing, lprefix, rprefix):
+def iterhashlookupjoin(left, right, lkey, rkey, missing, lprefix, rprefix,
+                       buffersize=None, tempdir=None):
     lit = iter(left)
     lhdr = next(lit)
 
-    rhdr, rit = iterpeek(right)  # need the whole lot to pass to lookup
-    rlookup = lookupone(rit, rkey, strict=False)
+    rit = iter(right)
+    rhdr = next(rit)
 
     # determine indices of the key fields in left and right tables
     lkind = asindices(lhdr, lkey)
@@ -445,21 +769,138 @@ def iterhashlookupjoin(left, right, lkey, rkey, missing, lprefix, rprefix):
                        for f in rgetv(rhdr)])
     yield tuple(outhdr)
 
-    # define a function to join rows
-    def joinrows(_lrow, _rrow):
-        # start with the left row
-        _outrow = list(_lrow)
-        # extend with non-key values from the right row
-        _outrow.extend(rgetv(_rrow))
-        return tuple(_outrow)
+    rpad = (missing,) * len(rvind)
+    rgetk = operator.itemgetter(*rkind)
+    if buffersize is None:
+        # lookup held in memory, rows output in left table order
+        rlookup = _lookupone(rit, rgetk)
+        probes = ((lrow, rlookup) for lrow in lit)
+    else:
+        probes = _hashprobe(lit, rit, lgetk, rgetk, _lookupone, buffersize,
+                            tempdir)
 
-    for lrow in lit:
+    for lrow, rlookup in probes:
         k = lgetk(lrow)
         if k in rlookup:
-            rrow = rlookup[k]
-            yield joinrows(lrow, rrow)
+            yield tuple(lrow) + rgetv(rlookup[k])
+        else:
+            # left row with missing values in place of the right row
+            yield tuple(lrow) + rpad
+
+
+# maximum number of times tables are partitioned by hash before joining
+# partitions in memory regardless of buffer size
+_hashjoin_maxlevels = 4
+_hashjoin_npartitions = 16
+
+
+def _hashprobe(pit, bit, pgetk, bgetk, build, buffersize, tempdir,
+               bloom=None):
+    # yield each row from the probe side along with a lookup built from rows
+    # with the same key on the build side
+    sample, bit = iterpeek(bit, 100)
+    limit = _bufferrows(buffersize, sample)
+    return _iterhashprobe(pit, bit, pgetk, bgetk, build, limit, tempdir, 0,
+                          bloom)
+
+
+# lookup for rows from the probe side which can't have a match
+_nolookup = dict()
+
+
+def _iterhashprobe(pit, bit, pgetk, bgetk, build, limit, tempdir, level,
+                   bloom=None, maysplit=True):
+    # N.B., `maysplit` is False if partitioning the build side again can't
+    # make it smaller, so it's joined in memory regardless of buffer size
+    if limit is None or not maysplit:
+        brows = ()
+    else:
+        brows = list(islice(bit, limit + 1))
+    if (limit is None or not maysplit or len(brows) <= limit
+            or level >= _hashjoin_maxlevels):
+        blookup = build(chain(brows, bit), bgetk)
+        for prow in pit:
+            yield prow, blookup
+        return
+
+    # the build side is too large, so partition both sides by hash of key
+    debug('partitioning tables for join at level %s' % level)
+    npartitions = _hashjoin_npartitions
+    bparts = _PartitionWriter(npartitions, tempdir)
+    if bloom is False:
+        bloom = None
+    if bloom is True:
+        # build a filter from keys on the build side while partitioning
+        bloom = BloomFilter()
+        add = bloom.add
+    else:
+        add = None
+    # keep track of the number of rows in each partition, and whether they
+    # all share one key
+    counts = [0] * npartitions
+    firstkeys = [None] * npartitions
+    mixed = [False] * npartitions
+    for row in chain(brows, bit):
+        k = bgetk(row)
+        if add is not None:
+            add(k)
+        i = hash((level, k)) % npartitions
+        bparts.write(i, row)
+        counts[i] += 1
+        if counts[i] == 1:
+            firstkeys[i] = k
+        elif not mixed[i] and k != firstkeys[i]:
+            mixed[i] = True
+    brows = firstkeys = None
+    nrows = sum(counts)
+    pparts = _PartitionWriter(npartitions, tempdir)
+    nfiltered = 0
+    for row in pit:
+        k = pgetk(row)
+        if bloom is not None and k not in bloom:
+            # no match on the build side, so needn't be written out
+            nfiltered += 1
+            yield row, _nolookup
         else:
-            outrow = list(lrow)  # start with the left row
-            # extend with missing values in place of the right row
-            outrow.extend([missing] * len(rvind))
-            yield tuple(outrow)
+            pparts.write(hash((level, k)) % npartitions, row)
+    if bloom is not None:
+        debug('%s rows excluded from partitions by bloom filter' % nfiltered)
+    for i, (ppart, bpart) in enumerate(izip(pparts.iterpartitions(),
+                                            bparts.iterpartitions())):
+        try:
+            prow = next(ppart)
+        except StopIteration:
+            continue  # nothing to join in this partition
+        # N.B., don't partition again if this partition is no smaller, or
+        # all rows share one key, e.g., a single key with many rows
+        maysplit = mixed[i] and counts[i] < nrows
+        for item in _iterhashprobe(chain([prow], ppart), bpart, pgetk, bgetk,
+                                   build, limit, tempdir, level + 1,
+                                   maysplit=maysplit):
+            yield item
+
+
+def _lookup(rows, getkey):
+    # N.B., as for lookup
+    lkp = dict()
+    for row in rows:
+        k = getkey(row)
+        if k in lkp:
+            lkp[k].append(row)
+        else:
+            lkp[k] = [row]
+    return lkp
+
+
+def _lookupone(rows, getkey):
+    # N.B., as for lookupone, the first row for each key is kept
+    lkp = dict()
+    for row in rows:
+        k = getkey(row)
+        if k not in lkp:
+            lkp[k] = row
+    return lkp
+
+
+def _keyset(rows, getkey):
+    return set(getkey(row) for row in rows)
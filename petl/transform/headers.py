@@ -7,6 +7,7 @@ from petl.errors import FieldSelectionError
 
 
 from petl.util.base import Table, asindices, rowgetter
+from petl.transform.fusion import _registerstage, _isfusable, iterfused
 
 
 def rename(table, *args, **kwargs):
@@ -71,6 +72,8 @@ class RenameView(Table):
         self.strict = kwargs.get('strict', True)
 
     def __iter__(self):
+        if _isfusable(self):
+            return iterfused(self)
         return iterrename(self.source, self.spec, self.strict)
 
     def __setitem__(self, key, value):
@@ -80,6 +83,12 @@ class RenameView(Table):
 def iterrename(source, spec, strict):
     it = iter(source)
     hdr = next(it)
+    yield _renameheader(hdr, spec, strict)
+    for row in it:
+        yield tuple(row)
+
+
+def _renameheader(hdr, spec, strict):
     flds = list(map(text_type, hdr))
     if strict:
         for x in spec:
@@ -92,9 +101,21 @@ def iterrename(source, spec, strict):
               else spec[f] if f in spec
               else f
               for i, f in enumerate(flds)]
-    yield tuple(outhdr)
-    for row in it:
-        yield tuple(row)
+    return tuple(outhdr)
+
+
+def _renamestage(view):
+    # N.B., only the header is changed
+    spec, strict = view.spec, view.strict
+
+    def stage(hdr, namespace, istuple):
+        lines = [] if istuple else ['row = tuple(row)']
+        return _renameheader(hdr, spec, strict), lines, True
+
+    return view.source, stage
+
+
+_registerstage(RenameView, _renamestage)
 
 
 def setheader(table, header):
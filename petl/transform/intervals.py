@@ -1,14 +1,19 @@
 from __future__ import absolute_import, print_function, division
 
 
+from bisect import bisect_left, bisect_right
+from itertools import groupby
 from operator import itemgetter, attrgetter
-from petl.compat import text_type
+from petl.compat import text_type, izip
 
 
+from petl.comparison import Comparable, comparable_itemgetter
 from petl.util.base import asindices, records, Table, values, rowgroupby
+from petl.util.columnar import _tobuffer
 from petl.errors import DuplicateKeyError
 from petl.transform.basics import addfield
-from petl.transform.sorts import sort
+from petl.transform.sorts import sort, _presort, _verifying, \
+    _iterverifyrest
 
 
 def tupletree(table, start='start', stop='stop', value=None):
@@ -108,6 +113,174 @@ def facetrecordtrees(table, key, start='start', stop='stop'):
     return trees
 
 
+def _tupleintervals(table, start='start', stop='stop', value=None,
+                    key=None):
+    # iterate over (start, stop, value) tuples for rows of the given table,
+    # or (key, start, stop, value) if a facet key is given
+    it = iter(table)
+    hdr = next(it)
+    flds = list(map(text_type, hdr))
+    assert start in flds, 'start field not recognised'
+    assert stop in flds, 'stop field not recognised'
+    getstart = itemgetter(flds.index(start))
+    getstop = itemgetter(flds.index(stop))
+    if value is None:
+        getvalue = tuple
+    else:
+        valueindices = asindices(hdr, value)
+        assert len(valueindices) > 0, 'invalid value field specification'
+        getvalue = itemgetter(*valueindices)
+    if key is None:
+        for row in it:
+            yield getstart(row), getstop(row), getvalue(row)
+    else:
+        keyindices = asindices(hdr, key)
+        assert len(keyindices) > 0, 'invalid key'
+        getkey = itemgetter(*keyindices)
+        for row in it:
+            yield getkey(row), getstart(row), getstop(row), getvalue(row)
+
+
+def _recordintervals(table, start='start', stop='stop', key=None):
+    # as _tupleintervals, with records as values
+    getstart = attrgetter(start)
+    getstop = attrgetter(stop)
+    if key is None:
+        for rec in records(table):
+            yield getstart(rec), getstop(rec), rec
+    else:
+        getkey = attrgetter(key)
+        for rec in records(table):
+            yield getkey(rec), getstart(rec), getstop(rec), rec
+
+
+def _facetindexes(intervals):
+    facets = dict()
+    for k, start, stop, value in intervals:
+        if k not in facets:
+            facets[k] = []
+        facets[k].append((start, stop, value))
+    return dict((k, IntervalIndex(facets[k])) for k in facets)
+
+
+class IntervalIndex(object):
+    """Immutable index of intervals, given as `(start, stop, value)` tuples,
+    used by :func:`petl.transform.intervals.intervallookup` and the other
+    interval lookup functions. Intervals are held sorted by start, stop then
+    value, with start and stop coordinates in typed arrays where these are
+    all integers or all floats. An implicit binary tree is laid over the
+    sorted intervals, holding the greatest stop coordinate under each node,
+    so intervals overlapping a query are found in O(log n + k) time for k
+    results, in the same order as from an :class:`intervaltree.IntervalTree`.
+    Identical intervals are held once. Indexes can be pickled, e.g., to share
+    with other processes.
+
+    """
+
+    def __init__(self, intervals):
+        ivs = sorted(intervals, key=itemgetter(0, 1))
+        starts = []
+        stops = []
+        values = []
+        for (start, stop), group in groupby(ivs, key=itemgetter(0, 1)):
+            if not start < stop:
+                raise ValueError('null interval not allowed: %r'
+                                 % ((start, stop),))
+            group = [iv[2] for iv in group]
+            if len(group) > 1:
+                # order and drop duplicates as an interval tree would
+                group.sort(key=Comparable)
+                group = [v for i, v in enumerate(group)
+                         if i == 0 or not v == group[i - 1]]
+            for v in group:
+                starts.append(start)
+                stops.append(stop)
+                values.append(v)
+        self.starts = _tobuffer(starts)
+        self.stops = _tobuffer(stops)
+        self.maxstops = _tobuffer(_treemaxstops(stops))
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return izip(self.starts, self.stops, self.values)
+
+    def overlap(self, start, stop):
+        """Return values of intervals overlapping the interval from `start`
+        (included) to `stop` (excluded)."""
+
+        if not start < stop:
+            return []
+        return self._search(bisect_left(self.starts, stop), start)
+
+    def at(self, point):
+        """Return values of intervals containing the given point."""
+
+        return self._search(bisect_right(self.starts, point), point)
+
+    def _search(self, hi, lo):
+        # values of intervals before position `hi` which stop after `lo`, in
+        # order, via an in-order walk of the tree skipping subtrees which
+        # start at or after `hi`, or whose intervals all stop at or before
+        # `lo`, see _treemaxstops
+        if hi == 0:
+            return []
+        stops, maxstops, values = self.stops, self.maxstops, self.values
+        level = len(values).bit_length() - 1
+        root = (1 << level) - 1
+        if not maxstops[root] > lo:
+            return []
+        out = []
+        stack = [(root, level, False)]
+        while stack:
+            x, k, seen = stack.pop()
+            if k <= 2:
+                # scan small subtrees
+                for i in range(x - (1 << k) + 1, min(x + (1 << k), hi)):
+                    if stops[i] > lo:
+                        out.append(values[i])
+            elif not seen:
+                stack.append((x, k, True))
+                y = x - (1 << (k - 1))
+                if maxstops[y] > lo:
+                    stack.append((y, k - 1, False))
+            elif x < hi:
+                if stops[x] > lo:
+                    out.append(values[x])
+                y = x + (1 << (k - 1))
+                if x + 1 < hi and maxstops[y] > lo:
+                    stack.append((y, k - 1, False))
+        return out
+
+
+def _treemaxstops(stops):
+    # greatest stop coordinate under each node of an implicit binary tree over
+    # intervals sorted by start, where the nodes at level k are at positions
+    # 2**k - 1, 3 * 2**k - 1, 5 * 2**k - 1, ..., with children half way to the
+    # next node either side, and nodes past the last interval hold the
+    # greatest stop of their left child (subtrees holding no intervals at all
+    # are never searched)
+    n = len(stops)
+    if not n:
+        return []
+    size = (1 << n.bit_length()) - 1
+    maxstops = list(stops) + [stops[0]] * (size - n)
+    for k in range(1, n.bit_length()):
+        half = 1 << (k - 1)
+        for x in range((1 << k) - 1, size, 1 << (k + 1)):
+            if x - (1 << k) + 1 >= n:
+                break
+            maxstop = maxstops[x - half]
+            if x < n:
+                maxstop = max(maxstop, stops[x])
+                if x + 1 < n:
+                    maxstop = max(maxstop, maxstops[x + half])
+            maxstops[x] = maxstop
+    return maxstops
+
+
 def intervallookup(table, start='start', stop='stop', value=None,
                    include_stop=False):
     """
@@ -178,16 +351,23 @@ def intervallookup(table, start='start', stop='stop', value=None,
         >>> lkp.search(5)
         ['bar', 'baz']
 
+    Intervals are held in a :class:`petl.transform.intervals.IntervalIndex`
+    rather than an interval tree, so the lookup can be pickled, and the
+    `intervaltree` package isn't needed.
+
     """
 
-    tree = tupletree(table, start=start, stop=stop, value=value)
-    return IntervalTreeLookup(tree, include_stop=include_stop)
+    index = IntervalIndex(_tupleintervals(table, start=start, stop=stop,
+                                          value=value))
+    return IntervalTreeLookup(index, include_stop=include_stop)
 
 
 Table.intervallookup = intervallookup
 
 
 def _search_tree(tree, start, stop, include_stop):
+    # N.B., returns values directly when searching an IntervalIndex, and
+    # sorted intervals when searching an interval tree
     if stop is None:
         if include_stop:
             stop = start + 1
@@ -200,22 +380,27 @@ def _search_tree(tree, start, stop, include_stop):
             stop += 1
             start -= 1
         args = (start, stop)
+    if isinstance(tree, IntervalIndex):
+        if len(args) == 2:
+            return tree.overlap(*args)
+        return tree.at(*args)
     if len(args) == 2:
         results = sorted(tree.overlap(*args))
     else:
         results = sorted(tree.at(*args))
-    return results
+    return [r.data for r in results]
 
 
 class IntervalTreeLookup(object):
-    
+    """Interval lookup searching an
+    :class:`petl.transform.intervals.IntervalIndex` or an interval tree."""
+
     def __init__(self, tree, include_stop=False):
         self.tree = tree
         self.include_stop = include_stop
 
     def search(self, start, stop=None):
-        results = _search_tree(self.tree, start, stop, self.include_stop)
-        return [r.data for r in results]
+        return _search_tree(self.tree, start, stop, self.include_stop)
 
     find = search
 
@@ -261,8 +446,10 @@ def intervallookupone(table, start='start', stop='stop', value=None,
 
     """
 
-    tree = tupletree(table, start=start, stop=stop, value=value)
-    return IntervalTreeLookupOne(tree, strict=strict, include_stop=include_stop)
+    index = IntervalIndex(_tupleintervals(table, start=start, stop=stop,
+                                          value=value))
+    return IntervalTreeLookupOne(index, strict=strict,
+                                 include_stop=include_stop)
 
 
 Table.intervallookupone = intervallookupone
@@ -282,7 +469,7 @@ class IntervalTreeLookupOne(object):
         elif len(results) > 1 and self.strict:
             raise DuplicateKeyError((start, stop))
         else:
-            return results[0].data
+            return results[0]
 
     find = search
 
@@ -294,8 +481,8 @@ def intervalrecordlookup(table, start='start', stop='stop', include_stop=False):
 
     """
 
-    tree = recordtree(table, start=start, stop=stop)
-    return IntervalTreeLookup(tree, include_stop=include_stop)
+    index = IntervalIndex(_recordintervals(table, start=start, stop=stop))
+    return IntervalTreeLookup(index, include_stop=include_stop)
 
 
 Table.intervalrecordlookup = intervalrecordlookup
@@ -309,8 +496,9 @@ def intervalrecordlookupone(table, start='start', stop='stop',
 
     """
 
-    tree = recordtree(table, start=start, stop=stop)
-    return IntervalTreeLookupOne(tree, include_stop=include_stop, strict=strict)
+    index = IntervalIndex(_recordintervals(table, start=start, stop=stop))
+    return IntervalTreeLookupOne(index, include_stop=include_stop,
+                                 strict=strict)
 
 
 Table.intervalrecordlookupone = intervalrecordlookupone
@@ -353,7 +541,8 @@ def facetintervallookup(table, key, start='start', stop='stop',
 
     """
 
-    trees = facettupletrees(table, key, start=start, stop=stop, value=value)
+    trees = _facetindexes(_tupleintervals(table, start=start, stop=stop,
+                                          value=value, key=key))
     out = dict()
     for k in trees:
         out[k] = IntervalTreeLookup(trees[k], include_stop=include_stop)
@@ -375,7 +564,8 @@ def facetintervallookupone(table, key, start='start', stop='stop',
 
     """
     
-    trees = facettupletrees(table, key, start=start, stop=stop, value=value)
+    trees = _facetindexes(_tupleintervals(table, start=start, stop=stop,
+                                          value=value, key=key))
     out = dict()
     for k in trees:
         out[k] = IntervalTreeLookupOne(trees[k], include_stop=include_stop,
@@ -393,7 +583,8 @@ def facetintervalrecordlookup(table, key, start='start', stop='stop',
     
     """
 
-    trees = facetrecordtrees(table, key, start=start, stop=stop)
+    trees = _facetindexes(_recordintervals(table, start=start, stop=stop,
+                                           key=key))
     out = dict()
     for k in trees:
         out[k] = IntervalTreeLookup(trees[k], include_stop=include_stop)
@@ -411,7 +602,8 @@ def facetintervalrecordlookupone(table, key, start, stop, include_stop=False,
 
     """
     
-    trees = facetrecordtrees(table, key, start=start, stop=stop)
+    trees = _facetindexes(_recordintervals(table, start=start, stop=stop,
+                                           key=key))
     out = dict()
     for k in trees:
         out[k] = IntervalTreeLookupOne(trees[k], include_stop=include_stop,
@@ -424,7 +616,8 @@ Table.facetintervalrecordlookupone = facetintervalrecordlookupone
 
 def intervaljoin(left, right, lstart='start', lstop='stop', rstart='start',
                  rstop='stop', lkey=None, rkey=None, include_stop=False,
-                 lprefix=None, rprefix=None):
+                 lprefix=None, rprefix=None, sweep=False, presorted=False,
+                 buffersize=None, tempdir=None):
     """
     Join two tables by overlapping intervals. E.g.::
 
@@ -527,6 +720,40 @@ def intervaljoin(left, right, lstart='start', lstop='stop', rstart='start',
         | 'orange' |     2 |   5 | 'orange' |     4 |    9 | 'baz' |
         +----------+-------+-----+----------+-------+------+-------+
 
+    By default, an interval index is built in memory from the right table (see
+    :func:`petl.transform.intervals.intervallookup`) and searched for each
+    row of the left table. If `sweep` is True, both tables are instead sorted
+    by facet key (if given) and start, and overlaps are found by sweeping
+    over both tables at once, holding in memory only rows from the right
+    table which may overlap the current row from the left table. Rows are
+    then output in order of facet key and start in the left table. If
+    `presorted` is True, the tables are assumed to be sorted already, and
+    may also be 'verify' or 'fallback' as for
+    :func:`petl.transform.joins.join`, see also the discussion of the
+    `buffersize` and `tempdir` arguments under the
+    :func:`petl.transform.sorts.sort` function. E.g.::
+
+        >>> table4 = etl.intervaljoin(left, right,
+        ...                           lstart='begin', lstop='end', lkey='fruit',
+        ...                           rstart='start', rstop='stop', rkey='type',
+        ...                           sweep=True)
+        >>> table4.lookall()
+        +----------+-------+-----+----------+-------+------+-------+
+        | fruit    | begin | end | type     | start | stop | value |
+        +==========+=======+=====+==========+=======+======+=======+
+        | 'apple'  |     1 |   2 | 'apple'  |     1 |    4 | 'foo' |
+        +----------+-------+-----+----------+-------+------+-------+
+        | 'apple'  |     2 |   4 | 'apple'  |     1 |    4 | 'foo' |
+        +----------+-------+-----+----------+-------+------+-------+
+        | 'apple'  |     2 |   4 | 'apple'  |     3 |    7 | 'bar' |
+        +----------+-------+-----+----------+-------+------+-------+
+        | 'apple'  |     2 |   5 | 'apple'  |     1 |    4 | 'foo' |
+        +----------+-------+-----+----------+-------+------+-------+
+        | 'apple'  |     2 |   5 | 'apple'  |     3 |    7 | 'bar' |
+        +----------+-------+-----+----------+-------+------+-------+
+        | 'orange' |     2 |   5 | 'orange' |     4 |    9 | 'baz' |
+        +----------+-------+-----+----------+-------+------+-------+
+
     """
     
     assert (lkey is None) == (rkey is None), \
@@ -534,7 +761,9 @@ def intervaljoin(left, right, lstart='start', lstop='stop', rstart='start',
     return IntervalJoinView(left, right, lstart=lstart, lstop=lstop,
                             rstart=rstart, rstop=rstop, lkey=lkey,
                             rkey=rkey, include_stop=include_stop,
-                            lprefix=lprefix, rprefix=rprefix)
+                            lprefix=lprefix, rprefix=rprefix, sweep=sweep,
+                            presorted=presorted, buffersize=buffersize,
+                            tempdir=tempdir)
 
 
 Table.intervaljoin = intervaljoin
@@ -544,7 +773,8 @@ class IntervalJoinView(Table):
     
     def __init__(self, left, right, lstart='start', lstop='stop', 
                  rstart='start', rstop='stop', lkey=None, rkey=None,
-                 include_stop=False, lprefix=None, rprefix=None):
+                 include_stop=False, lprefix=None, rprefix=None, sweep=False,
+                 presorted=False, buffersize=None, tempdir=None):
         self.left = left
         self.lstart = lstart
         self.lstop = lstop
@@ -554,13 +784,20 @@ class IntervalJoinView(Table):
         self.rstop = rstop
         self.rkey = rkey
         self.include_stop = include_stop
+        self.sweep = sweep
+        if sweep:
+            self.left = _presort(left, _sweepkey(lkey, lstart), presorted,
+                                 buffersize=buffersize, tempdir=tempdir)
+            self.right = _presort(right, _sweepkey(rkey, rstart), presorted,
+                                  buffersize=buffersize, tempdir=tempdir)
         self.lprefix = lprefix
         self.rprefix = rprefix
 
     def __iter__(self):
-        return iterintervaljoin(
-            left=self.left,
-            right=self.right,
+        (left, right), verifying = _verifying(self.left, self.right)
+        rows = iterintervaljoin(
+            left=left,
+            right=right,
             lstart=self.lstart,
             lstop=self.lstop,
             rstart=self.rstart,
@@ -571,13 +808,16 @@ class IntervalJoinView(Table):
             missing=None,
             lprefix=self.lprefix,
             rprefix=self.rprefix,
-            leftouter=False
+            leftouter=False,
+            sweep=self.sweep
         )
+        return _iterverifyrest(rows, verifying)
         
 
 def intervalleftjoin(left, right, lstart='start', lstop='stop', rstart='start',
                      rstop='stop', lkey=None, rkey=None, include_stop=False,
-                     missing=None, lprefix=None, rprefix=None):
+                     missing=None, lprefix=None, rprefix=None, sweep=False,
+                     presorted=False, buffersize=None, tempdir=None):
     """
     Like :func:`petl.transform.intervals.intervaljoin` but rows from the left 
     table without a match in the right table are also included. E.g.::
@@ -624,6 +864,10 @@ def intervalleftjoin(left, right, lstart='start', lstop='stop', rstart='start',
     from the interval. Use the `include_stop` keyword argument to include the
     upper bound of the interval when finding overlaps.
 
+    If `sweep` is True, overlaps are found by sweeping over both tables
+    sorted by facet key and start, see
+    :func:`petl.transform.intervals.intervaljoin`.
+
     """
     
     assert (lkey is None) == (rkey is None), \
@@ -632,7 +876,9 @@ def intervalleftjoin(left, right, lstart='start', lstop='stop', rstart='start',
                                 rstart=rstart, rstop=rstop, lkey=lkey,
                                 rkey=rkey, include_stop=include_stop,
                                 missing=missing, lprefix=lprefix,
-                                rprefix=rprefix)
+                                rprefix=rprefix, sweep=sweep,
+                                presorted=presorted, buffersize=buffersize,
+                                tempdir=tempdir)
 
 
 Table.intervalleftjoin = intervalleftjoin
@@ -642,7 +888,8 @@ class IntervalLeftJoinView(Table):
     
     def __init__(self, left, right, lstart='start', lstop='stop', 
                  rstart='start', rstop='stop', lkey=None, rkey=None,
-                 missing=None, include_stop=False, lprefix=None, rprefix=None):
+                 missing=None, include_stop=False, lprefix=None, rprefix=None,
+                 sweep=False, presorted=False, buffersize=None, tempdir=None):
         self.left = left
         self.lstart = lstart
         self.lstop = lstop
@@ -653,13 +900,20 @@ class IntervalLeftJoinView(Table):
         self.rkey = rkey
         self.missing = missing
         self.include_stop = include_stop
+        self.sweep = sweep
+        if sweep:
+            self.left = _presort(left, _sweepkey(lkey, lstart), presorted,
+                                 buffersize=buffersize, tempdir=tempdir)
+            self.right = _presort(right, _sweepkey(rkey, rstart), presorted,
+                                  buffersize=buffersize, tempdir=tempdir)
         self.lprefix = lprefix
         self.rprefix = rprefix
 
     def __iter__(self):
-        return iterintervaljoin(
-            left=self.left,
-            right=self.right,
+        (left, right), verifying = _verifying(self.left, self.right)
+        rows = iterintervaljoin(
+            left=left,
+            right=right,
             lstart=self.lstart,
             lstop=self.lstop,
             rstart=self.rstart,
@@ -670,13 +924,16 @@ class IntervalLeftJoinView(Table):
             missing=self.missing,
             lprefix=self.lprefix,
             rprefix=self.rprefix,
-            leftouter=True
+            leftouter=True,
+            sweep=self.sweep
         )
+        return _iterverifyrest(rows, verifying)
         
 
 def intervalantijoin(left, right, lstart='start', lstop='stop', rstart='start',
                      rstop='stop', lkey=None, rkey=None, include_stop=False,
-                     missing=None):
+                     missing=None, sweep=False, presorted=False,
+                     buffersize=None, tempdir=None):
     """
     Return rows from the `left` table with no overlapping rows from the `right`
     table.
@@ -685,6 +942,10 @@ def intervalantijoin(left, right, lstart='start', lstop='stop', rstart='start',
     from the interval. Use the `include_stop` keyword argument to include the
     upper bound of the interval when finding overlaps.
 
+    If `sweep` is True, overlaps are found by sweeping over both tables
+    sorted by facet key and start, see
+    :func:`petl.transform.intervals.intervaljoin`.
+
     """
 
     assert (lkey is None) == (rkey is None), \
@@ -692,7 +953,9 @@ def intervalantijoin(left, right, lstart='start', lstop='stop', rstart='start',
     return IntervalAntiJoinView(left, right, lstart=lstart, lstop=lstop,
                                 rstart=rstart, rstop=rstop, lkey=lkey,
                                 rkey=rkey, include_stop=include_stop,
-                                missing=missing)
+                                missing=missing, sweep=sweep,
+                                presorted=presorted, buffersize=buffersize,
+                                tempdir=tempdir)
 
 
 Table.intervalantijoin = intervalantijoin
@@ -702,7 +965,8 @@ class IntervalAntiJoinView(Table):
 
     def __init__(self, left, right, lstart='start', lstop='stop',
                  rstart='start', rstop='stop', lkey=None, rkey=None,
-                 missing=None, include_stop=False):
+                 missing=None, include_stop=False, sweep=False,
+                 presorted=False, buffersize=None, tempdir=None):
         self.left = left
         self.lstart = lstart
         self.lstop = lstop
@@ -713,11 +977,18 @@ class IntervalAntiJoinView(Table):
         self.rkey = rkey
         self.missing = missing
         self.include_stop = include_stop
+        self.sweep = sweep
+        if sweep:
+            self.left = _presort(left, _sweepkey(lkey, lstart), presorted,
+                                 buffersize=buffersize, tempdir=tempdir)
+            self.right = _presort(right, _sweepkey(rkey, rstart), presorted,
+                                  buffersize=buffersize, tempdir=tempdir)
 
     def __iter__(self):
-        return iterintervaljoin(
-            left=self.left,
-            right=self.right,
+        (left, right), verifying = _verifying(self.left, self.right)
+        rows = iterintervaljoin(
+            left=left,
+            right=right,
             lstart=self.lstart,
             lstop=self.lstop,
             rstart=self.rstart,
@@ -729,13 +1000,15 @@ class IntervalAntiJoinView(Table):
             lprefix=None,
             rprefix=None,
             leftouter=True,
-            anti=True
+            anti=True,
+            sweep=self.sweep
         )
+        return _iterverifyrest(rows, verifying)
 
 
 def iterintervaljoin(left, right, lstart, lstop, rstart, rstop, lkey,
                      rkey, include_stop, missing, lprefix, rprefix, leftouter,
-                     anti=False):
+                     anti=False, sweep=False):
 
     # create iterators and obtain fields
     lit = iter(left)
@@ -771,26 +1044,17 @@ def iterintervaljoin(left, right, lstart, lstop, rstart, rstop, lkey,
     getlstart = itemgetter(lflds.index(lstart))
     getlstop = itemgetter(lflds.index(lstop))
 
-    if rkey is None:
+    if sweep:
+        # N.B., rows are sorted by facet key and start, see IntervalJoinView
+        probes = _itersweep(lit, rit, lhdr, rhdr, lstart, lstop, rstart, rstop,
+                            lkey, rkey, include_stop)
+
+    elif rkey is None:
         # build interval lookup for right table
         lookup = intervallookup(right, rstart, rstop, include_stop=include_stop)
         search = lookup.search
-        # main loop
-        for lrow in lit:
-            start = getlstart(lrow)
-            stop = getlstop(lrow)
-            rrows = search(start, stop)
-            if rrows:
-                if not anti:
-                    for rrow in rrows:
-                        outrow = list(lrow)
-                        outrow.extend(rrow)
-                        yield tuple(outrow)
-            elif leftouter:
-                outrow = list(lrow)
-                if not anti:
-                    outrow.extend([missing] * len(rflds))
-                yield tuple(outrow)
+        probes = ((lrow, search(getlstart(lrow), getlstop(lrow)))
+                  for lrow in lit)
 
     else:
         # build interval lookup for right table
@@ -801,30 +1065,33 @@ def iterintervaljoin(left, right, lstart, lstop, rstart, rstop, lkey,
             search[f] = lookup[f].search
         # getter for facet key values in left table
         getlkey = itemgetter(*asindices(lflds, lkey))
-        # main loop
-        for lrow in lit:
-            lkey = getlkey(lrow)
-            start = getlstart(lrow)
-            stop = getlstop(lrow)
-            
-            try:
-                rrows = search[lkey](start, stop)
-            except KeyError:
-                rrows = None
-            except AttributeError:
-                rrows = None
-                
-            if rrows:
-                if not anti:
-                    for rrow in rrows:
-                        outrow = list(lrow)
-                        outrow.extend(rrow)
-                        yield tuple(outrow)
-            elif leftouter:
-                outrow = list(lrow)
-                if not anti:
-                    outrow.extend([missing] * len(rflds))
-                yield tuple(outrow)
+
+        def _probes():
+            for lrow in lit:
+                try:
+                    rrows = search[getlkey(lrow)](getlstart(lrow),
+                                                  getlstop(lrow))
+                except KeyError:
+                    rrows = None
+                except AttributeError:
+                    rrows = None
+                yield lrow, rrows
+
+        probes = _probes()
+
+    # main loop
+    rpad = (missing,) * len(rflds)
+    for lrow, rrows in probes:
+        if rrows:
+            if not anti:
+                lrow = tuple(lrow)
+                for rrow in rrows:
+                    yield lrow + tuple(rrow)
+        elif leftouter:
+            if anti:
+                yield tuple(lrow)
+            else:
+                yield tuple(lrow) + rpad
 
 
 def intervaljoinvalues(left, right, value, lstart='start', lstop='stop',
@@ -857,18 +1124,26 @@ Table.intervaljoinvalues = intervaljoinvalues
 
 
 def intervalsubtract(left, right, lstart='start', lstop='stop', rstart='start',
-                     rstop='stop', lkey=None, rkey=None, include_stop=False):
+                     rstop='stop', lkey=None, rkey=None, include_stop=False,
+                     sweep=False, presorted=False, buffersize=None,
+                     tempdir=None):
     """
     Subtract intervals in the right hand table from intervals in the left hand 
     table.
-    
+
+    If `sweep` is True, overlaps are found by sweeping over both tables
+    sorted by facet key and start, see
+    :func:`petl.transform.intervals.intervaljoin`.
+
     """
 
     assert (lkey is None) == (rkey is None), \
         'facet key field must be provided for both or neither table'
     return IntervalSubtractView(left, right, lstart=lstart, lstop=lstop,
                                 rstart=rstart, rstop=rstop, lkey=lkey,
-                                rkey=rkey, include_stop=include_stop)
+                                rkey=rkey, include_stop=include_stop,
+                                sweep=sweep, presorted=presorted,
+                                buffersize=buffersize, tempdir=tempdir)
 
 
 Table.intervalsubtract = intervalsubtract
@@ -878,7 +1153,8 @@ class IntervalSubtractView(Table):
     
     def __init__(self, left, right, lstart='start', lstop='stop', 
                  rstart='start', rstop='stop', lkey=None, rkey=None,
-                 include_stop=False):
+                 include_stop=False, sweep=False, presorted=False,
+                 buffersize=None, tempdir=None):
         self.left = left
         self.lstart = lstart
         self.lstop = lstop
@@ -888,15 +1164,23 @@ class IntervalSubtractView(Table):
         self.rstop = rstop
         self.rkey = rkey
         self.include_stop = include_stop
+        self.sweep = sweep
+        if sweep:
+            self.left = _presort(left, _sweepkey(lkey, lstart), presorted,
+                                 buffersize=buffersize, tempdir=tempdir)
+            self.right = _presort(right, _sweepkey(rkey, rstart), presorted,
+                                  buffersize=buffersize, tempdir=tempdir)
 
     def __iter__(self):
-        return iterintervalsubtract(self.left, self.right, self.lstart,
-                                    self.lstop, self.rstart, self.rstop,
-                                    self.lkey, self.rkey, self.include_stop)
+        (left, right), verifying = _verifying(self.left, self.right)
+        rows = iterintervalsubtract(left, right, self.lstart, self.lstop,
+                                    self.rstart, self.rstop, self.lkey,
+                                    self.rkey, self.include_stop, self.sweep)
+        return _iterverifyrest(rows, verifying)
         
 
 def iterintervalsubtract(left, right, lstart, lstop, rstart, rstop, lkey, rkey,
-                         include_stop):
+                         include_stop, sweep=False):
 
     # create iterators and obtain fields
     lit = iter(left)
@@ -925,51 +1209,138 @@ def iterintervalsubtract(left, right, lstart, lstop, rstart, rstop, lkey, rkey,
     getlcoords = itemgetter(lstartidx, lstopidx)
     getrcoords = itemgetter(*asindices(rhdr, (rstart, rstop)))
 
-    if rkey is None:
+    if sweep:
+        # N.B., rows are sorted by facet key and start, see
+        # IntervalSubtractView
+        probes = _itersweep(lit, rit, lhdr, rhdr, lstart, lstop, rstart, rstop,
+                            lkey, rkey, include_stop)
+
+    elif rkey is None:
         # build interval lookup for right table
         lookup = intervallookup(right, rstart, rstop, include_stop=include_stop)
         search = lookup.search
-        # main loop
-        for lrow in lit:
-            start, stop = getlcoords(lrow)
-            rrows = search(start, stop)
-            if not rrows:
-                yield tuple(lrow)
-            else:
-                rivs = sorted([getrcoords(rrow) for rrow in rrows],
-                              key=itemgetter(0))  # sort by start
-                for x, y in _subtract(start, stop, rivs):
-                    out = list(lrow)
-                    out[lstartidx] = x
-                    out[lstopidx] = y
-                    yield tuple(out)
-                
+        probes = ((lrow, search(*getlcoords(lrow))) for lrow in lit)
+
     else:
         # build interval lookup for right table
         lookup = facetintervallookup(right, key=rkey, start=rstart, stop=rstop,
                                      include_stop=include_stop)
         # getter for facet key values in left table
         getlkey = itemgetter(*asindices(lhdr, lkey))
-        # main loop
-        for lrow in lit:
-            lkey = getlkey(lrow)
+
+        def _probes():
+            for lrow in lit:
+                try:
+                    rrows = lookup[getlkey(lrow)].search(*getlcoords(lrow))
+                except KeyError:
+                    rrows = None
+                except AttributeError:
+                    rrows = None
+                yield lrow, rrows
+
+        probes = _probes()
+
+    # main loop
+    for lrow, rrows in probes:
+        if not rrows:
+            yield tuple(lrow)
+        else:
             start, stop = getlcoords(lrow)
-            try:
-                rrows = lookup[lkey].search(start, stop)
-            except KeyError:
-                rrows = None
-            except AttributeError:
-                rrows = None
-            if not rrows:
-                yield tuple(lrow)
-            else:
-                rivs = sorted([getrcoords(rrow) for rrow in rrows],
-                              key=itemgetter(0))  # sort by start
-                for x, y in _subtract(start, stop, rivs):
-                    out = list(lrow)
-                    out[lstartidx] = x
-                    out[lstopidx] = y
-                    yield tuple(out)
+            rivs = sorted([getrcoords(rrow) for rrow in rrows],
+                          key=itemgetter(0))  # sort by start
+            for x, y in _subtract(start, stop, rivs):
+                out = list(lrow)
+                out[lstartidx] = x
+                out[lstopidx] = y
+                yield tuple(out)
+
+
+def _sweepkey(key, start):
+    # sort key for tables joined via _itersweep
+    if key is None:
+        return start
+    elif isinstance(key, (list, tuple)):
+        return tuple(key) + (start,)
+    else:
+        return key, start
+
+
+def _itersweep(lit, rit, lhdr, rhdr, lstart, lstop, rstart, rstop, lkey, rkey,
+               include_stop):
+    # yield each row from the left table along with the overlapping rows from
+    # the right table, in the same order as found via an interval lookup, for
+    # tables sorted by facet key and start, by sweeping over both tables at
+    # once
+    getlstart = itemgetter(*asindices(lhdr, lstart))
+    getlstop = itemgetter(*asindices(lhdr, lstop))
+    getrcoords = itemgetter(*asindices(rhdr, (rstart, rstop)))
+    if rkey is None:
+        for item in _sweep(lit, rit, getlstart, getlstop, getrcoords,
+                           include_stop):
+            yield item
+        return
+
+    # merge groups of rows with the same facet key, as for a merge join
+    lgit = groupby(lit, key=comparable_itemgetter(*asindices(lhdr, lkey)))
+    rgit = groupby(rit, key=comparable_itemgetter(*asindices(rhdr, rkey)))
+    rkval, rrowgrp = next(rgit, (None, None))
+    for lkval, lrowgrp in lgit:
+        while rrowgrp is not None and rkval < lkval:
+            rkval, rrowgrp = next(rgit, (None, None))
+        if rrowgrp is not None and rkval == lkval:
+            for item in _sweep(lrowgrp, rrowgrp, getlstart, getlstop,
+                               getrcoords, include_stop):
+                yield item
+        else:
+            for lrow in lrowgrp:
+                yield lrow, None
+
+
+def _sweep(lit, rit, getlstart, getlstop, getrcoords, include_stop):
+    # right rows which may overlap this or later left rows, as (start, stop,
+    # row) tuples in order of start
+    active = []
+    rit = iter(rit)
+    nextr = _nextinterval(rit, getrcoords)
+    for lrow in lit:
+        # as when searching an interval tree, see _search_tree
+        start, stop = getlstart(lrow), getlstop(lrow)
+        if include_stop:
+            start, stop = start - 1, stop + 1
+        # N.B., left rows are in order of start, so right rows ending at or
+        # before this start can't overlap any later left rows
+        active = [iv for iv in active if iv[1] > start]
+        while nextr is not None and nextr[0] < stop:
+            if nextr[1] > start:
+                active.append(nextr)
+            nextr = _nextinterval(rit, getrcoords)
+        if start >= stop:
+            yield lrow, None
+            continue
+        matches = [iv for iv in active if iv[0] < stop]
+        if len(matches) > 1:
+            # N.B., an interval tree holds a set of intervals, sorted by
+            # start, stop then data
+            matches.sort(key=_sweeporder)
+            matches = [iv for i, iv in enumerate(matches)
+                       if i == 0 or iv != matches[i - 1]]
+        yield lrow, [iv[2] for iv in matches]
+
+
+def _nextinterval(rit, getrcoords):
+    # next right row as a (start, stop, row) tuple, or None, checking for null
+    # intervals as when building an IntervalIndex
+    for rrow in rit:
+        start, stop = getrcoords(rrow)
+        if not start < stop:
+            raise ValueError('null interval not allowed: %r'
+                             % ((start, stop),))
+        return start, stop, tuple(rrow)
+    return None
+
+
+def _sweeporder(iv):
+    return iv[0], iv[1], Comparable(iv[2])
 
 
 from collections import namedtuple
@@ -1,20 +1,30 @@
 from __future__ import absolute_import, print_function, division
 
 
+import math
+import logging
 import itertools
 import operator
-from petl.compat import next, text_type
+from array import array
+from petl.compat import next, text_type, izip
 
 
 from petl.errors import ArgumentError
 from petl.comparison import comparable_itemgetter, Comparable
 from petl.util.base import Table, asindices, rowgetter, rowgroupby, \
     header, data
-from petl.transform.sorts import sort
+from petl.util.columnar import ColumnarTable, _tobuffer
+from petl.util.keyindex import KeyIndex
+from petl.transform.sorts import sort, _bufferrows, _presort, \
+    _sortedview, _verifying, _iterverifyrest, VerifySortedView
 from petl.transform.basics import cut, cutout
 from petl.transform.dedup import distinct
 
 
+logger = logging.getLogger(__name__)
+debug = logger.debug
+
+
 def natural_key(left, right):
     # determine key field or fields
     lhdr = header(left)
@@ -48,7 +58,8 @@ def keys_from_args(left, right, key, lkey, rkey):
 
 
 def join(left, right, key=None, lkey=None, rkey=None, presorted=False,
-         buffersize=None, tempdir=None, cache=True, lprefix=None, rprefix=None):
+         buffersize=None, tempdir=None, cache=True, lprefix=None, rprefix=None,
+         strategy=None):
     """
     Perform an equi-join on the given tables. E.g.::
 
@@ -132,16 +143,57 @@ def join(left, right, key=None, lkey=None, rkey=None, presorted=False,
     `buffersize`, `tempdir` and `cache` arguments under the
     :func:`petl.transform.sorts.sort` function.
 
+    If `presorted` is 'verify', the data are also assumed to be sorted, but
+    this is checked as rows are merged (and for any remaining rows once
+    merging is finished), raising :class:`petl.errors.NotSortedError` if
+    not. If `presorted` is 'fallback', each table is checked via
+    :func:`petl.transform.sorts.issorted` before merging, and only sorted if
+    needed. Tables returned by :func:`petl.transform.sorts.sort` with the
+    same key are not sorted again.
+
     Left and right tables with different key fields can be handled via the
     `lkey` and `rkey` arguments.
 
+    If both tables are :class:`petl.util.columnar.ColumnarTable` instances
+    (e.g., as returned by :func:`petl.io.numpy.fromarray` or
+    :func:`petl.io.pandas.fromdataframe`) with the key fields held in numpy
+    arrays or typed arrays of numbers, booleans or strings, and `strategy`
+    is not given, matching rows are found via numpy when the table is
+    iterated, with rows in the same order.
+
+    If `strategy` is 'auto', the way the join is executed is chosen when the
+    table is first iterated, by reading a sample of rows from each table,
+    checking whether the tables are already sorted by the key, and estimating
+    the number of rows and distinct keys in each table. The tables are then
+    merged directly if both are sorted, joined via a hash lookup (see
+    :func:`petl.transform.hashjoins.hashjoin`) if that is estimated to be
+    cheaper, or otherwise sorted and merged. If only the sample of a table is
+    known to be sorted, the rest of it is checked as rows are merged, as when
+    `presorted` is 'verify'. N.B., the order of rows in the output then
+    depends on the chosen plan, which is available via the `plan` attribute
+    of the returned table, e.g.::
+
+        >>> table11 = etl.join(table1, table2, key='id', strategy='auto')
+        >>> table11.plan['strategy']
+        'presorted'
+
     """
 
     # TODO don't read data twice (occurs if using natural key)
     lkey, rkey = keys_from_args(left, right, key, lkey, rkey)
-    return JoinView(left, right, lkey=lkey, rkey=rkey,
+    _checkstrategy(strategy)
+    if strategy == 'auto':
+        return AutoJoinView(left, right, lkey=lkey, rkey=rkey, kind='inner',
+                            presorted=presorted, buffersize=buffersize,
+                            tempdir=tempdir, cache=cache, lprefix=lprefix,
+                            rprefix=rprefix)
+    view = JoinView(left, right, lkey=lkey, rkey=rkey,
                     presorted=presorted, buffersize=buffersize, tempdir=tempdir,
                     cache=cache, lprefix=lprefix, rprefix=rprefix)
+    if presorted != 'verify':
+        view = _columnarjoinview(view, left, right, lkey, rkey,
+                                 lprefix=lprefix, rprefix=rprefix)
+    return view
 
 
 Table.join = join
@@ -155,13 +207,9 @@ class JoinView(Table):
                  lprefix=None, rprefix=None):
         self.lkey = lkey
         self.rkey = rkey
-        if presorted:
-            self.left = left
-            self.right = right
-        else:
-            self.left = sort(left, lkey, buffersize=buffersize,
+        self.left = _presort(left, lkey, presorted, buffersize=buffersize,
                              tempdir=tempdir, cache=cache)
-            self.right = sort(right, rkey, buffersize=buffersize,
+        self.right = _presort(right, rkey, presorted, buffersize=buffersize,
                               tempdir=tempdir, cache=cache)
         self.leftouter = leftouter
         self.rightouter = rightouter
@@ -170,15 +218,17 @@ class JoinView(Table):
         self.rprefix = rprefix
 
     def __iter__(self):
-        return iterjoin(self.left, self.right, self.lkey, self.rkey,
+        (left, right), verifying = _verifying(self.left, self.right)
+        rows = iterjoin(left, right, self.lkey, self.rkey,
                         leftouter=self.leftouter, rightouter=self.rightouter,
                         missing=self.missing, lprefix=self.lprefix,
                         rprefix=self.rprefix)
+        return _iterverifyrest(rows, verifying)
 
 
 def leftjoin(left, right, key=None, lkey=None, rkey=None, missing=None,
              presorted=False, buffersize=None, tempdir=None, cache=True,
-             lprefix=None, rprefix=None):
+             lprefix=None, rprefix=None, strategy=None):
     """
     Perform a left outer join on the given tables. E.g.::
 
@@ -209,17 +259,55 @@ def leftjoin(left, right, key=None, lkey=None, rkey=None, missing=None,
     `buffersize`, `tempdir` and `cache` arguments under the
     :func:`petl.transform.sorts.sort` function.
 
+    If `presorted` is 'verify', the data are also assumed to be sorted, but
+    this is checked as rows are merged (and for any remaining rows once
+    merging is finished), raising :class:`petl.errors.NotSortedError` if
+    not. If `presorted` is 'fallback', each table is checked via
+    :func:`petl.transform.sorts.issorted` before merging, and only sorted if
+    needed. Tables returned by :func:`petl.transform.sorts.sort` with the
+    same key are not sorted again.
+
     Left and right tables with different key fields can be handled via the
     `lkey` and `rkey` arguments.
 
+    If both tables are :class:`petl.util.columnar.ColumnarTable` instances
+    (e.g., as returned by :func:`petl.io.numpy.fromarray` or
+    :func:`petl.io.pandas.fromdataframe`) with the key fields held in numpy
+    arrays or typed arrays of numbers, booleans or strings, and `strategy`
+    is not given, matching rows are found via numpy when the table is
+    iterated, with rows in the same order.
+
+    If `strategy` is 'auto', the way the join is executed is chosen when the
+    table is first iterated, by reading a sample of rows from each table,
+    checking whether the tables are already sorted by the key, and estimating
+    the number of rows and distinct keys in each table. The tables are then
+    merged directly if both are sorted, joined via a hash lookup (see
+    :func:`petl.transform.hashjoins.hashleftjoin`) if that is estimated to be
+    cheaper, or otherwise sorted and merged. If only the sample of a table is
+    known to be sorted, the rest of it is checked as rows are merged, as when
+    `presorted` is 'verify'. N.B., the order of rows in the output then
+    depends on the chosen plan, which is available via the `plan` attribute
+    of the returned table.
+
     """
 
     # TODO don't read data twice (occurs if using natural key)
     lkey, rkey = keys_from_args(left, right, key, lkey, rkey)
-    return JoinView(left, right, lkey=lkey, rkey=rkey,
+    _checkstrategy(strategy)
+    if strategy == 'auto':
+        return AutoJoinView(left, right, lkey=lkey, rkey=rkey, kind='left',
+                            presorted=presorted, missing=missing,
+                            buffersize=buffersize, tempdir=tempdir,
+                            cache=cache, lprefix=lprefix, rprefix=rprefix)
+    view = JoinView(left, right, lkey=lkey, rkey=rkey,
                     presorted=presorted, leftouter=True, rightouter=False,
                     missing=missing, buffersize=buffersize, tempdir=tempdir,
                     cache=cache, lprefix=lprefix, rprefix=rprefix)
+    if presorted != 'verify':
+        view = _columnarjoinview(view, left, right, lkey, rkey,
+                                 leftouter=True, missing=missing,
+                                 lprefix=lprefix, rprefix=rprefix)
+    return view
 
 
 Table.leftjoin = leftjoin
@@ -258,6 +346,14 @@ def rightjoin(left, right, key=None, lkey=None, rkey=None, missing=None,
     `buffersize`, `tempdir` and `cache` arguments under the
     :func:`petl.transform.sorts.sort` function.
 
+    If `presorted` is 'verify', the data are also assumed to be sorted, but
+    this is checked as rows are merged (and for any remaining rows once
+    merging is finished), raising :class:`petl.errors.NotSortedError` if
+    not. If `presorted` is 'fallback', each table is checked via
+    :func:`petl.transform.sorts.issorted` before merging, and only sorted if
+    needed. Tables returned by :func:`petl.transform.sorts.sort` with the
+    same key are not sorted again.
+
     Left and right tables with different key fields can be handled via the
     `lkey` and `rkey` arguments.
 
@@ -277,7 +373,7 @@ Table.rightjoin = rightjoin
 
 def outerjoin(left, right, key=None, lkey=None, rkey=None, missing=None,
               presorted=False, buffersize=None, tempdir=None, cache=True,
-              lprefix=None, rprefix=None):
+              lprefix=None, rprefix=None, strategy=None):
     """
     Perform a full outer join on the given tables. E.g.::
 
@@ -310,13 +406,36 @@ def outerjoin(left, right, key=None, lkey=None, rkey=None, missing=None,
     `buffersize`, `tempdir` and `cache` arguments under the
     :func:`petl.transform.sorts.sort` function.
 
+    If `presorted` is 'verify', the data are also assumed to be sorted, but
+    this is checked as rows are merged (and for any remaining rows once
+    merging is finished), raising :class:`petl.errors.NotSortedError` if
+    not. If `presorted` is 'fallback', each table is checked via
+    :func:`petl.transform.sorts.issorted` before merging, and only sorted if
+    needed. Tables returned by :func:`petl.transform.sorts.sort` with the
+    same key are not sorted again.
+
     Left and right tables with different key fields can be handled via the
     `lkey` and `rkey` arguments.
 
+    If `strategy` is 'auto', the way the join is executed is chosen when the
+    table is first iterated, by reading a sample of rows from each table,
+    checking whether the tables are already sorted by the key, and estimating
+    the number of rows and distinct keys in each table. The tables are then
+    merged directly if both are sorted, or otherwise sorted and merged. If
+    only the sample of a table is known to be sorted, the rest of it is
+    checked as rows are merged, as when `presorted` is 'verify'. The chosen
+    plan is available via the `plan` attribute of the returned table.
+
     """
 
     # TODO don't read data twice (occurs if using natural key)
     lkey, rkey = keys_from_args(left, right, key, lkey, rkey)
+    _checkstrategy(strategy)
+    if strategy == 'auto':
+        return AutoJoinView(left, right, lkey=lkey, rkey=rkey, kind='outer',
+                            presorted=presorted, missing=missing,
+                            buffersize=buffersize, tempdir=tempdir,
+                            cache=cache, lprefix=lprefix, rprefix=rprefix)
     return JoinView(left, right, lkey=lkey, rkey=rkey,
                     presorted=presorted, leftouter=True, rightouter=True,
                     missing=missing, buffersize=buffersize, tempdir=tempdir,
@@ -326,6 +445,208 @@ def outerjoin(left, right, key=None, lkey=None, rkey=None, missing=None,
 Table.outerjoin = outerjoin
 
 
+# number of rows read from each table when planning a join
+_joinplan_samplesize = 1000
+
+
+def _checkstrategy(strategy):
+    if strategy not in (None, 'auto'):
+        raise ArgumentError("strategy must be None or 'auto', found %r"
+                            % (strategy,))
+
+
+class AutoJoinView(Table):
+    """Join view choosing how to execute the join when first iterated, see
+    the `strategy` argument of :func:`petl.transform.joins.join`. The chosen
+    plan is available via the `plan` attribute."""
+
+    def __init__(self, left, right, lkey, rkey, kind, presorted=False,
+                 missing=None, buffersize=None, tempdir=None, cache=True,
+                 lprefix=None, rprefix=None):
+        self.left = left
+        self.right = right
+        self.lkey = lkey
+        self.rkey = rkey
+        self.kind = kind
+        self.presorted = presorted
+        self.missing = missing
+        self.buffersize = buffersize
+        self.tempdir = tempdir
+        self.cache = cache
+        self.lprefix = lprefix
+        self.rprefix = rprefix
+        self._plan = None
+        self._view = None
+
+    @property
+    def plan(self):
+        """A dict holding the chosen `strategy` ('presorted', 'sort' or
+        'hash') along with the estimates it was chosen from."""
+
+        if self._plan is None:
+            self._plan = _joinplan(self.left, self.right, self.lkey,
+                                   self.rkey, hashable=self.kind != 'outer',
+                                   presorted=self.presorted,
+                                   buffersize=self.buffersize)
+        return self._plan
+
+    def __iter__(self):
+        if self._view is None:
+            self._view = self._planview()
+        return iter(self._view)
+
+    def _planview(self):
+        plan = self.plan
+        strategy = plan['strategy']
+        debug('executing %s join with plan %r' % (self.kind, plan))
+        kwargs = dict(lkey=self.lkey, rkey=self.rkey)
+        if self.kind != 'anti':
+            kwargs.update(lprefix=self.lprefix, rprefix=self.rprefix)
+
+        if strategy == 'hash':
+            from petl.transform.hashjoins import hashjoin, hashleftjoin, \
+                hashantijoin
+            if plan['spill']:
+                kwargs['buffersize'] = plan['limit']
+                kwargs['tempdir'] = self.tempdir
+            if self.kind == 'inner':
+                return hashjoin(self.left, self.right, cache=self.cache,
+                                **kwargs)
+            elif self.kind == 'left':
+                return hashleftjoin(self.left, self.right,
+                                    missing=self.missing, cache=self.cache,
+                                    **kwargs)
+            else:
+                return hashantijoin(self.left, self.right, **kwargs)
+
+        left, right = self.left, self.right
+        if strategy == 'presorted':
+            # N.B., tables only seen to be sorted in a sample are checked as
+            # rows are merged
+            if plan['lverify']:
+                left = VerifySortedView(left, self.lkey)
+            if plan['rverify']:
+                right = VerifySortedView(right, self.rkey)
+            presorted = True
+        else:
+            presorted = False
+        kwargs.update(presorted=presorted, buffersize=self.buffersize,
+                      tempdir=self.tempdir, cache=self.cache)
+        if self.kind == 'anti':
+            return AntiJoinView(left, right, **kwargs)
+        return JoinView(left, right,
+                        leftouter=self.kind in ('left', 'outer'),
+                        rightouter=self.kind == 'outer',
+                        missing=self.missing, **kwargs)
+
+
+def _joinplan(left, right, lkey, rkey, hashable=True, presorted=False,
+              buffersize=None):
+    # estimate the cost of each way of executing the join, in rows handled
+    lstats = _samplestats(left, lkey, presorted)
+    rstats = _samplestats(right, rkey, presorted)
+    limit = _bufferrows(buffersize, rstats['sample'])
+    lrows, rrows = lstats['rows'], rstats['rows']
+    costs = dict()
+
+    if lstats['sorted'] and rstats['sorted']:
+        costs['presorted'] = lrows + rrows
+
+    # N.B., sorting already sorted rows takes linear time
+    costs['sort'] = (_sortcost(lrows, lstats['sorted'], limit)
+                     + _sortcost(rrows, rstats['sorted'], limit)
+                     + lrows + rrows)
+
+    spill = limit is not None and (not rstats['exact'] or rrows > limit)
+    if hashable and lstats['keys'] is not None \
+            and rstats['keys'] is not None:
+        # build side is more expensive to handle than probe side
+        costs['hash'] = lrows + 2 * rrows
+        if spill:
+            # both sides may be written out and read back
+            costs['hash'] += 2 * (lrows + rrows)
+
+    # prefer presorted, then hash, then sort where costs are equal
+    order = ['presorted', 'hash', 'sort']
+    strategy = min(costs, key=lambda s: (costs[s], order.index(s)))
+
+    # estimate number of output rows for an inner join from the number of
+    # distinct keys
+    lkeys, rkeys = lstats['keys'], rstats['keys']
+    if lkeys and rkeys:
+        outrows = int(lrows * rrows / max(lkeys, rkeys))
+    else:
+        outrows = 0
+
+    return dict(strategy=strategy, costs=costs, limit=limit, spill=spill,
+                lsorted=lstats['sorted'], rsorted=rstats['sorted'],
+                lverify=lstats['sorted'] and not lstats['checked'],
+                rverify=rstats['sorted'] and not rstats['checked'],
+                lrows=lrows, rrows=rrows, lkeys=lkeys, rkeys=rkeys,
+                outrows=outrows)
+
+
+def _samplestats(table, key, presorted):
+    # read a sample of rows, checking whether they are sorted by key and
+    # counting distinct keys
+    it = iter(table)
+    hdr = next(it)
+    getkey = operator.itemgetter(*asindices(hdr, key))
+    sample = list(itertools.islice(it, _joinplan_samplesize + 1))
+    complete = len(sample) <= _joinplan_samplesize
+    if not complete:
+        sample = sample[:-1]
+    keys = [getkey(row) for row in sample]
+    try:
+        nkeys = len(set(keys))
+    except TypeError:
+        # unhashable key values, can't join via a hash lookup
+        nkeys = None
+    if complete:
+        nrows = len(sample)
+        exact = True
+    else:
+        nrows = _nrows(table)
+        exact = nrows is not None
+        if not exact:
+            # unknown, but assume there are many more rows to come
+            nrows = len(sample) * 10
+        if nkeys is not None:
+            nkeys = int(nkeys * nrows / len(sample))
+
+    if presorted is True or _sortedview(table, key):
+        issorted_ = checked = True
+    else:
+        keys = [Comparable(k) for k in keys]
+        issorted_ = all(a <= b for a, b in izip(keys, keys[1:]))
+        # N.B., if the sample is sorted, the rest of the table is assumed to
+        # be sorted too, and checked later as rows are merged
+        checked = complete
+
+    return dict(sample=sample, rows=nrows, exact=exact, keys=nkeys,
+                sorted=issorted_, checked=checked)
+
+
+def _nrows(table):
+    # number of data rows, if it can be found without reading the table
+    if isinstance(table, (list, tuple)):
+        return max(len(table) - 1, 0)
+    elif isinstance(table, ColumnarTable):
+        return len(table.cols[0]) if table.cols else 0
+    return None
+
+
+def _sortcost(nrows, sorted_, limit):
+    if sorted_:
+        cost = nrows
+    else:
+        cost = int(nrows * max(1, math.log(max(nrows, 1), 2)))
+    if limit is not None and nrows > limit:
+        # chunks are written out and merged
+        cost += 2 * nrows
+    return cost
+
+
 def iterjoin(left, right, lkey, rkey, leftouter=False, rightouter=False,
              missing=None, lprefix=None, rprefix=None):
     lit = iter(left)
@@ -359,33 +680,27 @@ def iterjoin(left, right, lkey, rkey, leftouter=False, rightouter=False,
         outhdr.extend([(text_type(rprefix) + text_type(f)) for f in rgetv(rhdr)])
     yield tuple(outhdr)
 
+    # construct functions to build output rows where there is no match
+    rpad = (missing,) * len(rvind)
+    rbuild = _rightrowbuilder(lhdr, lkind, rkind, rvind, missing)
+
     # define a function to join two groups of rows
     def joinrows(_lrowgrp, _rrowgrp):
         if _rrowgrp is None:
             for lrow in _lrowgrp:
-                outrow = list(lrow)  # start with the left row
-                # extend with missing values in place of the right row
-                outrow.extend([missing] * len(rvind))
-                yield tuple(outrow)
+                # left row with missing values in place of the right row
+                yield tuple(lrow) + rpad
         elif _lrowgrp is None:
             for rrow in _rrowgrp:
-                # start with missing values in place of the left row
-                outrow = [missing] * len(lhdr)
-                # set key values
-                for li, ri in zip(lkind, rkind):
-                    outrow[li] = rrow[ri]
-                # extend with non-key values from the right row
-                outrow.extend(rgetv(rrow))
-                yield tuple(outrow)
+                yield rbuild(rrow)
         else:
-            _rrowgrp = list(_rrowgrp)  # may need to iterate more than once
+            # get non-key values from each right row once, as they may be
+            # joined with several left rows
+            rvals = [rgetv(rrow) for rrow in _rrowgrp]
             for lrow in _lrowgrp:
-                for rrow in _rrowgrp:
-                    # start with the left row
-                    outrow = list(lrow)
-                    # extend with non-key values from the right row
-                    outrow.extend(rgetv(rrow))
-                    yield tuple(outrow)
+                lrow = tuple(lrow)
+                for rv in rvals:
+                    yield lrow + rv
 
     # construct group iterators for both tables
     lgit = itertools.groupby(lit, key=lgetk)
@@ -406,18 +721,18 @@ def iterjoin(left, right, lkey, rkey, leftouter=False, rightouter=False,
             if lkval < rkval:
                 if leftouter:
                     for row in joinrows(lrowgrp, None):
-                        yield tuple(row)
+                        yield row
                 # advance left
                 lkval, lrowgrp = next(lgit)
             elif lkval > rkval:
                 if rightouter:
                     for row in joinrows(None, rrowgrp):
-                        yield tuple(row)
+                        yield row
                 # advance right
                 rkval, rrowgrp = next(rgit)
             else:
                 for row in joinrows(lrowgrp, rrowgrp):
-                    yield tuple(row)
+                    yield row
                 # advance both
                 lkval, lrowgrp = next(lgit)
                 rkval, rrowgrp = next(rgit)
@@ -430,22 +745,215 @@ def iterjoin(left, right, lkey, rkey, leftouter=False, rightouter=False,
         if lkval > rkval:
             # yield anything that got left hanging
             for row in joinrows(lrowgrp, None):
-                yield tuple(row)
+                yield row
         # yield the rest
         for lkval, lrowgrp in lgit:
             for row in joinrows(lrowgrp, None):
-                yield tuple(row)
+                yield row
 
     # make sure any right rows remaining are yielded
     if rightouter:
         if lkval < rkval:
             # yield anything that got left hanging
             for row in joinrows(None, rrowgrp):
-                yield tuple(row)
+                yield row
         # yield the rest
         for rkval, rrowgrp in rgit:
             for row in joinrows(None, rrowgrp):
-                yield tuple(row)
+                yield row
+
+
+def _columnarjoinview(view, left, right, lkey, rkey, **kwargs):
+    # if both tables are columnar, wrap a join view so the tables are joined
+    # via numpy when iterated where possible
+    if isinstance(left, ColumnarTable) and isinstance(right, ColumnarTable):
+        return ColumnarJoinView(left, right, lkey, rkey, view, **kwargs)
+    return view
+
+
+class ColumnarJoinView(Table):
+    """Join view joining two columnar tables via numpy when iterated (see
+    :func:`petl.transform.joins.join`), or iterating another join view where
+    that isn't possible."""
+
+    def __init__(self, left, right, lkey, rkey, view, leftouter=False,
+                 missing=None, lprefix=None, rprefix=None, sortkeys=True):
+        self.left = left
+        self.right = right
+        self.lkey = lkey
+        self.rkey = rkey
+        self.view = view
+        self.leftouter = leftouter
+        self.missing = missing
+        self.lprefix = lprefix
+        self.rprefix = rprefix
+        self.sortkeys = sortkeys
+
+    def __iter__(self):
+        return itercolumnarjoin(self.left, self.right, self.lkey, self.rkey,
+                                self.view, self.leftouter, self.missing,
+                                self.lprefix, self.rprefix, self.sortkeys)
+
+
+def itercolumnarjoin(left, right, lkey, rkey, view, leftouter, missing,
+                     lprefix, rprefix, sortkeys):
+    joined = _columnarjoin(left, right, lkey, rkey, leftouter=leftouter,
+                           missing=missing, lprefix=lprefix, rprefix=rprefix,
+                           sortkeys=sortkeys)
+    if joined is None:
+        joined = view
+    for row in joined:
+        yield row
+
+
+def _columnarjoin(left, right, lkey, rkey, leftouter=False, missing=None,
+                  lprefix=None, rprefix=None, sortkeys=True):
+    # join tables holding key values in numpy or typed arrays via numpy,
+    # returning None where this isn't possible so rows are joined as usual
+    if not (isinstance(left, ColumnarTable)
+            and isinstance(right, ColumnarTable)):
+        return None
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+
+    lhdr, rhdr = left.hdr, right.hdr
+    lkind = asindices(lhdr, lkey)
+    rkind = asindices(rhdr, rkey)
+    if not lkind or len(lkind) != len(rkind):
+        return None
+    lk, rk = _joinkeyarrays(np, [left.cols[i] for i in lkind],
+                            [right.cols[i] for i in rkind])
+    if lk is None:
+        return None
+    debug('joining %s left rows and %s right rows via numpy'
+          % (len(lk), len(rk)))
+
+    # find the range of matching rows in the sorted right keys for each
+    # left key
+    rorder = np.argsort(rk, kind='mergesort')
+    rsorted = rk[rorder]
+    lo = np.searchsorted(rsorted, lk, side='left')
+    hi = np.searchsorted(rsorted, lk, side='right')
+    if sortkeys:
+        # output in key order, as when merging sorted tables
+        lorder = np.argsort(lk, kind='mergesort')
+        lo, hi = lo[lorder], hi[lorder]
+    else:
+        lorder = np.arange(len(lk))
+    counts = hi - lo
+    nout = np.maximum(counts, 1) if leftouter else counts
+
+    # expand the ranges into indices of left and right rows for each output
+    # row, with -1 where a left row has no match
+    lidx = np.repeat(lorder, nout)
+    starts = np.cumsum(nout) - nout
+    pos = np.arange(len(lidx)) - np.repeat(starts - lo, nout)
+    matched = np.repeat(counts > 0, nout)
+    ridx = np.full(len(lidx), -1, dtype=np.intp)
+    ridx[matched] = rorder[pos[matched]]
+    unmatched = not matched.all()
+
+    rvind = [i for i in range(len(rhdr)) if i not in rkind]
+    cols = [_gatherbuffer(np, c, lidx) for c in left.cols]
+    cols.extend(_gatherbuffer(np, right.cols[i], ridx, missing, unmatched)
+                for i in rvind)
+
+    if lprefix is None:
+        outhdr = list(lhdr)
+    else:
+        outhdr = [(text_type(lprefix) + text_type(f)) for f in lhdr]
+    rvhdr = [rhdr[i] for i in rvind]
+    if rprefix is None:
+        outhdr.extend(rvhdr)
+    else:
+        outhdr.extend([(text_type(rprefix) + text_type(f)) for f in rvhdr])
+    return ColumnarTable(cols, header=outhdr)
+
+
+def _keyarray(np, buf):
+    # numpy array of primitive key values, or None
+    if isinstance(buf, array):
+        if buf.typecode in ('c', 'u'):
+            return None
+    elif getattr(buf, 'dtype', None) is None:
+        return None
+    a = np.asarray(buf)
+    if a.dtype.kind not in ('b', 'i', 'u', 'f', 'U', 'S'):
+        return None
+    if a.dtype.kind == 'f' and np.isnan(a).any():
+        # N.B., NaN doesn't equal itself, so leave to the row by row join
+        return None
+    return a
+
+
+def _joinkeyarrays(np, lbufs, rbufs):
+    pairs = list()
+    for lbuf, rbuf in izip(lbufs, rbufs):
+        lk = _keyarray(np, lbuf)
+        rk = _keyarray(np, rbuf)
+        # N.B., avoid keys of different kinds, e.g., ints and floats, where
+        # values would be converted and may no longer compare as in Python
+        if (lk is None or rk is None or lk.dtype.kind != rk.dtype.kind
+                or np.result_type(lk, rk).kind != lk.dtype.kind):
+            return None, None
+        pairs.append((lk, rk))
+    if len(pairs) == 1:
+        return pairs[0]
+
+    # factorize compound keys into integer codes ordered as the key values
+    n = len(pairs[0][0])
+    codes = None
+    ncodes = 1
+    for lk, rk in pairs:
+        uniq, inv = np.unique(np.concatenate([lk, rk]), return_inverse=True)
+        inv = inv.reshape(-1).astype(np.int64)
+        if codes is None:
+            codes = inv
+        else:
+            if ncodes * len(uniq) >= 2 ** 62:
+                # renumber the codes so far to avoid overflow
+                seen, codes = np.unique(codes, return_inverse=True)
+                codes = codes.reshape(-1).astype(np.int64)
+                ncodes = len(seen)
+            codes = codes * len(uniq) + inv
+        ncodes *= max(len(uniq), 1)
+    return codes[:n], codes[n:]
+
+
+def _gatherbuffer(np, buf, idx, missing=None, unmatched=False):
+    # take values from the buffer at the given indices, with missing values
+    # where an index is -1
+    if isinstance(buf, array) and buf.typecode not in ('c', 'u'):
+        if not unmatched:
+            return array(buf.typecode, np.asarray(buf)[idx].tobytes())
+    elif getattr(buf, 'dtype', None) is not None:
+        # N.B., values from numpy arrays are converted to python objects, so
+        # rows hold values of the same types whether or not they are matched
+        a = np.asarray(buf)
+        if not unmatched:
+            return _tobuffer(a[idx].tolist())
+        if not len(a):
+            return [missing] * len(idx)
+        return [v if i >= 0 else missing
+                for v, i in izip(a[idx].tolist(), idx.tolist())]
+    if unmatched:
+        return [buf[i] if i >= 0 else missing for i in idx.tolist()]
+    return [buf[i] for i in idx.tolist()]
+
+
+def _rightrowbuilder(lhdr, lkind, rkind, rvind, missing):
+    # construct a function building an output row from a right row without a
+    # matching left row, i.e., with missing values in place of the left row
+    # except for the key values, followed by non-key values from the right
+    # row, by getting all values at once from the right row with a missing
+    # value appended
+    lpos = dict(zip(lkind, rkind))
+    getrow = rowgetter(*([lpos.get(i, -1) for i in range(len(lhdr))]
+                         + list(rvind)))
+    pad = (missing,)
+    return lambda rrow: getrow(tuple(rrow) + pad)
 
 
 def crossjoin(*tables, **kwargs):
@@ -506,16 +1014,19 @@ def itercrossjoin(sources, prefix):
             outhdr.extend(header(s))
     yield tuple(outhdr)
 
-    datasrcs = [data(src) for src in sources]
-    for prod in itertools.product(*datasrcs):
-        outrow = list()
-        for row in prod:
-            outrow.extend(row)
-        yield tuple(outrow)
+    # N.B., itertools.product reads all rows up front in any case
+    datasrcs = [[tuple(row) for row in data(src)] for src in sources]
+    if len(datasrcs) == 2:
+        for lrow, rrow in itertools.product(*datasrcs):
+            yield lrow + rrow
+    else:
+        for prod in itertools.product(*datasrcs):
+            yield sum(prod, ())
 
 
 def antijoin(left, right, key=None, lkey=None, rkey=None, presorted=False,
-             buffersize=None, tempdir=None, cache=True):
+             buffersize=None, tempdir=None, cache=True,
+             strategy=None):
     """
     Return rows from the `left` table where the key value does not occur in
     the `right` table. E.g.::
@@ -550,12 +1061,37 @@ def antijoin(left, right, key=None, lkey=None, rkey=None, presorted=False,
     `buffersize`, `tempdir` and `cache` arguments under the
     :func:`petl.transform.sorts.sort` function.
 
+    If `presorted` is 'verify', the data are also assumed to be sorted, but
+    this is checked as rows are merged (and for any remaining rows once
+    merging is finished), raising :class:`petl.errors.NotSortedError` if
+    not. If `presorted` is 'fallback', each table is checked via
+    :func:`petl.transform.sorts.issorted` before merging, and only sorted if
+    needed. Tables returned by :func:`petl.transform.sorts.sort` with the
+    same key are not sorted again.
+
     Left and right tables with different key fields can be handled via the
     `lkey` and `rkey` arguments.
 
+    If `strategy` is 'auto', the way the join is executed is chosen when the
+    table is first iterated, by reading a sample of rows from each table,
+    checking whether the tables are already sorted by the key, and estimating
+    the number of rows and distinct keys in each table. The tables are then
+    merged directly if both are sorted, joined via a hash lookup (see
+    :func:`petl.transform.hashjoins.hashantijoin`) if that is estimated to be
+    cheaper, or otherwise sorted and merged. If only the sample of a table is
+    known to be sorted, the rest of it is checked as rows are merged, as when
+    `presorted` is 'verify'. N.B., the order of rows in the output then
+    depends on the chosen plan, which is available via the `plan` attribute
+    of the returned table.
+
     """
 
     lkey, rkey = keys_from_args(left, right, key, lkey, rkey)
+    _checkstrategy(strategy)
+    if strategy == 'auto':
+        return AutoJoinView(left, right, lkey=lkey, rkey=rkey, kind='anti',
+                            presorted=presorted, buffersize=buffersize,
+                            tempdir=tempdir, cache=cache)
     return AntiJoinView(left=left, right=right, lkey=lkey, rkey=rkey,
                         presorted=presorted, buffersize=buffersize,
                         tempdir=tempdir, cache=cache)
@@ -568,19 +1104,17 @@ class AntiJoinView(Table):
 
     def __init__(self, left, right, lkey, rkey, presorted=False,
                  buffersize=None, tempdir=None, cache=True):
-        if presorted:
-            self.left = left
-            self.right = right
-        else:
-            self.left = sort(left, lkey, buffersize=buffersize,
+        self.left = _presort(left, lkey, presorted, buffersize=buffersize,
                              tempdir=tempdir, cache=cache)
-            self.right = sort(right, rkey, buffersize=buffersize,
+        self.right = _presort(right, rkey, presorted, buffersize=buffersize,
                               tempdir=tempdir, cache=cache)
         self.lkey = lkey
         self.rkey = rkey
 
     def __iter__(self):
-        return iterantijoin(self.left, self.right, self.lkey, self.rkey)
+        (left, right), verifying = _verifying(self.left, self.right)
+        rows = iterantijoin(left, right, self.lkey, self.rkey)
+        return _iterverifyrest(rows, verifying)
 
 
 def iterantijoin(left, right, lkey, rkey):
@@ -671,6 +1205,11 @@ def lookupjoin(left, right, key=None, lkey=None, rkey=None, missing=None,
         |  3 | 'purple' |    4 | 'ellipse' | 'small' |
         +----+----------+------+-----------+---------+
 
+    If `right` is a :class:`petl.util.keyindex.KeyIndex` built on the right
+    key, each key of the left table is looked up in the index rather than
+    sorting and merging the tables, so rows are output in the order of the
+    left table.
+
     See also :func:`petl.transform.joins.leftjoin`.
 
     """
@@ -690,14 +1229,18 @@ class LookupJoinView(Table):
     def __init__(self, left, right, lkey, rkey, presorted=False, missing=None,
                  buffersize=None, tempdir=None, cache=True,
                  lprefix=None, rprefix=None):
-        if presorted:
+        self.indexed = isinstance(right, KeyIndex) and right.haskey(rkey)
+        if self.indexed:
+            # look up keys of left rows in the index as they come rather than
+            # merging, so neither table is sorted
             self.left = left
             self.right = right
         else:
-            self.left = sort(left, lkey, buffersize=buffersize,
-                             tempdir=tempdir, cache=cache)
-            self.right = sort(right, rkey, buffersize=buffersize,
-                              tempdir=tempdir, cache=cache)
+            self.left = _presort(left, lkey, presorted, buffersize=buffersize,
+                                 tempdir=tempdir, cache=cache)
+            self.right = _presort(right, rkey, presorted,
+                                  buffersize=buffersize, tempdir=tempdir,
+                                  cache=cache)
         self.lkey = lkey
         self.rkey = rkey
         self.missing = missing
@@ -705,9 +1248,17 @@ class LookupJoinView(Table):
         self.rprefix = rprefix
 
     def __iter__(self):
-        return iterlookupjoin(self.left, self.right, self.lkey, self.rkey,
-                              missing=self.missing, lprefix=self.lprefix,
-                              rprefix=self.rprefix)
+        (left, right), verifying = _verifying(self.left, self.right)
+        if self.indexed:
+            rows = iterindexlookupjoin(left, right, self.lkey,
+                                       missing=self.missing,
+                                       lprefix=self.lprefix,
+                                       rprefix=self.rprefix)
+        else:
+            rows = iterlookupjoin(left, right, self.lkey, self.rkey,
+                                  missing=self.missing, lprefix=self.lprefix,
+                                  rprefix=self.rprefix)
+        return _iterverifyrest(rows, verifying)
 
 
 def iterlookupjoin(left, right, lkey, rkey, missing=None, lprefix=None,
@@ -743,22 +1294,16 @@ def iterlookupjoin(left, right, lkey, rkey, missing=None, lprefix=None,
         outhdr.extend([(text_type(rprefix) + text_type(f)) for f in rgetv(rhdr)])
     yield tuple(outhdr)
 
+    rpad = (missing,) * len(rvind)
+
     # define a function to join two groups of rows
     def joinrows(_lrowgrp, _rrowgrp):
         if _rrowgrp is None:
-            for lrow in _lrowgrp:
-                outrow = list(lrow)  # start with the left row
-                # extend with missing values in place of the right row
-                outrow.extend([missing] * len(rvind))
-                yield tuple(outrow)
+            rv = rpad  # missing values in place of the right row
         else:
-            rrow = next(iter(_rrowgrp))  # pick first arbitrarily
-            for lrow in _lrowgrp:
-                # start with the left row
-                outrow = list(lrow)
-                # extend with non-key values from the right row
-                outrow.extend(rgetv(rrow))
-                yield tuple(outrow)
+            rv = rgetv(next(iter(_rrowgrp)))  # pick first arbitrarily
+        for lrow in _lrowgrp:
+            yield tuple(lrow) + rv
 
     # construct group iterators for both tables
     lgit = itertools.groupby(lit, key=lgetk)
@@ -776,7 +1321,7 @@ def iterlookupjoin(left, right, lkey, rkey, missing=None, lprefix=None,
         while True:
             if lkval < rkval:
                 for row in joinrows(lrowgrp, None):
-                    yield tuple(row)
+                    yield row
                 # advance left
                 lkval, lrowgrp = next(lgit)
             elif lkval > rkval:
@@ -784,7 +1329,7 @@ def iterlookupjoin(left, right, lkey, rkey, missing=None, lprefix=None,
                 rkval, rrowgrp = next(rgit)
             else:
                 for row in joinrows(lrowgrp, rrowgrp):
-                    yield tuple(row)
+                    yield row
                 # advance both
                 lkval, lrowgrp = next(lgit)
                 rkval, rrowgrp = next(rgit)
@@ -796,11 +1341,47 @@ def iterlookupjoin(left, right, lkey, rkey, missing=None, lprefix=None,
     if lkval > rkval:
         # yield anything that got left hanging
         for row in joinrows(lrowgrp, None):
-            yield tuple(row)
+            yield row
     # yield the rest
     for lkval, lrowgrp in lgit:
         for row in joinrows(lrowgrp, None):
-            yield tuple(row)
+            yield row
+
+
+def iterindexlookupjoin(left, index, lkey, missing=None, lprefix=None,
+                        rprefix=None):
+    lit = iter(left)
+    lhdr = next(lit)
+    rhdr = index.hdr
+
+    # construct function to extract key values from left table
+    lgetk = operator.itemgetter(*asindices(lhdr, lkey))
+
+    # determine indices of non-key fields in the index
+    rvind = [i for i in range(len(rhdr)) if i not in index.keyindices]
+    rgetv = rowgetter(*rvind)
+
+    # determine the output fields
+    if lprefix is None:
+        outhdr = list(lhdr)
+    else:
+        outhdr = [(text_type(lprefix) + text_type(f)) for f in lhdr]
+    if rprefix is None:
+        outhdr.extend(rgetv(rhdr))
+    else:
+        outhdr.extend([(text_type(rprefix) + text_type(f))
+                       for f in rgetv(rhdr)])
+    yield tuple(outhdr)
+
+    # look up each run of left rows with the same key once
+    nomatch = tuple([missing] * len(rvind))
+    for k, lrowgrp in itertools.groupby(lit, key=lgetk):
+        rvals = nomatch
+        for rrow in index._iterrows(k):
+            rvals = rgetv(rrow)  # pick first arbitrarily
+            break
+        for lrow in lrowgrp:
+            yield tuple(lrow) + rvals
 
 
 def unjoin(table, value, key=None, autoincrement=(1, 1), presorted=False,
@@ -10,6 +10,8 @@ import petl.config as config
 from petl.errors import ArgumentError
 from petl.util.base import Table, expr, rowgroupby, Record
 from petl.transform.sorts import sort
+from petl.transform.fusion import _registerstage, _isfusable, iterfused, \
+    _callstage
 
 
 def fieldmap(table, mappings=None, failonerror=None, errorvalue=None):
@@ -208,6 +210,8 @@ class RowMapView(Table):
                                 else failonerror)
 
     def __iter__(self):
+        if _isfusable(self):
+            return iterfused(self)
         return iterrowmap(self.source, self.rowmapper, self.header,
                           self.failonerror)
 
@@ -229,6 +233,32 @@ def iterrowmap(source, rowmapper, header, failonerror):
                 raise e
 
 
+def _rowmapstage(view):
+    # N.B., as for iterrowmap, rows are dropped on error unless failonerror
+    rowmapper, header, failonerror = (view.rowmapper, view.header,
+                                      view.failonerror)
+
+    def stage(hdr, namespace, istuple):
+        flds = list(map(text_type, hdr))
+
+        def maprow(row):
+            try:
+                return tuple(rowmapper(Record(row, flds)))
+            except Exception as e:
+                if failonerror == 'inline':
+                    return tuple([e])
+                elif failonerror:
+                    raise e
+
+        lines = _callstage(namespace, maprow, maydrop=not failonerror)
+        return tuple(header), lines, True
+
+    return view.source, stage
+
+
+_registerstage(RowMapView, _rowmapstage)
+
+
 def rowmapmany(table, rowgenerator, header, failonerror=None):
     """
     Map each input row to any number of output rows via an arbitrary
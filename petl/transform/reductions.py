@@ -3,15 +3,23 @@ from __future__ import absolute_import, print_function, division
 
 import itertools
 import operator
+import logging
 from collections import OrderedDict
 from petl.compat import next, string_types, reduce, text_type
 
 
 from petl.errors import ArgumentError
-from petl.util.base import Table, iterpeek, rowgroupby
-from petl.transform.sorts import sort, mergesort
+from petl.util.base import Table, iterpeek, rowgroupby, Record, asindices, \
+    rowgetter
+from petl.transform.sorts import sort, mergesort, _PartitionWriter, \
+    _bufferrows
 from petl.transform.basics import cut
 from petl.transform.dedup import distinct
+from petl.util.statistics import onlinestats
+
+
+logger = logging.getLogger(__name__)
+debug = logger.debug
 
 
 def rowreduce(table, key, reducer, header=None, presorted=False,
@@ -171,6 +179,29 @@ def aggregate(table, key, aggregation=None, value=None, presorted=False,
         | 'c' |     1 |      4 |      4 |      4 | [4]       | [(4, True)]                         | '4'       |
         +-----+-------+--------+--------+--------+-----------+-------------------------------------+-----------+
 
+    Where all aggregation functions are accumulators (see
+    :class:`petl.transform.reductions.Accumulator`), each group is aggregated
+    in a single pass without holding its rows in memory, and if the table
+    needs sorting, only partial states for each buffer of rows are sorted.
+    Aggregating whole rows with :func:`len` counts rows in the same way.
+    E.g.::
+
+        >>> aggregation = OrderedDict()
+        >>> aggregation['count'] = etl.Count()
+        >>> aggregation['meanbar'] = 'bar', etl.Mean()
+        >>> aggregation['lastbaz'] = 'baz', etl.Last()
+        >>> table6 = etl.aggregate(table1, 'foo', aggregation)
+        >>> table6
+        +-----+-------+-------------------+---------+
+        | foo | count | meanbar           | lastbaz |
+        +=====+=======+===================+=========+
+        | 'a' |     2 |               5.0 | False   |
+        +-----+-------+-------------------+---------+
+        | 'b' |     3 | 4.333333333333333 | False   |
+        +-----+-------+-------------------+---------+
+        | 'c' |     1 |               4.0 | True    |
+        +-----+-------+-------------------+---------+
+
     If `presorted` is True, it is assumed that the data are already sorted by
     the given key, and the `buffersize`, `tempdir` and `cache` arguments are 
     ignored. Otherwise, the data are sorted, see also the discussion of the 
@@ -203,14 +234,38 @@ class SimpleAggregateView(Table):
                  presorted=False, buffersize=None, tempdir=None, cache=True):
         if presorted:
             self.table = table
+            self.unsorted = None
         else:
-            self.table = sort(table, key, buffersize=buffersize, 
-                              tempdir=tempdir, cache=cache)    
+            # N.B., sorted when first iterated, unless partial aggregates
+            # are combined
+            self.table = None
+            self.unsorted = table
         self.key = key
         self.aggregation = aggregation
         self.value = value
+        self.buffersize = buffersize
+        self.tempdir = tempdir
+        self.cache = cache
+        self._partials = None
         
     def __iter__(self):
+        if self.unsorted is not None and _combinable([self.aggregation]):
+            # N.B., same output as for a single named aggregation
+            if self.value is None:
+                aggregation = {'value': (self.aggregation,)}
+            else:
+                aggregation = {'value': (self.value, self.aggregation)}
+            if self._partials is None:
+                self._partials = _sortedpartials(
+                    self.unsorted, self.key, _combineaccumulators(aggregation),
+                    self.buffersize, self.tempdir, self.cache
+                )
+            return itercombineaggregate(self._partials, self.key,
+                                        aggregation)
+        if self.table is None:
+            self.table = sort(self.unsorted, self.key,
+                              buffersize=self.buffersize,
+                              tempdir=self.tempdir, cache=self.cache)
         return itersimpleaggregate(self.table, self.key, self.aggregation, 
                                    self.value)
 
@@ -245,10 +300,17 @@ class MultiAggregateView(Table):
                  buffersize=None, tempdir=None, cache=True):
         if presorted:
             self.source = source
+            self.unsorted = None
         else:
-            self.source = sort(source, key, buffersize=buffersize, 
-                               tempdir=tempdir, cache=cache)
+            # N.B., sorted when first iterated, unless partial aggregates
+            # are combined
+            self.source = None
+            self.unsorted = source
         self.key = key
+        self.buffersize = buffersize
+        self.tempdir = tempdir
+        self.cache = cache
+        self._partials = None
         if aggregation is None:
             self.aggregation = OrderedDict()
         elif isinstance(aggregation, (list, tuple)):
@@ -264,10 +326,27 @@ class MultiAggregateView(Table):
             )
 
     def __iter__(self):
+        if self.unsorted is not None and _combinable(
+                agg[-1] if isinstance(agg, (list, tuple)) else agg
+                for agg in self.aggregation.values()):
+            if self._partials is None:
+                self._partials = _sortedpartials(
+                    self.unsorted, self.key,
+                    _combineaccumulators(self.aggregation), self.buffersize,
+                    self.tempdir, self.cache
+                )
+            return itercombineaggregate(self._partials, self.key,
+                                        self.aggregation)
+        if self.source is None:
+            self.source = sort(self.unsorted, self.key,
+                               buffersize=self.buffersize,
+                               tempdir=self.tempdir, cache=self.cache)
         return itermultiaggregate(self.source, self.key, self.aggregation)
     
     def __setitem__(self, key, value):
         self.aggregation[key] = value
+        # partial aggregates are for the previous aggregation
+        self._partials = None
 
     
 def itermultiaggregate(source, key, aggregation):
@@ -304,6 +383,19 @@ def itermultiaggregate(source, key, aggregation):
         outhdr.append(outfld)
     yield tuple(outhdr)
     
+    # if all aggregation functions are accumulators, compute all output
+    # values in a single pass over each group
+    accumulators = _accumulators(hdr, aggregation)
+    if accumulators is not None:
+        for k, rows in rowgroupby(it, key):
+            if isinstance(key, (list, tuple)):
+                outrow = list(k)
+            else:
+                outrow = [k]
+            outrow.extend(_accumulate(rows, accumulators))
+            yield tuple(outrow)
+        return
+
     # generate data
     for k, rows in rowgroupby(it, key):
         rows = list(rows)  # may need to iterate over these more than once
@@ -332,6 +424,625 @@ def itermultiaggregate(source, key, aggregation):
         yield tuple(outrow)
             
 
+def hashaggregate(table, key, aggregation=None, value=None, buffersize=None,
+                  tempdir=None):
+    """Alternative implementation of
+    :func:`petl.transform.reductions.aggregate`, where rows are grouped by
+    constructing an in-memory dictionary of groups in a single pass over the
+    table, rather than by sorting the table.
+
+    May be faster and/or more resource efficient where the number of distinct
+    keys is small relative to the number of rows. Groups are output in the
+    order in which their keys are first found, rather than sorted by key.
+
+    The `key`, `aggregation` and `value` arguments are the same as for
+    :func:`petl.transform.reductions.aggregate`. If more than `buffersize`
+    rows need to be held in memory at once (by default
+    `petl.config.sort_buffersize`, which may also be a memory budget such as
+    ``'512MB'``), the rows are instead partitioned by a hash of their key into
+    temporary files in `tempdir`, and each partition is then aggregated in
+    turn. In that case groups are output one partition at a time.
+
+    Where all aggregation functions are accumulators (see
+    :class:`petl.transform.reductions.Accumulator`), only the state of each
+    accumulator is held for each group, and `buffersize` instead limits the
+    number of groups held in memory.
+
+    """
+
+    return HashAggregateView(table, key, aggregation=aggregation, value=value,
+                             buffersize=buffersize, tempdir=tempdir)
+
+
+Table.hashaggregate = hashaggregate
+
+
+class HashAggregateView(Table):
+
+    def __init__(self, source, key, aggregation=None, value=None,
+                 buffersize=None, tempdir=None):
+        self.source = source
+        self.key = key
+        self.value = value
+        self.buffersize = buffersize
+        self.tempdir = tempdir
+        if callable(aggregation):
+            self.aggregation = aggregation
+        elif aggregation is None or isinstance(aggregation, (list, tuple,
+                                                             dict)):
+            self.aggregation = _normaggregation(aggregation)
+        else:
+            raise ArgumentError('expected aggregation is callable, list, '
+                                'tuple, dict or None')
+
+    def __iter__(self):
+        return iterhashaggregate(self.source, self.key, self.aggregation,
+                                 self.value, self.buffersize, self.tempdir)
+
+    def __setitem__(self, key, value):
+        self.aggregation[key] = value
+
+
+def _normaggregation(aggregation):
+    if aggregation is None:
+        return OrderedDict()
+    elif isinstance(aggregation, (list, tuple)):
+        normed = OrderedDict()
+        for t in aggregation:
+            normed[t[0]] = t[1:]
+        return normed
+    return aggregation
+
+
+def iterhashaggregate(source, key, aggregation, value, buffersize, tempdir):
+    it = iter(source)
+    hdr = next(it)
+    flds = list(map(text_type, hdr))
+    sample, it = iterpeek(it, 100)
+    limit = _bufferrows(buffersize, sample)
+
+    # determine key function, and output key values
+    if callable(key):
+        getkey = lambda row: key(Record(row, flds))
+        outkey = lambda k: [k]
+    elif isinstance(key, (list, tuple)):
+        getkey = rowgetter(*asindices(hdr, key))
+        outkey = list
+    else:
+        getkey = operator.itemgetter(*asindices(hdr, key))
+        outkey = lambda k: [k]
+
+    # determine aggregators and output header
+    if callable(aggregation):
+        if value is None:
+            aggregators = [(None, aggregation)]
+        else:
+            aggregators = [(operator.itemgetter(*asindices(hdr, value)),
+                            aggregation)]
+        outflds = ['value']
+    else:
+        aggregators = [_normaggregator(hdr, outfld, agg)
+                       for outfld, agg in aggregation.items()]
+        outflds = list(aggregation)
+    if isinstance(key, (list, tuple)):
+        outhdr = list(key)
+    elif callable(key):
+        outhdr = ['key']
+    else:
+        outhdr = [key]
+    outhdr.extend(outflds)
+    yield tuple(outhdr)
+
+    if all(isinstance(aggfun, Accumulator) for _, aggfun in aggregators):
+        # hold only the state of each accumulator for each group
+        for k, outvals in _hashaccumulate(it, getkey, flds, aggregators,
+                                          limit, tempdir):
+            outrow = outkey(k)
+            outrow.extend(outvals)
+            yield tuple(outrow)
+        return
+
+    for k, rows in _hashgroups(it, getkey, limit, tempdir):
+        outrow = outkey(k)
+        for getval, aggfun in aggregators:
+            if getval is None:
+                # N.B., rowgroupby passes whole rows as records
+                outrow.append(aggfun([Record(row, flds) for row in rows]))
+            else:
+                outrow.append(aggfun([getval(row) for row in rows]))
+        yield tuple(outrow)
+
+
+def _normaggregator(hdr, outfld, agg):
+    # normalise aggregator, as for itermultiaggregate, into a function to get
+    # values from a row (or None to aggregate whole rows) and an aggregation
+    # function
+    if callable(agg):
+        srcfld, aggfun = None, agg
+    elif isinstance(agg, string_types):
+        srcfld, aggfun = agg, list  # list is default
+    elif len(agg) == 1 and isinstance(agg[0], string_types):
+        srcfld, aggfun = agg[0], list  # list is default
+    elif len(agg) == 1 and callable(agg[0]):
+        srcfld, aggfun = None, agg[0]  # aggregate whole rows
+    elif len(agg) == 2:
+        srcfld, aggfun = agg
+    else:
+        raise ArgumentError('invalid aggregation: %r, %r' % (outfld, agg))
+    if srcfld is None:
+        if aggfun is len:
+            # counting rows can be done in a single pass
+            aggfun = Count()
+        return None, aggfun
+    else:
+        return operator.itemgetter(*asindices(hdr, srcfld)), aggfun
+
+
+def _accumulators(hdr, aggregation):
+    # normalise aggregation, returning None unless all aggregation functions
+    # are accumulators
+    accumulators = list()
+    for outfld, agg in aggregation.items():
+        getval, aggfun = _normaggregator(hdr, outfld, agg)
+        if not isinstance(aggfun, Accumulator):
+            return None
+        accumulators.append((getval, aggfun))
+    return accumulators
+
+
+def _accumulate(rows, accumulators):
+    # compute output values over rows in a single pass
+    states = [acc.init() for _, acc in accumulators]
+    steps = list(enumerate(accumulators))
+    for row in rows:
+        for i, (getval, acc) in steps:
+            if getval is None:
+                states[i] = acc.step(states[i], row)
+            else:
+                states[i] = acc.step(states[i], getval(row))
+    return [acc.finalize(state)
+            for (_, acc), state in zip(accumulators, states)]
+
+
+def _combinable(aggfuns):
+    # N.B., only combine if there is at least one accumulator, as counting
+    # alone (or no aggregation at all) gains nothing over sorting
+    aggfuns = list(aggfuns)
+    return (any(isinstance(aggfun, Accumulator) for aggfun in aggfuns) and
+            all(aggfun is len or (isinstance(aggfun, Accumulator)
+                                  and aggfun.combinable)
+                for aggfun in aggfuns))
+
+
+def _combineaccumulators(aggregation):
+    # N.B., aggregation is as for itermultiaggregate, but all aggregation
+    # functions must be combinable accumulators, and source fields are
+    # resolved against the header later
+    accumulators = list()
+    for outfld, agg in aggregation.items():
+        if callable(agg):
+            agg = agg,
+        elif isinstance(agg, string_types) or len(agg) not in (1, 2):
+            raise ArgumentError('invalid aggregation: %r, %r' % (outfld, agg))
+        srcfld, aggfun = agg if len(agg) == 2 else (None, agg[0])
+        if aggfun is len:
+            aggfun = Count()
+        accumulators.append((srcfld, aggfun))
+    return accumulators
+
+
+def _sortedpartials(source, key, accumulators, buffersize, tempdir, cache):
+    # partial states for each group within each buffer of rows, sorted by key
+    # (only the partial states are sorted, and cached if `cache` is True)
+    partials = _PartialAggregateView(source, key, accumulators, buffersize)
+    return sort(partials, 'key', buffersize=buffersize, tempdir=tempdir,
+                cache=cache)
+
+
+def itercombineaggregate(partials, key, aggregation):
+
+    # determine output header
+    if isinstance(key, (list, tuple)):
+        outhdr = list(key)
+    elif callable(key):
+        outhdr = ['key']
+    else:
+        outhdr = [key]
+    outhdr.extend(aggregation)
+    yield tuple(outhdr)
+
+    for k, outvals in _itercombine(partials):
+        if isinstance(key, (list, tuple)):
+            outrow = list(k)
+        else:
+            outrow = [k]
+        outrow.extend(outvals)
+        yield tuple(outrow)
+
+
+def _itercombine(partials):
+    # merge the sorted partial states of each group (see _sortedpartials),
+    # yielding the key and output values for each group in key order
+    accs = [acc for _, acc in partials.source.accumulators]
+    it = iter(partials)
+    next(it)  # discard header
+    for k, rows in itertools.groupby(it, key=operator.itemgetter(0)):
+        # N.B., the sort is stable, so partial states of each group are in
+        # the order in which they were accumulated
+        states = next(rows)[1]
+        for _, other in rows:
+            states = [acc.merge(state, o)
+                      for acc, state, o in zip(accs, states, other)]
+        yield k, [acc.finalize(state) for acc, state in zip(accs, states)]
+
+
+class _PartialAggregateView(Table):
+
+    def __init__(self, source, key, accumulators, buffersize=None):
+        self.source = source
+        self.key = key
+        self.accumulators = accumulators
+        self.buffersize = buffersize
+
+    def __iter__(self):
+        return _iterpartialaggregate(self.source, self.key, self.accumulators,
+                                    self.buffersize)
+
+
+def _iterpartialaggregate(source, key, accumulators, buffersize):
+    it = iter(source)
+    hdr = next(it)
+    flds = list(map(text_type, hdr))
+    sample, it = iterpeek(it, 100)
+    limit = _bufferrows(buffersize, sample)
+    yield ('key', 'states')
+
+    # N.B., key values as for rowgroupby
+    if callable(key):
+        getkey = lambda row: key(Record(row, flds))
+    else:
+        getkey = operator.itemgetter(*asindices(hdr, key))
+    steps = list()
+    for i, (srcfld, acc) in enumerate(accumulators):
+        if srcfld is None:
+            steps.append((i, None, acc))
+        else:
+            steps.append((i, operator.itemgetter(*asindices(hdr, srcfld)),
+                          acc))
+    inits = [acc.init for _, acc in accumulators]
+
+    groups = dict()
+    nflushed = 0
+    for row in it:
+        k = getkey(row)
+        states = groups.get(k)
+        if states is None:
+            if limit is not None and len(groups) >= limit:
+                # buffer is full, output partial states
+                for item in groups.items():
+                    yield item
+                nflushed += len(groups)
+                groups = dict()
+            groups[k] = states = [init() for init in inits]
+        rec = None
+        for i, getval, acc in steps:
+            if getval is None:
+                if rec is None:
+                    # N.B., rowgroupby passes whole rows as records
+                    rec = Record(row, flds)
+                states[i] = acc.step(states[i], rec)
+            else:
+                states[i] = acc.step(states[i], getval(row))
+    for item in groups.items():
+        yield item
+    debug('combined rows into %s partial groups', nflushed + len(groups))
+
+
+# maximum number of times rows are partitioned by hash before groups are
+# aggregated in memory regardless of buffer size
+_hashaggregate_maxlevels = 4
+_hashaggregate_npartitions = 16
+
+
+def _hashgroups(rows, getkey, limit, tempdir, level=0):
+    # group rows by key in memory, but if more than limit rows are held,
+    # partition the rows into temporary files by hash of key, then group each
+    # partition in turn
+    groups = OrderedDict()
+    spill = None
+    nrows = 0
+    npartitions = _hashaggregate_npartitions
+    for row in rows:
+        k = getkey(row)
+        if spill is not None:
+            spill.write(hash((level, k)) % npartitions, row)
+            continue
+        grp = groups.get(k)
+        if grp is None:
+            groups[k] = [row]
+        else:
+            grp.append(row)
+        nrows += 1
+        if (limit is not None and nrows > limit and len(groups) > 1
+                and level < _hashaggregate_maxlevels):
+            debug('spilling %s groups to partitions at level %s'
+                  % (len(groups), level))
+            spill = _PartitionWriter(npartitions, tempdir)
+            for gk, grp in groups.items():
+                p = hash((level, gk)) % npartitions
+                for r in grp:
+                    spill.write(p, r)
+            groups = None
+
+    if spill is None:
+        for item in groups.items():
+            yield item
+    else:
+        for partition in spill.iterpartitions():
+            for item in _hashgroups(partition, getkey, limit, tempdir,
+                                    level + 1):
+                yield item
+
+
+def _hashaccumulate(rows, getkey, flds, accumulators, limit, tempdir,
+                    level=0):
+    # accumulate values for each group in memory, but once there are more than
+    # limit groups, partition rows for any further groups into temporary files
+    # by hash of key, then accumulate each partition in turn
+    groups = OrderedDict()
+    spill = None
+    npartitions = _hashaggregate_npartitions
+    inits = [acc.init for _, acc in accumulators]
+    steps = list(enumerate(accumulators))
+    for row in rows:
+        k = getkey(row)
+        states = groups.get(k)
+        if states is None:
+            if spill is not None:
+                spill.write(hash((level, k)) % npartitions, row)
+                continue
+            groups[k] = states = [init() for init in inits]
+            if (limit is not None and len(groups) >= limit
+                    and level < _hashaggregate_maxlevels):
+                debug('spilling further groups to partitions at level %s'
+                      % level)
+                spill = _PartitionWriter(npartitions, tempdir)
+        rec = None
+        for i, (getval, acc) in steps:
+            if getval is None:
+                if rec is None:
+                    # N.B., rowgroupby passes whole rows as records
+                    rec = Record(row, flds)
+                states[i] = acc.step(states[i], rec)
+            else:
+                states[i] = acc.step(states[i], getval(row))
+
+    for k, states in groups.items():
+        yield k, [acc.finalize(state)
+                  for (_, acc), state in zip(accumulators, states)]
+    groups = None
+    if spill is not None:
+        for partition in spill.iterpartitions():
+            for item in _hashaccumulate(partition, getkey, flds, accumulators,
+                                        limit, tempdir, level + 1):
+                yield item
+
+
+class Accumulator(object):
+    """Base class for aggregation functions which can be computed in a single
+    pass over the values in a group, holding a small state for each group
+    rather than all of its values. Subclasses implement four methods:
+
+    * ``init()`` returns the initial state for a group;
+    * ``step(state, value)`` returns the state after adding a value;
+    * ``merge(state, other)`` returns the state combining two states
+      accumulated over separate runs of values, where `other` comes later;
+    * ``finalize(state)`` returns the output value for a state.
+
+    Where all aggregation functions passed to
+    :func:`petl.transform.reductions.aggregate` or
+    :func:`petl.transform.reductions.hashaggregate` are accumulators, each
+    group of rows is only iterated once and not held in memory. If the table
+    also needs sorting, :func:`petl.transform.reductions.aggregate` instead
+    accumulates partial states for each group within each buffer of rows, and
+    only sorts and merges the partial states, which is much faster where there
+    are few rows per buffer for each key. This requires ``merge()``, so
+    subclasses which do not implement it should set `combinable` to False;
+    otherwise `combinable` is True if ``merge()`` is overridden. Accumulators
+    can also be called as ordinary aggregation functions, e.g.::
+
+        >>> import petl as etl
+        >>> etl.Mean()([1, 2, 3, 6])
+        3.0
+
+    """
+
+    def init(self):
+        raise NotImplementedError
+
+    def step(self, state, value):
+        raise NotImplementedError
+
+    def merge(self, state, other):
+        raise NotImplementedError
+
+    def finalize(self, state):
+        return state
+
+    @property
+    def combinable(self):
+        # N.B., subclasses may override this with a class attribute
+        merge = type(self).merge
+        return getattr(merge, '__func__', merge) is not \
+            getattr(Accumulator.merge, '__func__', Accumulator.merge)
+
+    def __call__(self, values):
+        state = self.init()
+        for v in values:
+            state = self.step(state, v)
+        return self.finalize(state)
+
+    def __repr__(self):
+        return '%s()' % type(self).__name__
+
+
+class Count(Accumulator):
+    """Count values (or rows)."""
+
+    def init(self):
+        return 0
+
+    def step(self, state, value):
+        return state + 1
+
+    def merge(self, state, other):
+        return state + other
+
+
+class Sum(Accumulator):
+    """Sum values, as the builtin :func:`sum`."""
+
+    def init(self):
+        return 0
+
+    def step(self, state, value):
+        return state + value
+
+    def merge(self, state, other):
+        return state + other
+
+
+# N.B., states of Min, Max, First and Last are empty tuples for no values, or
+# singleton tuples, so that any value (including None) can be held
+
+
+class Min(Accumulator):
+    """Minimum value, as the builtin :func:`min`, or `None` if there are no
+    values."""
+
+    def init(self):
+        return ()
+
+    def step(self, state, value):
+        if not state or value < state[0]:
+            return value,
+        return state
+
+    def merge(self, state, other):
+        if not state or (other and other[0] < state[0]):
+            return other
+        return state
+
+    def finalize(self, state):
+        return state[0] if state else None
+
+
+class Max(Accumulator):
+    """Maximum value, as the builtin :func:`max`, or `None` if there are no
+    values."""
+
+    def init(self):
+        return ()
+
+    def step(self, state, value):
+        if not state or value > state[0]:
+            return value,
+        return state
+
+    def merge(self, state, other):
+        if not state or (other and other[0] > state[0]):
+            return other
+        return state
+
+    def finalize(self, state):
+        return state[0] if state else None
+
+
+class First(Accumulator):
+    """First value, or `None` if there are no values."""
+
+    def init(self):
+        return ()
+
+    def step(self, state, value):
+        return state or (value,)
+
+    def merge(self, state, other):
+        return state or other
+
+    def finalize(self, state):
+        return state[0] if state else None
+
+
+class Last(Accumulator):
+    """Last value, or `None` if there are no values."""
+
+    def init(self):
+        return ()
+
+    def step(self, state, value):
+        return value,
+
+    def merge(self, state, other):
+        return other or state
+
+    def finalize(self, state):
+        return state[0] if state else None
+
+
+class Mean(Accumulator):
+    """Arithmetic mean of values, or `None` if there are no values, computed
+    via :func:`petl.util.statistics.onlinestats`."""
+
+    def init(self):
+        # count, mean, population variance
+        return 0, 0, 0
+
+    def step(self, state, value):
+        n = state[0] + 1
+        return (n,) + onlinestats(value, n, mean=state[1], variance=state[2])
+
+    def merge(self, state, other):
+        na, meana, vara = state
+        nb, meanb, varb = other
+        n = na + nb
+        if not na or not nb:
+            return state if nb == 0 else other
+        delta = meanb - meana
+        mean = meana + delta * nb / n
+        variance = (vara * na + varb * nb + delta**2 * na * nb / n) / n
+        return n, mean, variance
+
+    def finalize(self, state):
+        return state[1] if state[0] else None
+
+
+class Variance(Mean):
+    """Population variance of values, or `None` if there are no values,
+    computed via :func:`petl.util.statistics.onlinestats`."""
+
+    def finalize(self, state):
+        return state[2] if state[0] else None
+
+
+class CountDistinct(Accumulator):
+    """Count distinct values. N.B., holds the set of distinct values for each
+    group."""
+
+    def init(self):
+        return set()
+
+    def step(self, state, value):
+        state.add(value)
+        return state
+
+    def merge(self, state, other):
+        return state | other
+
+    def finalize(self, state):
+        return len(state)
+
+
 def groupcountdistinctvalues(table, key, value):
     """Group by the `key` field then count the number of distinct values in the
     `value` field."""
@@ -605,7 +1316,7 @@ class Conflict(frozenset):
 
 
 def fold(table, key, f, value=None, presorted=False, buffersize=None,
-         tempdir=None, cache=True):
+         tempdir=None, cache=True, combiner=None):
     """
     Reduce rows recursively via the Python standard :func:`reduce` function.
     E.g.::
@@ -628,13 +1339,20 @@ def fold(table, key, f, value=None, presorted=False, buffersize=None,
         |   2 |    12 |
         +-----+-------+
 
+    If `combiner` is given, it is used to combine the results of folding
+    separate runs of values within a group, and values are folded before the
+    table is sorted, so only partial results need to be sorted (see
+    :class:`petl.transform.reductions.Accumulator`). If `f` is associative,
+    e.g., :func:`operator.add`, `combiner` can be ``True`` to use `f` itself.
+
     See also :func:`petl.transform.reductions.aggregate`,
     :func:`petl.transform.reductions.rowreduce`.
 
     """
 
     return FoldView(table, key, f, value=value, presorted=presorted,
-                    buffersize=buffersize, tempdir=tempdir, cache=cache)
+                    buffersize=buffersize, tempdir=tempdir, cache=cache,
+                    combiner=combiner)
 
 
 Table.fold = fold
@@ -643,17 +1361,40 @@ Table.fold = fold
 class FoldView(Table):
 
     def __init__(self, table, key, f, value=None, presorted=False,
-                 buffersize=None, tempdir=None, cache=True):
+                 buffersize=None, tempdir=None, cache=True, combiner=None):
         if presorted:
             self.table = table
+            self.unsorted = None
         else:
-            self.table = sort(table, key, buffersize=buffersize,
-                              tempdir=tempdir, cache=cache)
+            # N.B., sorted when first iterated, unless partial results are
+            # combined
+            self.table = None
+            self.unsorted = table
         self.key = key
         self.f = f
         self.value = value
+        self.buffersize = buffersize
+        self.tempdir = tempdir
+        self.cache = cache
+        if combiner is True:
+            combiner = f
+        self.combiner = combiner
+        self._partials = None
 
     def __iter__(self):
+        if self.unsorted is not None and self.combiner is not None:
+            if self._partials is None:
+                accumulators = [(self.value,
+                                 _FoldAccumulator(self.f, self.combiner))]
+                self._partials = _sortedpartials(
+                    self.unsorted, self.key, accumulators, self.buffersize,
+                    self.tempdir, self.cache
+                )
+            return itercombinefold(self._partials)
+        if self.table is None:
+            self.table = sort(self.unsorted, self.key,
+                              buffersize=self.buffersize,
+                              tempdir=self.tempdir, cache=self.cache)
         return iterfold(self.table, self.key, self.f, self.value)
 
 
@@ -661,3 +1402,32 @@ def iterfold(table, key, f, value):
     yield ('key', 'value')
     for k, grp in rowgroupby(table, key, value):
         yield k, reduce(f, grp)
+
+
+def itercombinefold(partials):
+    yield ('key', 'value')
+    for k, outvals in _itercombine(partials):
+        yield k, outvals[0]
+
+
+class _FoldAccumulator(Accumulator):
+    # fold values via a binary function, as the standard reduce function,
+    # combining partial results via another binary function
+
+    def __init__(self, f, combiner):
+        self.f = f
+        self.combiner = combiner
+
+    def init(self):
+        return ()
+
+    def step(self, state, value):
+        return (self.f(state[0], value),) if state else (value,)
+
+    def merge(self, state, other):
+        if state and other:
+            return self.combiner(state[0], other[0]),
+        return state or other
+
+    def finalize(self, state):
+        return state[0]
@@ -4,13 +4,22 @@ from __future__ import absolute_import, print_function, division
 import itertools
 import collections
 import operator
-from petl.compat import next, text_type
+import logging
+import os
+from tempfile import NamedTemporaryFile
+from petl.compat import next, text_type, pickle
 
 
-from petl.comparison import comparable_itemgetter
+import petl.config as config
+from petl.comparison import Comparable
 from petl.util.base import Table, rowgetter, values, itervalues, \
-    header, data, asindices
-from petl.transform.sorts import sort
+    data, asindices
+from petl.transform.sorts import _bufferrows, _writechunk, _iterchunk, \
+    _mergesorted, _NamedTempFileDeleteOnGC, _codec
+
+
+logger = logging.getLogger(__name__)
+debug = logger.debug
 
 
 def melt(table, key=None, variables=None, variablefield='variable',
@@ -154,7 +163,8 @@ def itermelt(source, key, variables, variablefield, valuefield):
 
 
 def recast(table, key=None, variablefield='variable', valuefield='value',
-           samplesize=1000, reducers=None, missing=None):
+           samplesize=1000, reducers=None, missing=None, buffersize=None,
+           tempdir=None):
     """
     Recast molten data. E.g.::
 
@@ -254,9 +264,13 @@ def recast(table, key=None, variablefield='variable', valuefield='value',
         |  3 | None | 'M'    |
         +----+------+--------+
 
-    Note that the table is scanned once to discover variables, then a second
-    time to reshape the data and recast variables as fields. How many rows are
-    scanned in the first pass is determined by the `samplesize` argument.
+    Note that variables are discovered from the first rows of the table, how
+    many is determined by the `samplesize` argument, and values for any other
+    variables are left out. The table is scanned only once, with values
+    grouped by key in memory. If `buffersize` is given (a number of rows, or
+    a memory budget such as ``'512MB'``) and the table is larger, groups held
+    in memory are written out in order of key to temporary files in
+    `tempdir` each time the buffer fills, and then merged.
 
     See also :func:`petl.transform.reshape.melt`.
 
@@ -264,7 +278,8 @@ def recast(table, key=None, variablefield='variable', valuefield='value',
 
     return RecastView(table, key=key, variablefield=variablefield,
                       valuefield=valuefield, samplesize=samplesize,
-                      reducers=reducers, missing=missing)
+                      reducers=reducers, missing=missing,
+                      buffersize=buffersize, tempdir=tempdir)
 
 
 Table.recast = recast
@@ -274,7 +289,7 @@ class RecastView(Table):
 
     def __init__(self, source, key=None, variablefield='variable',
                  valuefield='value', samplesize=1000, reducers=None,
-                 missing=None):
+                 missing=None, buffersize=None, tempdir=None):
         self.source = source
         self.key = key
         self.variablefield = variablefield
@@ -285,17 +300,17 @@ class RecastView(Table):
         else:
             self.reducers = reducers
         self.missing = missing
+        self.buffersize = buffersize
+        self.tempdir = tempdir
 
     def __iter__(self):
         return iterrecast(self.source, self.key, self.variablefield,
                           self.valuefield, self.samplesize, self.reducers,
-                          self.missing)
+                          self.missing, self.buffersize, self.tempdir)
 
 
 def iterrecast(source, key, variablefield, valuefield,
-               samplesize, reducers, missing):
-
-    # TODO only make one pass through the data
+               samplesize, reducers, missing, buffersize=None, tempdir=None):
 
     it = iter(source)
     hdr = next(it)
@@ -347,62 +362,144 @@ def iterrecast(source, key, variablefield, valuefield,
     if isinstance(variablefields, dict):
         # user supplied dictionary
         variables = variablefields
+        sample = []
     else:
         variables = collections.defaultdict(set)
-        # sample the data to discover variables to be cast as fields
-        for row in itertools.islice(it, 0, samplesize):
+        # sample the data to discover variables to be cast as fields, N.B.,
+        # sampled rows are kept to be grouped along with the rest
+        sample = list(itertools.islice(it, 0, samplesize))
+        for row in sample:
             for i, f in zip(variableindices, variablefields):
                 variables[f].add(row[i])
         for f in variables:
             # turn from sets to sorted lists
             variables[f] = sorted(variables[f])
 
-    # finished the first pass
-
-    # determine the output fields
+    # determine the output fields, and the position of each variable in the
+    # output rows
     outhdr = list(keyfields)
+    slots = list()
+    reducerslots = list()
     for f in variablefields:
-        outhdr.extend(variables[f])
+        slot = dict()
+        for variable in variables[f]:
+            slot[variable] = len(outhdr) - len(keyfields)
+            if variable in reducers:
+                redu = reducers[variable]
+            else:
+                redu = list  # list all values
+            reducerslots.append(redu)
+            outhdr.append(variable)
+        slots.append(slot)
     yield tuple(outhdr)
 
     # output data
 
-    source = sort(source, key=keyfields)
-    it = itertools.islice(source, 1, None)  # skip header row
-    getsortablekey = comparable_itemgetter(*keyindices)
-    getactualkey = operator.itemgetter(*keyindices)
-
-    # process sorted data in newfields
-    groups = itertools.groupby(it, key=getsortablekey)
-    for _, group in groups:
-        # may need to iterate over the group more than once
-        group = list(group)
-        # N.B., key returned by groupby may be wrapped as SortableItem, we want
-        # to output the actual key value, get it from the first row in the group
-        key_value = getactualkey(group[0])
+    getkey = operator.itemgetter(*keyindices)
+    nslots = len(reducerslots)
+    slotindices = list(zip(variableindices, slots))
+
+    def update(cells, row):
+        # collect the value from the current row for each variable
+        value = row[valueindex]
+        for i, slot in slotindices:
+            c = slot.get(row[i])
+            if c is not None:
+                vals = cells[c]
+                if vals is None:
+                    cells[c] = [value]
+                else:
+                    vals.append(value)
+
+    def merge(cells, other):
+        for c, vals in enumerate(other):
+            if vals is not None:
+                if cells[c] is None:
+                    cells[c] = vals
+                else:
+                    cells[c].extend(vals)
+
+    it = itertools.chain(sample, it)
+    limit = None
+    if buffersize is not None:
+        limit = _bufferrows(buffersize, sample)
+    groups = _iterhashgroups(it, getkey, lambda: [None] * nslots, update,
+                             merge, limit, tempdir)
+    for key_value, cells in groups:
         if len(keyfields) > 1:
             out_row = list(key_value)
         else:
             out_row = [key_value]
-        for f, i in zip(variablefields, variableindices):
-            for variable in variables[f]:
-                # collect all values for the current variable
-                vals = [r[valueindex] for r in group if r[i] == variable]
-                if len(vals) == 0:
-                    val = missing
-                elif len(vals) == 1:
-                    val = vals[0]
-                else:
-                    if variable in reducers:
-                        redu = reducers[variable]
-                    else:
-                        redu = list  # list all values
-                    val = redu(vals)
-                out_row.append(val)
+        for vals, redu in zip(cells, reducerslots):
+            if vals is None:
+                val = missing
+            elif len(vals) == 1:
+                val = vals[0]
+            else:
+                val = redu(vals)
+            out_row.append(val)
         yield tuple(out_row)
 
 
-def transpose(table):
+def _sortedgroups(groups):
+    return sorted(groups.items(), key=lambda item: Comparable(item[0]))
+
+
+def _iterhashgroups(rows, getkey, newgroup, update, merge, limit=None,
+                    tempdir=None):
+    # group rows by key in a dict, then yield (key, group) pairs in order of
+    # key, N.B., if limit is given, groups are written out in order of key to
+    # a temporary file each time that many rows have been grouped, and the
+    # files are merged, combining groups with the same key
+    groups = dict()
+    runs = list()
+    n = 0
+    blocksize = config.sort_blocksize or 1000
+    compression = config.sort_compression
+    for row in rows:
+        k = getkey(row)
+        group = groups.get(k)
+        if group is None:
+            group = groups[k] = newgroup()
+        update(group, row)
+        n += 1
+        if limit is not None and n >= limit:
+            debug('writing %s groups to temporary file' % len(groups))
+            runs.append(_NamedTempFileDeleteOnGC(
+                _writechunk(_sortedgroups(groups), tempdir, blocksize,
+                            compression)
+            ))
+            groups = dict()
+            n = 0
+
+    if not runs:
+        for item in _sortedgroups(groups):
+            yield item
+        return
+
+    if groups:
+        runs.append(_NamedTempFileDeleteOnGC(
+            _writechunk(_sortedgroups(groups), tempdir, blocksize,
+                        compression)
+        ))
+    groups = None
+    debug('merging %s runs of groups' % len(runs))
+    chunkiters = [_iterchunk(f.name, compression) for f in runs]
+    merged = _mergesorted(lambda item: Comparable(item[0]), False,
+                          *chunkiters)
+    # N.B., runs are merged in the order they were written, so values are
+    # combined in the order of the input
+    curk, curgroup = next(merged)
+    for k, group in merged:
+        if k == curk:
+            merge(curgroup, group)
+        else:
+            yield curk, curgroup
+            curk, curgroup = k, group
+    yield curk, curgroup
+
+
+def transpose(table, buffersize=None, tempdir=None):
     """
     Transpose rows into columns. E.g.::
 
@@ -421,11 +518,18 @@ def transpose(table):
         | 'colour' | 'blue' | 'red' | 'purple' | 'yellow' | 'orange' |
         +----------+--------+-------+----------+----------+----------+
 
+    The table is scanned only once, with values held in memory by column. If
+    `buffersize` is given (a number of rows, or a memory budget such as
+    ``'512MB'``) and the table is larger, each block of that many rows is
+    instead written out by column to a temporary file in `tempdir`, and each
+    output row is read back from the blocks for its column. Values must then
+    be picklable.
+
     See also :func:`petl.transform.reshape.recast`.
 
     """
 
-    return TransposeView(table)
+    return TransposeView(table, buffersize=buffersize, tempdir=tempdir)
 
 
 Table.transpose = transpose
@@ -433,18 +537,83 @@ Table.transpose = transpose
 
 class TransposeView(Table):
 
-    def __init__(self, source):
+    def __init__(self, source, buffersize=None, tempdir=None):
         self.source = source
+        self.buffersize = buffersize
+        self.tempdir = tempdir
 
     def __iter__(self):
-        return itertranspose(self.source)
+        return itertranspose(self.source, self.buffersize, self.tempdir)
 
 
-def itertranspose(source):
-    hdr = header(source)
-    its = [iter(source) for _ in hdr]
-    for i in range(len(hdr)):
-        yield tuple(row[i] for row in its[i])
+def itertranspose(source, buffersize=None, tempdir=None):
+    it = iter(source)
+    try:
+        hdr = next(it)
+    except StopIteration:
+        return
+    n = len(hdr)
+    if n == 0:
+        return
+
+    # N.B., raises IndexError on short rows
+    if n == 1:
+        getvalues = lambda row: (row[0],)
+    else:
+        getvalues = operator.itemgetter(*range(n))
+
+    if buffersize is None:
+        limit = None
+    else:
+        sample = list(itertools.islice(it, 100))
+        limit = _bufferrows(buffersize, sample)
+        it = itertools.chain(sample, it)
+
+    # first block of rows, starting with the header
+    rows = [getvalues(hdr)]
+    rows.extend(map(getvalues, itertools.islice(it, limit)))
+    block = list(itertools.islice(it, 1))
+    if not block:
+        # all rows held in memory
+        for col in zip(*rows):
+            yield col
+        return
+
+    # write each block of rows out by column, noting where each column of
+    # each block can be found
+    compress, decompress = _codec(config.sort_compression)
+    offsets = [list() for _ in range(n)]
+    with NamedTemporaryFile(dir=tempdir, delete=False, mode='wb') as f:
+        debug('created temporary column store %s' % f.name)
+        try:
+            while rows:
+                for i, col in enumerate(zip(*rows)):
+                    chunk = pickle.dumps(col, protocol=-1)
+                    if compress is not None:
+                        chunk = compress(chunk)
+                    offsets[i].append((f.tell(), len(chunk)))
+                    f.write(chunk)
+                rows = list(map(getvalues, itertools.chain(
+                    block, itertools.islice(it, limit - len(block))
+                )))
+                block = []
+        except BaseException:
+            # e.g., a short row, or values which can't be pickled
+            f.close()
+            os.unlink(f.name)
+            raise
+    store = _NamedTempFileDeleteOnGC(f.name)
+
+    with open(store.name, 'rb') as f:
+        for i in range(n):
+            col = list()
+            for pos, size in offsets[i]:
+                f.seek(pos)
+                chunk = f.read(size)
+                if decompress is not None:
+                    chunk = decompress(chunk)
+                col.extend(pickle.loads(chunk))
+            yield tuple(col)
 
 
 def pivot(table, f1, f2, f3, aggfun, missing=None,
@@ -496,6 +665,15 @@ def pivot(table, f1, f2, f3, aggfun, missing=None,
         | 'girl' |    19 |   24 |   9 |
         +--------+-------+------+-----+
 
+    Unless `presorted` is True, the table is scanned only once, with values
+    grouped by `f1` and `f2` in memory. If `buffersize` is given (a number of
+    rows, or a memory budget such as ``'512MB'``) and the table is larger,
+    groups held in memory are written out in order of `f1` to temporary files
+    in `tempdir` each time the buffer fills, and then merged. The `cache`
+    argument is ignored. If `presorted` is True, it is assumed that the data
+    are already sorted by `f1` and `f2`, and the table is scanned twice, to
+    discover the values of `f2` then to aggregate them.
+
     See also :func:`petl.transform.reshape.recast`.
 
     """
@@ -512,18 +690,21 @@ class PivotView(Table):
 
     def __init__(self, source, f1, f2, f3, aggfun, missing=None,
                  presorted=False, buffersize=None, tempdir=None, cache=True):
-        if presorted:
-            self.source = source
-        else:
-            self.source = sort(source, key=(f1, f2), buffersize=buffersize,
-                               tempdir=tempdir, cache=cache)
+        self.source = source
         self.f1, self.f2, self.f3 = f1, f2, f3
         self.aggfun = aggfun
         self.missing = missing
+        self.presorted = presorted
+        self.buffersize = buffersize
+        self.tempdir = tempdir
 
     def __iter__(self):
-        return iterpivot(self.source, self.f1, self.f2, self.f3, self.aggfun,
-                         self.missing)
+        if self.presorted:
+            return iterpivot(self.source, self.f1, self.f2, self.f3,
+                             self.aggfun, self.missing)
+        return iterhashpivot(self.source, self.f1, self.f2, self.f3,
+                             self.aggfun, self.missing, self.buffersize,
+                             self.tempdir)
 
 
 def iterpivot(source, f1, f2, f3, aggfun, missing):
@@ -552,6 +733,65 @@ def iterpivot(source, f1, f2, f3, aggfun, missing):
         yield tuple(outrow)
 
 
+def iterhashpivot(source, f1, f2, f3, aggfun, missing, buffersize=None,
+                  tempdir=None):
+    it = iter(source)
+    hdr = next(it)
+    flds = list(map(text_type, hdr))
+    f1i = flds.index(f1)
+    f2i = flds.index(f2)
+    f3i = flds.index(f3)
+
+    # group values by f1 then f2 in a single pass, collecting f2 values
+    f2vals = set()
+    addf2 = f2vals.add
+
+    def update(group, row):
+        v2 = row[f2i]
+        vals = group.get(v2)
+        if vals is None:
+            group[v2] = [row[f3i]]
+            addf2(v2)
+        else:
+            vals.append(row[f3i])
+
+    def merge(group, other):
+        for v2, vals in other.items():
+            if v2 in group:
+                group[v2].extend(vals)
+            else:
+                group[v2] = vals
+
+    limit = None
+    if buffersize is not None:
+        sample = list(itertools.islice(it, 100))
+        limit = _bufferrows(buffersize, sample)
+        it = itertools.chain(sample, it)
+    groups = _iterhashgroups(it, operator.itemgetter(f1i), dict, update,
+                             merge, limit, tempdir)
+    # N.B., groups are only grouped and sorted once all rows are read, so all
+    # f2 values are known by the time the first group is available
+    groups = iter(groups)
+    try:
+        first = next(groups)
+    except StopIteration:
+        first = None
+
+    f2vals = sorted(f2vals)
+    outhdr = [f1]
+    outhdr.extend(f2vals)
+    yield tuple(outhdr)
+    if first is None:
+        return
+
+    f2pos = dict((v2, 1 + i) for i, v2 in enumerate(f2vals))
+    for v1, group in itertools.chain([first], groups):
+        outrow = [v1] + [missing] * len(f2vals)
+        for v2, vals in group.items():
+            outrow[f2pos[v2]] = aggfun(vals)
+        yield tuple(outrow)
+
+
 def flatten(table):
     """
     Convert a table to a sequence of values in row-major order. E.g.::
@@ -2,12 +2,16 @@ from __future__ import absolute_import, print_function, division
 
 
 import operator
-from petl.compat import next, string_types, callable, text_type
+from petl.compat import next, string_types, callable, text_type, \
+    numeric_types, izip
 from petl.comparison import Comparable
 
 
 from petl.errors import ArgumentError
 from petl.util.base import asindices, expr, Table, values, Record
+from petl.util.columnar import ColumnarTable, _numericbuffer
+from petl.transform.fusion import _registerstage, _isfusable, iterfused, \
+    _bind
 
 
 def select(table, *args, **kwargs):
@@ -57,6 +61,10 @@ def select(table, *args, **kwargs):
     The complement of the selection can be returned (i.e., the query can be
     inverted) by providing `complement=True` as a keyword argument.
 
+    If `table` is a :class:`petl.util.columnar.ColumnarTable` and a field is
+    given, rows are selected via the buffers of the table when the view is
+    iterated.
+
     """
 
     missing = kwargs.get('missing', None)
@@ -92,6 +100,8 @@ class RowSelectView(Table):
         self.complement = complement
 
     def __iter__(self):
+        if _isfusable(self):
+            return iterfused(self)
         return iterrowselect(self.source, self.where, self.missing,
                              self.complement)
 
@@ -106,10 +116,43 @@ class FieldSelectView(Table):
         self.missing = missing
 
     def __iter__(self):
+        if isinstance(self.source, ColumnarTable):
+            return itercolumnarselect(self.source, self.field, self.where,
+                                      self.complement)
+        if _isfusable(self):
+            return iterfused(self)
         return iterfieldselect(self.source, self.field, self.where,
                                self.complement, self.missing)
 
 
+def itercolumnarselect(source, field, where, complement):
+    # N.B., rows of a columnar table are never short, so there are no missing
+    # values, and rows are selected from the buffers as they are when
+    # iteration begins
+    for row in _columnarselect(source, field, where, complement):
+        yield row
+
+
+def _columnarselect(table, field, where, complement):
+    # select rows of a columnar table, returning a new columnar table
+    indices = asindices(table.hdr, field)
+    if len(indices) > 1:
+        vals = izip(*[table.cols[i] for i in indices])
+    else:
+        vals = table.cols[indices[0]]
+        if isinstance(where, _OpPredicate):
+            inner = where.value
+            if isinstance(inner, Comparable):
+                inner = inner.inner
+            if (getattr(vals, 'dtype', None) is not None
+                    and _numericbuffer(vals)
+                    and isinstance(inner, numeric_types)):
+                # compare the whole array at once
+                selected = where.op(vals, inner)
+                return table.take(~selected if complement else selected)
+    return table.take(bool(where(v)) != complement for v in vals)
+
+
 def iterfieldselect(source, field, where, complement, missing):
     it = iter(source)
     hdr = next(it)
@@ -136,6 +179,52 @@ def iterrowselect(source, where, missing, complement):
             yield tuple(row)  # need to convert back to tuple?
 
 
+def _fieldselectstage(view):
+    # N.B., as for iterfieldselect
+    field, where = view.field, view.where
+    complement, missing = view.complement, view.missing
+
+    def stage(hdr, namespace, istuple):
+        indices = asindices(hdr, field)
+        getv = operator.itemgetter(*indices)
+        lines = ['try:',
+                 '    v = %s(row)' % _bind(namespace, getv),
+                 'except IndexError:',
+                 '    v = %s' % _bind(namespace, missing),
+                 'if %s%s(v):' % ('' if complement else 'not ',
+                                  _bind(namespace, where)),
+                 '    continue']
+        if not istuple:
+            lines.append('row = tuple(row)')
+        return tuple(hdr), lines, True
+
+    return view.source, stage
+
+
+_registerstage(FieldSelectView, _fieldselectstage)
+
+
+def _rowselectstage(view):
+    # N.B., as for iterrowselect
+    where, missing, complement = view.where, view.missing, view.complement
+
+    def stage(hdr, namespace, istuple):
+        flds = list(map(text_type, hdr))
+        lines = ['if %s%s(%s(row, %s, missing=%s)):' % (
+                     '' if complement else 'not ', _bind(namespace, where),
+                     _bind(namespace, Record), _bind(namespace, flds),
+                     _bind(namespace, missing)),
+                 '    continue']
+        if not istuple:
+            lines.append('row = tuple(row)')
+        return tuple(hdr), lines, True
+
+    return view.source, stage
+
+
+_registerstage(RowSelectView, _rowselectstage)
+
+
 def rowlenselect(table, n, complement=False):
     """Select rows of length `n`."""
 
@@ -150,8 +239,29 @@ def selectop(table, field, value, op, complement=False):
     """Select rows where the function `op` applied to the given field and
     the given value returns `True`."""
 
-    return select(table, field, lambda v: op(v, value),
-                  complement=complement)
+    if isinstance(table, ColumnarTable) and op in _vectorizedops:
+        # N.B., may be applied to a whole buffer, see _columnarselect
+        where = _OpPredicate(op, value)
+    else:
+        where = lambda v: op(v, value)
+    return select(table, field, where, complement=complement)
+
+
+# N.B., these have the same result for numbers whether or not values are
+# wrapped as Comparable
+_vectorizedops = (operator.eq, operator.ne, operator.lt, operator.le,
+                  operator.gt, operator.ge)
+
+
+class _OpPredicate(object):
+    # compare values with a given value via an operator
+
+    def __init__(self, op, value):
+        self.op = op
+        self.value = value
+
+    def __call__(self, v):
+        return self.op(v, self.value)
 
 
 Table.selectop = selectop
@@ -427,7 +427,7 @@ def iterintersection(a, b):
         pass
 
 
-def hashcomplement(a, b, strict=False):
+def hashcomplement(a, b, strict=False, bloom=None):
     """
     Alternative implementation of :func:`petl.transform.setops.complement`,
     where the complement is executed by constructing an in-memory set for all
@@ -442,9 +442,14 @@ def hashcomplement(a, b, strict=False):
     If `strict` is `True` then strict set-like behaviour is used, i.e., 
     only rows in `a` not found in `b` are returned.
 
+    If `bloom` is given, it should be a :class:`petl.util.bloom.BloomFilter`
+    holding rows found in `b` (see :func:`petl.util.bloom.bloomfilter`), and
+    rows in `a` not found in the filter are returned without looking them
+    up, e.g., where the same filter is used elsewhere in the pipeline.
+
     """
 
-    return HashComplementView(a, b, strict=strict)
+    return HashComplementView(a, b, strict=strict, bloom=bloom)
 
 
 Table.hashcomplement = hashcomplement
@@ -452,16 +457,17 @@ Table.hashcomplement = hashcomplement
 
 class HashComplementView(Table):
 
-    def __init__(self, a, b, strict=False):
+    def __init__(self, a, b, strict=False, bloom=None):
         self.a = a
         self.b = b
         self.strict = strict
+        self.bloom = bloom
 
     def __iter__(self):
-        return iterhashcomplement(self.a, self.b, self.strict)
+        return iterhashcomplement(self.a, self.b, self.strict, self.bloom)
 
 
-def iterhashcomplement(a, b, strict):
+def iterhashcomplement(a, b, strict, bloom=None):
     ita = iter(a)
     ahdr = next(ita)
     yield tuple(ahdr)
@@ -470,16 +476,20 @@ def iterhashcomplement(a, b, strict):
 
     # N.B., need to account for possibility of duplicate rows
     bcnt = Counter(tuple(row) for row in itb)
+    if bloom is False:
+        bloom = None
     for ar in ita:
         t = tuple(ar)
-        if bcnt[t] > 0:
+        if bloom is not None and t not in bloom:
+            yield t
+        elif bcnt[t] > 0:
             if not strict:
                 bcnt[t] -= 1
         else:
             yield t
 
 
-def hashintersection(a, b):
+def hashintersection(a, b, bloom=None):
     """
     Alternative implementation of
     :func:`petl.transform.setops.intersection`, where the intersection
@@ -489,9 +499,14 @@ def hashintersection(a, b):
     May be faster and/or more resource efficient where the right table is small
     and the left table is large.
 
+    If `bloom` is given, it should be a :class:`petl.util.bloom.BloomFilter`
+    holding rows found in `b` (see :func:`petl.util.bloom.bloomfilter`), and
+    rows in `a` not found in the filter are skipped without looking them up,
+    e.g., where the same filter is used elsewhere in the pipeline.
+
     """
 
-    return HashIntersectionView(a, b)
+    return HashIntersectionView(a, b, bloom=bloom)
 
 
 Table.hashintersection = hashintersection
@@ -499,15 +514,16 @@ Table.hashintersection = hashintersection
 
 class HashIntersectionView(Table):
 
-    def __init__(self, a, b):
+    def __init__(self, a, b, bloom=None):
         self.a = a
         self.b = b
+        self.bloom = bloom
 
     def __iter__(self):
-        return iterhashintersection(self.a, self.b)
+        return iterhashintersection(self.a, self.b, self.bloom)
 
 
-def iterhashintersection(a, b):
+def iterhashintersection(a, b, bloom=None):
     ita = iter(a)
     ahdr = next(ita)
     yield tuple(ahdr)
@@ -516,8 +532,12 @@ def iterhashintersection(a, b):
 
     # N.B., need to account for possibility of duplicate rows
     bcnt = Counter(tuple(row) for row in itb)
+    if bloom is False:
+        bloom = None
     for ar in ita:
         t = tuple(ar)
+        if bloom is not None and t not in bloom:
+            continue
         if bcnt[t] > 0:
             yield t
             bcnt[t] -= 1
@@ -8,11 +8,17 @@ import itertools
 import logging
 from collections import namedtuple
 import operator
-from petl.compat import pickle, next, text_type
+import datetime
+import struct
+import re
+import sys
+from petl.compat import pickle, next, text_type, binary_type, \
+    numeric_types, string_types, PY2
 
 
 import petl.config as config
-from petl.comparison import comparable_itemgetter
+from petl.errors import ArgumentError, NotSortedError
+from petl.comparison import comparable_itemgetter, Comparable
 from petl.util.base import Table, asindices
 
 
@@ -23,7 +29,7 @@ debug = logger.debug
 
 
 def sort(table, key=None, reverse=False, buffersize=None, tempdir=None,
-         cache=True):
+         cache=True, workers=None, limit=None):
     """
     Sort the table. Field names or indices (from zero) can be used to specify
     the key. E.g.::
@@ -85,48 +91,409 @@ def sort(table, key=None, reverse=False, buffersize=None, tempdir=None,
         | 'F' |   1 |
         +-----+-----+
 
-    The `buffersize` argument should be an `int` or `None`.
+    The `buffersize` argument should be an `int`, a `str` or `None`.
 
     If the number of rows in the table is less than `buffersize`, the table
     will be sorted in memory. Otherwise, the table is sorted in chunks of
     no more than `buffersize` rows, each chunk is written to a temporary file,
     and then a merge sort is performed on the temporary files.
 
+    If `buffersize` is a string such as ``'512MB'``, it is a memory budget in
+    bytes (with optional suffix 'K', 'M', 'G' or 'T', and 'B' or 'iB', all as
+    powers of 1024). The size of rows is estimated from samples via
+    :func:`sys.getsizeof` as each chunk is read, and each chunk holds as
+    many rows as fit within the budget, e.g.::
+
+        >>> table5 = etl.sort(table1, 'foo', buffersize='512MB')
+
+    This applies to all functions which pass the `buffersize` argument on to
+    :func:`sort`.
+
     If `buffersize` is `None`, the value of
     `petl.config.sort_buffersize` will be used. By default this is
     set to 100000 rows, but can be changed, e.g.::
 
         >>> import petl.config
         >>> petl.config.sort_buffersize = 500000
+        >>> petl.config.sort_buffersize = '1GB'
 
     If `petl.config.sort_buffersize` is set to `None`, this forces
     all sorting to be done entirely in memory.
 
+    Rows are written to temporary files in pickled blocks of
+    `petl.config.sort_blocksize` rows, which may be compressed by setting
+    `petl.config.sort_compression` to `'zlib'`, `'bz2'` or `'lzma'`.
+
+    No more than `petl.config.sort_max_fanin` temporary files are merged at
+    once, so if there are more chunks than that, they are merged in several
+    passes via intermediate files. After the table has been sorted in chunks,
+    the `spillstats` attribute of the returned view reports the number of
+    sorted chunks (`'runs'`), the number of merge passes including the final
+    merge (`'passes'`) and the total size of the temporary files written
+    (`'bytes'`).
+
     By default the results of the sort will be cached, and so a second pass over
     the sorted table will yield rows from the cache and will not repeat the
     sort operation. To turn off caching, set the `cache` argument to `False`.
 
+    If the table does not fit within the sort buffer, the `workers` argument
+    can be used to sort and write out chunks in parallel using a pool of that
+    many worker processes (via :class:`concurrent.futures.ProcessPoolExecutor`),
+    e.g.::
+
+        >>> table5 = etl.sort(table1, 'foo', buffersize=2, workers=4)
+
+    The chunks are then merged in the main process as usual. Rows must be
+    picklable, which is already required for sorting in chunks. If
+    `buffersize` is a memory budget, up to `workers` chunks waiting to be
+    sorted and the chunk being read share the budget, so each chunk after
+    the first is read within ``1 / (workers + 1)`` of it. The `workers`
+    argument requires Python 3.
+
+    If `limit` is given, only the first `limit` rows of the sorted table are
+    returned, and these are selected without sorting the whole table, see
+    :func:`petl.transform.sorts.topn`. In this case the `buffersize`,
+    `tempdir`, `cache` and `workers` arguments are ignored.
+
+    If the table was itself returned by :func:`sort` with the same key, or a
+    key starting with the same fields (given in the same way), and in the same
+    direction, it is already sorted, so it is returned unchanged rather than
+    being sorted again. This also applies to all functions which sort their
+    input, e.g., :func:`petl.transform.joins.join`.
+
     """
 
+    if limit is not None:
+        return TopNView(table, limit, key=key, reverse=reverse)
+    if _sortedview(table, key, reverse):
+        debug('table is already sorted by %r' % (key,))
+        return table
     return SortView(table, key=key, reverse=reverse, buffersize=buffersize,
-                    tempdir=tempdir, cache=cache)
+                    tempdir=tempdir, cache=cache, workers=workers)
 
 
 Table.sort = sort
 
 
-def _iterchunk(fn):
+# frames of pickled (and possibly compressed) blocks of rows in temporary
+# files are prefixed with their length in bytes
+_frameheader = struct.Struct('<Q')
+
+
+def _codec(compression):
+    # return compress and decompress functions for the given compression
+    if compression is None:
+        return None, None
+    elif compression == 'zlib':
+        import zlib
+        # favour speed over size
+        return (lambda data: zlib.compress(data, 1)), zlib.decompress
+    elif compression == 'bz2':
+        import bz2
+        return bz2.compress, bz2.decompress
+    elif compression == 'lzma':
+        import lzma
+        return lzma.compress, lzma.decompress
+    else:
+        raise ArgumentError('unsupported compression: %r' % compression)
+
+
+def _iterchunk(fn, compression=None):
     # reopen so iterators from file cache are independent
     debug('iterchunk, opening %s' % fn)
+    decompress = _codec(compression)[1]
+    headersize = _frameheader.size
     with open(fn, 'rb') as f:
-        try:
-            while True:
-                yield pickle.load(f)
-        except EOFError:
-            pass
+        while True:
+            # read ahead a whole block of rows at a time
+            header = f.read(headersize)
+            if len(header) < headersize:
+                break
+            data = f.read(_frameheader.unpack(header)[0])
+            if decompress is not None:
+                data = decompress(data)
+            for row in pickle.loads(data):
+                yield row
     debug('end of iterchunk, closed %s' % fn)
 
 
+def _writechunk(rows, tempdir, blocksize=None, compression=None):
+    # N.B., we **don't** want the file to be deleted on close, but we **do**
+    # want the file to be deleted when the view is garbage collected, or when
+    # the program exits, so the caller should wrap the returned file name in a
+    # _NamedTempFileDeleteOnGC
+    compress = _codec(compression)[0]
+    if not blocksize:
+        # write all rows as a single block
+        blocksize = None
+    it = iter(rows)
+    with NamedTemporaryFile(dir=tempdir, delete=False, mode='wb') as f:
+        debug('created temporary chunk file %s' % f.name)
+        while True:
+            block = list(itertools.islice(it, blocksize))
+            if not block:
+                break
+            data = pickle.dumps(block, protocol=-1)
+            if compress is not None:
+                data = compress(data)
+            f.write(_frameheader.pack(len(data)))
+            f.write(data)
+        f.flush()
+    return f.name
+
+
+class _PartitionWriter(object):
+    """Write rows to a number of temporary files, one per partition, in the
+    same block format as sorted chunks, so each partition can be read back
+    via :func:`_iterchunk`."""
+
+    def __init__(self, npartitions, tempdir=None):
+        self.blocksize = config.sort_blocksize or 1000
+        self.compression = config.sort_compression
+        self.compress = _codec(self.compression)[0]
+        self.files = []
+        self.wrappers = []
+        for _ in range(npartitions):
+            f = NamedTemporaryFile(dir=tempdir, delete=False, mode='wb')
+            debug('created temporary partition file %s' % f.name)
+            self.files.append(f)
+            self.wrappers.append(_NamedTempFileDeleteOnGC(f.name))
+        self.buffers = [[] for _ in range(npartitions)]
+        self.nbytes = 0
+
+    def write(self, partition, row):
+        buf = self.buffers[partition]
+        buf.append(row)
+        if len(buf) >= self.blocksize:
+            self._flush(partition)
+
+    def _flush(self, partition):
+        buf = self.buffers[partition]
+        if buf:
+            data = pickle.dumps(buf, protocol=-1)
+            if self.compress is not None:
+                data = self.compress(data)
+            f = self.files[partition]
+            f.write(_frameheader.pack(len(data)))
+            f.write(data)
+            self.nbytes += _frameheader.size + len(data)
+            del buf[:]
+
+    def close(self):
+        """Flush and close all files, and return the file name wrappers,
+        which delete the files when garbage collected."""
+        for partition, f in enumerate(self.files):
+            self._flush(partition)
+            f.close()
+        return self.wrappers
+
+    def iterpartitions(self):
+        """Close all files, then iterate over the rows in each partition,
+        deleting each file as soon as it has been read."""
+        wrappers = self.close()
+        self.wrappers = None
+        while wrappers:
+            wrapper = wrappers.pop(0)
+            yield _iterchunk(wrapper.name, self.compression)
+
+
+def _bufferrows(buffersize, sample):
+    """Convert a `buffersize` argument into a number of rows, estimating
+    row sizes from the `sample` rows if `buffersize` is a memory budget such
+    as ``'512MB'``."""
+
+    if buffersize is None:
+        buffersize = config.sort_buffersize
+    if isinstance(buffersize, string_types):
+        nbytes = _parsebytes(buffersize)
+        if not sample:
+            return None
+        rowsize = sum(map(_rowsizeof, sample)) / len(sample)
+        return max(1, int(nbytes // rowsize))
+    return buffersize
+
+
+def _sortwritechunk(rows, indices, reverse, native, tempdir, blocksize,
+                    compression):
+    # sort a chunk and write it out, N.B., runs in a worker process
+    sorter = _ChunkSorter(indices, reverse=reverse, native=native)
+    sorter.sort(rows)
+    if sorter.native:
+        families = sorter.families
+    else:
+        families = None
+    return _writechunk(rows, tempdir, blocksize, compression), families
+
+
+_byteunits = {'': 1, 'K': 2**10, 'M': 2**20, 'G': 2**30, 'T': 2**40}
+_bytesize_re = re.compile(r'^\s*(\d+(?:\.\d*)?)\s*([KMGT]?)(?:I?B)?\s*$',
+                          re.IGNORECASE)
+
+
+def _parsebytes(buffersize):
+    """Parse a memory budget such as ``'512MB'`` into a number of bytes."""
+
+    match = _bytesize_re.match(buffersize)
+    if match is None:
+        raise ArgumentError('invalid buffer size: %r' % buffersize)
+    number, unit = match.groups()
+    nbytes = int(float(number) * _byteunits[unit.upper()])
+    if nbytes < 1:
+        raise ArgumentError('invalid buffer size: %r' % buffersize)
+    return nbytes
+
+
+def _rowsizeof(row, getsizeof=sys.getsizeof):
+    # shallow size of the row and its values, plus the list slot holding it
+    return getsizeof(row) + sum(map(getsizeof, row)) + 8
+
+
+class _ChunkReader(object):
+    """Read chunks of rows to sort, of no more than `buffersize` rows if
+    `buffersize` is an `int`, or that fit within `buffersize` bytes if
+    `buffersize` is a string such as ``'512MB'``, in which case row sizes are
+    estimated by sampling as each chunk is read. Returns the rows read and
+    whether the source iterator is exhausted."""
+
+    def __init__(self, buffersize, samplesize=100, maxbatch=1000):
+        if isinstance(buffersize, string_types):
+            self.nrows = None
+            self.nbytes = _parsebytes(buffersize)
+        else:
+            self.nrows = buffersize
+            self.nbytes = None
+        self.samplesize = samplesize
+        self.maxbatch = maxbatch
+
+    def share(self, n):
+        """Return a reader for chunks of which `n` may be held in memory at
+        once, each within an equal share of a memory budget."""
+
+        if self.nbytes is None:
+            return self
+        reader = _ChunkReader(None, self.samplesize, self.maxbatch)
+        reader.nbytes = max(1, self.nbytes // n)
+        return reader
+
+    def read(self, it):
+        if self.nbytes is not None:
+            return self._readbytes(it)
+        rows = list(itertools.islice(it, 0, self.nrows))
+        return rows, self.nrows is None or len(rows) < self.nrows
+
+    def _readbytes(self, it):
+        samplesize = self.samplesize
+        budget = self.nbytes
+        rows = []
+        used = 0
+        # read rows in batches, estimating the size of each batch from a
+        # sample, and make each batch half as many rows as are estimated to
+        # fit in the remaining budget (up to `maxbatch` rows), so the estimate
+        # adapts as the chunk fills and to changes in row sizes during the run;
+        # the first batch is a single row, as nothing is known about row sizes
+        # yet and the budget may be tiny
+        step = 1
+        while step > 0:
+            batch = list(itertools.islice(it, 0, step))
+            if batch:
+                rows.extend(batch)
+                sample = batch[::max(1, len(batch) // samplesize)]
+                rowsize = sum(map(_rowsizeof, sample)) / len(sample)
+                used += int(rowsize * len(batch))
+            if len(batch) < step:
+                return rows, True
+            # assume rows are at least as big as in the latest batch
+            rowsize = max(rowsize, used / len(rows))
+            remaining = int((budget - used) // rowsize)
+            if remaining > samplesize:
+                step = min(remaining // 2, self.maxbatch)
+            else:
+                step = remaining
+        return rows, False
+
+
+# Types whose values sort natively in the same order as when wrapped in
+# Comparable, as long as all values of a key field belong to the same family.
+_native_families = {
+    text_type: 'text',
+    binary_type: 'binary',
+    datetime.date: 'date',
+    datetime.datetime: 'datetime',
+    datetime.time: 'time',
+}
+for _t in numeric_types:
+    _native_families[_t] = 'numeric'
+
+
+def _nativefamilies(rows, indices):
+    """Return a tuple giving the native type family of each key field in
+    the given rows, or `None` if the key values cannot be compared natively
+    in the same order as :class:`petl.comparison.Comparable` would."""
+
+    families = list()
+    for i in indices:
+        try:
+            values = list(map(operator.itemgetter(i), rows))
+        except IndexError:
+            return None
+        fams = set(_native_families.get(t) for t in set(map(type, values)))
+        if len(fams) != 1:
+            return None
+        fam = fams.pop()
+        if fam is None:
+            return None
+        if fam in ('datetime', 'time'):
+            # naive and aware values cannot be compared with each other
+            aware = set(v.utcoffset() is None for v in values)
+            if len(aware) > 1:
+                return None
+            fam = fam, aware.pop()
+        families.append(fam)
+    return tuple(families)
+
+
+class _ChunkSorter(object):
+    """Sort chunks of rows by the given key field indices, using plain
+    key values for as long as every chunk seen so far has natively comparable
+    keys of consistent types, and falling back to
+    :class:`petl.comparison.Comparable` keys for that chunk and all further
+    chunks otherwise. Chunks sorted natively are also correctly ordered
+    according to the Comparable keys, so the two kinds of chunk can be merged
+    using the final value of `getkey`."""
+
+    def __init__(self, indices, reverse=False, native=True):
+        self.indices = indices
+        self.reverse = reverse
+        self.native = native
+        self.families = None
+        self.nativekey = operator.itemgetter(*indices)
+        self.comparablekey = comparable_itemgetter(*indices)
+
+    @property
+    def getkey(self):
+        if self.native:
+            return self.nativekey
+        return self.comparablekey
+
+    def update(self, families):
+        # account for key types found in a chunk, which may have been sorted
+        # elsewhere
+        if self.native:
+            if families is None or (self.families is not None
+                                    and families != self.families):
+                debug('falling back to comparable sort keys')
+                self.native = False
+            else:
+                self.families = families
+
+    def sort(self, rows):
+        if not rows:
+            return
+        if self.native:
+            self.update(_nativefamilies(rows, self.indices))
+        rows.sort(key=self.getkey, reverse=self.reverse)
+
+
 class _Keyed(namedtuple('Keyed', ['key', 'obj'])):
     #  Override default behavior of namedtuple comparisons, only keys need to be compared for heapmerge
     def __eq__(self, other):
@@ -220,7 +587,7 @@ def _mergesorted(key=None, reverse=False, *iterables):
 
 class SortView(Table):
     def __init__(self, source, key=None, reverse=False, buffersize=None,
-                 tempdir=None, cache=True):
+                 tempdir=None, cache=True, workers=None):
         self.source = source
         self.key = key
         self.reverse = reverse
@@ -230,6 +597,13 @@ class SortView(Table):
             self.buffersize = buffersize
         self.tempdir = tempdir
         self.cache = cache
+        self.workers = _checkworkers(workers)
+        self.blocksize = config.sort_blocksize
+        self.compression = config.sort_compression
+        self.max_fanin = config.sort_max_fanin
+        # N.B., check the buffer size here, to raise any errors early
+        self._reader = _ChunkReader(self.buffersize)
+        self.spillstats = None
         self._hdrcache = None
         self._memcache = None
         self._filecache = None
@@ -237,6 +611,7 @@ class SortView(Table):
 
     def clearcache(self):
         debug('clear cache')
+        self.spillstats = None
         self._hdrcache = None
         self._memcache = None
         self._filecache = None
@@ -266,7 +641,7 @@ class SortView(Table):
         filenames = list(map(operator.attrgetter('name'), filecache))
         debug('iterate from file cache: %r', filenames)
         yield tuple(self._hdrcache)
-        chunkiters = [_iterchunk(fn) for fn in filenames]
+        chunkiters = [_iterchunk(fn, self.compression) for fn in filenames]
         rows = _mergesorted(self._getkey, self.reverse, *chunkiters)
         try:
             for row in rows:
@@ -294,18 +669,21 @@ class SortView(Table):
             indices = asindices(hdr, key)
         else:
             indices = range(len(hdr))
-        # now use field indices to construct a _getkey function
+        # now use field indices to construct a sorter, which will determine
+        # the _getkey function
         # TODO check if this raises an exception on short rows
-        getkey = comparable_itemgetter(*indices)
-
-        # TODO support native comparison
+        sorter = _ChunkSorter(indices, reverse=reverse,
+                              native=config.sort_native_keys)
 
         # initialise the first chunk
-        rows = list(itertools.islice(it, 0, self.buffersize))
-        rows.sort(key=getkey, reverse=reverse)
+        readchunk = self._reader.read
+        rows, exhausted = readchunk(it)
+        sorter.sort(rows)
+        # N.B., the first chunk is a full chunk if we need to sort in chunks
+        chunklen = len(rows)
 
         # have we exhausted the source iterator?
-        if self.buffersize is None or len(rows) < self.buffersize:
+        if exhausted:
             # yes, table fits within sort buffer
 
             if self.cache:
@@ -313,7 +691,7 @@ class SortView(Table):
                 self._hdrcache = hdr
                 self._memcache = rows
                 # actually not needed to iterate from memcache
-                self._getkey = getkey
+                self._getkey = sorter.getkey
 
             for row in rows:
                 yield tuple(row)
@@ -323,26 +701,38 @@ class SortView(Table):
 
             chunkfiles = []
 
-            while rows:
-
-                # dump the chunk
-                with NamedTemporaryFile(dir=self.tempdir, delete=False,
-                                        mode='wb') as f:
-                    # N.B., we **don't** want the file to be deleted on close,
-                    # but we **do** want the file to be deleted when self
-                    # is garbage collected, or when the program exits. When
-                    # all references to the wrapper are gone, the file should
-                    # get deleted.
-                    wrapper = _NamedTempFileDeleteOnGC(f.name)
-                    debug('created temporary chunk file %s' % f.name)
-                    for row in rows:
-                        pickle.dump(row, f, protocol=-1)
-                    f.flush()
-                    chunkfiles.append(wrapper)
-
-                # grab the next chunk
-                rows = list(itertools.islice(it, 0, self.buffersize))
-                rows.sort(key=getkey, reverse=reverse)
+            if self.workers is not None and self.workers > 1:
+                # N.B., the first chunk has already been sorted in this
+                # process
+                fn = _writechunk(rows, self.tempdir, self.blocksize,
+                                 self.compression)
+                chunkfiles.append(_NamedTempFileDeleteOnGC(fn))
+                rows = None
+                self._sortchunksparallel(it, sorter, chunkfiles)
+
+            else:
+
+                while rows:
+
+                    # dump the chunk
+                    fn = _writechunk(rows, self.tempdir, self.blocksize,
+                                     self.compression)
+                    chunkfiles.append(_NamedTempFileDeleteOnGC(fn))
+
+                    # grab the next chunk
+                    rows, _ = readchunk(it)
+                    sorter.sort(rows)
+
+            # N.B., if any chunk fell back to comparable keys, all chunks
+            # must be merged using comparable keys
+            getkey = sorter.getkey
+
+            self.spillstats = stats = dict(runs=len(chunkfiles), passes=1,
+                                           bytes=_filesizes(chunkfiles))
+            chunkfiles = self._cascademerge(chunkfiles, getkey, chunklen,
+                                            stats)
+            info('sorted %(runs)s runs in %(passes)s merge passes, '
+                 'spilling %(bytes)s bytes' % stats)
 
             if self.cache:
                 debug('caching files')
@@ -350,10 +740,102 @@ class SortView(Table):
                 self._filecache = chunkfiles
                 self._getkey = getkey
 
-            chunkiters = [_iterchunk(f.name) for f in chunkfiles]
+            chunkiters = [_iterchunk(f.name, self.compression)
+                          for f in chunkfiles]
             for row in _mergesorted(getkey, reverse, *chunkiters):
                 yield tuple(row)
 
+    def _sortchunksparallel(self, it, sorter, chunkfiles):
+        from concurrent.futures import ProcessPoolExecutor
+
+        # N.B., chunk files are kept in input order, so the merge is stable
+        pending = []
+
+        def collect(future):
+            fn, families = future.result()
+            chunkfiles.append(_NamedTempFileDeleteOnGC(fn))
+            sorter.update(families)
+
+        debug('sorting chunks with %s workers' % self.workers)
+        # N.B., up to one chunk per worker is held while waiting to be sorted,
+        # plus the chunk being read, so a memory budget is shared among them
+        readchunk = self._reader.share(self.workers + 1).read
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                while True:
+                    rows, _ = readchunk(it)
+                    if not rows:
+                        break
+                    # limit the number of chunks held in memory at once
+                    if len(pending) >= self.workers:
+                        collect(pending.pop(0))
+                    pending.append(executor.submit(
+                        _sortwritechunk, rows, sorter.indices, sorter.reverse,
+                        sorter.native, self.tempdir, self.blocksize,
+                        self.compression
+                    ))
+                    del rows
+                while pending:
+                    collect(pending.pop(0))
+        except BaseException:
+            # N.B., the executor waits for outstanding chunks on exit, so
+            # make sure files written for those are deleted too
+            for future in pending:
+                if not future.cancelled() and future.exception() is None:
+                    fn, _ = future.result()
+                    chunkfiles.append(_NamedTempFileDeleteOnGC(fn))
+            raise
+
+    def _cascademerge(self, chunkfiles, getkey, chunklen, stats):
+        # merge groups of chunks into intermediate chunks until there are few
+        # enough chunks to merge all at once
+        max_fanin = self.max_fanin
+        if max_fanin is None:
+            return chunkfiles
+        if max_fanin < 2:
+            raise ArgumentError('sort_max_fanin must be at least 2, found %r'
+                                % max_fanin)
+        while len(chunkfiles) > max_fanin:
+            debug('merge pass over %s chunks' % len(chunkfiles))
+            merged = []
+            # N.B., merge consecutive chunks, so the merge is stable, and
+            # remove each group from the list so its files can be deleted
+            # once merged
+            while chunkfiles:
+                group = chunkfiles[:max_fanin]
+                del chunkfiles[:max_fanin]
+                if len(group) == 1:
+                    merged.extend(group)
+                    continue
+                chunkiters = [_iterchunk(f.name, self.compression)
+                              for f in group]
+                rows = _mergesorted(getkey, self.reverse, *chunkiters)
+                # N.B., don't write the whole merged run as a single block
+                fn = _writechunk(rows, self.tempdir,
+                                 self.blocksize or chunklen,
+                                 self.compression)
+                wrapper = _NamedTempFileDeleteOnGC(fn)
+                merged.append(wrapper)
+                stats['bytes'] += _filesizes([wrapper])
+                # N.B., files are deleted when the last reference to their
+                # wrapper goes, which must happen after they are closed
+                del chunkiters, rows, group
+            chunkfiles = merged
+            stats['passes'] += 1
+        return chunkfiles
+
+
+def _filesizes(chunkfiles):
+    return sum(os.path.getsize(f.name) for f in chunkfiles)
+
+
+def _checkworkers(workers):
+    # N.B., worker processes are run via concurrent.futures, which isn't in
+    # the Python 2 standard library
+    if workers is not None and PY2:
+        raise ArgumentError('workers requires Python 3')
+    return workers
+
 
 class _NamedTempFileDeleteOnGC(object):
 
@@ -583,3 +1065,282 @@ def issorted(table, key=None, reverse=False, strict=False):
 
 
 Table.issorted = issorted
+
+
+def _keyfields(key):
+    # key fields as a tuple, as given
+    if key is None:
+        return None
+    elif isinstance(key, (list, tuple)):
+        return tuple(key)
+    return key,
+
+
+def _sortedview(table, key, reverse=False):
+    # is the table a sort view known to be sorted by the given key, either
+    # because it is sorted by the same key or by a key with the same fields
+    # as a prefix?
+    if not isinstance(table, SortView) or bool(table.reverse) != bool(reverse):
+        return False
+    fields = _keyfields(key)
+    sortfields = _keyfields(table.key)
+    return (fields is not None and sortfields is not None
+            and sortfields[:len(fields)] == fields)
+
+
+def _presort(table, key, presorted=False, buffersize=None, tempdir=None,
+             cache=True):
+    # prepare a table for merging by key, as determined by the `presorted`
+    # argument to functions which merge tables
+    if presorted is True:
+        return table
+    elif not presorted:
+        return sort(table, key, buffersize=buffersize, tempdir=tempdir,
+                    cache=cache)
+    elif presorted == 'verify':
+        return VerifySortedView(table, key)
+    elif presorted == 'fallback':
+        return FallbackSortView(table, key, buffersize=buffersize,
+                                tempdir=tempdir, cache=cache)
+    raise ArgumentError("presorted must be True, False, 'verify' or "
+                        "'fallback', found %r" % (presorted,))
+
+
+def _verifying(*tables):
+    # start iterating any tables whose sort order is being verified, returning
+    # the tables to merge with those replaced by their iterators, and the
+    # iterators themselves, so the rest of the rows of this iteration can be
+    # checked via _iterverifyrest once merging is finished
+    tables = list(tables)
+    its = list()
+    for i, table in enumerate(tables):
+        if isinstance(table, VerifySortedView):
+            tables[i] = it = iter(table)
+            its.append(it)
+    return tables, its
+
+
+def _iterverifyrest(rows, its):
+    # after yielding rows merged from tables, check the rest of the rows from
+    # iterators over tables where sort order is being verified
+    for row in rows:
+        yield row
+    for it in its:
+        for _ in it:
+            pass
+
+
+class VerifySortedView(Table):
+    """Table yielding rows from the source table, checking they are sorted
+    by the given key as they are iterated, and raising
+    :class:`petl.errors.NotSortedError` if not. Where not all rows are
+    needed, e.g., when merging tables, the remaining rows can be checked by
+    exhausting the iterator."""
+
+    def __init__(self, source, key):
+        self.source = source
+        self.key = key
+
+    def __iter__(self):
+        return self._iterverify()
+
+    def _iterverify(self):
+        it = iter(self.source)
+        hdr = next(it)
+        yield tuple(hdr)
+        getkey = comparable_itemgetter(*asindices(hdr, self.key))
+        prev = None
+        for i, row in enumerate(it):
+            k = getkey(row)
+            if i and k < prev:
+                raise NotSortedError(self.key, prev.inner, k.inner)
+            prev = k
+            yield row
+
+
+class FallbackSortView(Table):
+    """Table yielding rows from the source table if it is sorted by the given
+    key, checked via :func:`petl.transform.sorts.issorted` when first
+    iterated, otherwise sorting it."""
+
+    def __init__(self, source, key, buffersize=None, tempdir=None,
+                 cache=True):
+        self.source = source
+        self.key = key
+        self.buffersize = buffersize
+        self.tempdir = tempdir
+        self.cache = cache
+        self._sorted = None
+
+    def __iter__(self):
+        if self._sorted is None:
+            if issorted(self.source, self.key):
+                self._sorted = self.source
+            else:
+                debug('table is not sorted by %r, sorting' % (self.key,))
+                self._sorted = sort(self.source, self.key,
+                                    buffersize=self.buffersize,
+                                    tempdir=self.tempdir, cache=self.cache)
+        return iter(self._sorted)
+
+
+def topn(table, n, key=None, reverse=False):
+    """
+    Select the first `n` data rows of the table as sorted by the given key,
+    without sorting the whole table. E.g.::
+
+        >>> import petl as etl
+        >>> table1 = [['foo', 'bar'],
+        ...           ['C', 2],
+        ...           ['A', 9],
+        ...           ['A', 6],
+        ...           ['F', 1],
+        ...           ['D', 10]]
+        >>> table2 = etl.topn(table1, 3, 'bar', reverse=True)
+        >>> table2
+        +-----+-----+
+        | foo | bar |
+        +=====+=====+
+        | 'D' |  10 |
+        +-----+-----+
+        | 'A' |   9 |
+        +-----+-----+
+        | 'A' |   6 |
+        +-----+-----+
+
+    The output is the same as ``etl.head(etl.sort(table, key, reverse), n)``,
+    but the rows are selected in a single pass through the table using a
+    bounded heap (via :func:`heapq.nsmallest` or :func:`heapq.nlargest`), so
+    no more than `n` rows are held in memory and nothing is written to
+    temporary files. The same can be done via the `limit` argument to
+    :func:`sort`.
+
+    See also :func:`petl.transform.sorts.grouptopn`.
+
+    """
+
+    return TopNView(table, n, key=key, reverse=reverse)
+
+
+Table.topn = topn
+
+
+class TopNView(Table):
+
+    def __init__(self, source, n, key=None, reverse=False):
+        self.source = source
+        self.n = n
+        self.key = key
+        self.reverse = reverse
+
+    def __iter__(self):
+        return itertopn(self.source, self.n, self.key, self.reverse)
+
+
+def itertopn(source, n, key, reverse):
+    it = iter(source)
+    hdr = next(it)
+    yield tuple(hdr)
+
+    if key is not None:
+        indices = asindices(hdr, key)
+    else:
+        indices = range(len(hdr))
+    getkey = comparable_itemgetter(*indices)
+
+    if reverse:
+        rows = heapq.nlargest(n, it, key=getkey)
+    else:
+        rows = heapq.nsmallest(n, it, key=getkey)
+    for row in rows:
+        yield tuple(row)
+
+
+def grouptopn(table, key, value, n, reverse=False):
+    """
+    Group by the `key` field then select the first `n` rows within each
+    group as sorted by the `value` field. E.g.::
+
+        >>> import petl as etl
+        >>> table1 = [['foo', 'bar', 'baz'],
+        ...           ['A', 1, True],
+        ...           ['C', 7, False],
+        ...           ['B', 2, False],
+        ...           ['C', 9, True],
+        ...           ['A', 5, False],
+        ...           ['C', 8, True]]
+        >>> table2 = etl.grouptopn(table1, 'foo', 'bar', 2, reverse=True)
+        >>> table2
+        +-----+-----+-------+
+        | foo | bar | baz   |
+        +=====+=====+=======+
+        | 'A' |   5 | False |
+        +-----+-----+-------+
+        | 'A' |   1 | True  |
+        +-----+-----+-------+
+        | 'B' |   2 | False |
+        +-----+-----+-------+
+        | 'C' |   9 | True  |
+        +-----+-----+-------+
+        | 'C' |   8 | True  |
+        +-----+-----+-------+
+
+    Groups are output in order of the `key` field. The table is not sorted,
+    rather the rows are selected in a single pass using bounded buffers, so
+    no more than about ``2 * n`` rows per group are held in memory.
+
+    See also :func:`petl.transform.sorts.topn`,
+    :func:`petl.transform.reductions.groupselectmax`.
+
+    """
+
+    return GroupTopNView(table, key, value, n, reverse=reverse)
+
+
+Table.grouptopn = grouptopn
+
+
+class GroupTopNView(Table):
+
+    def __init__(self, source, key, value, n, reverse=False):
+        self.source = source
+        self.key = key
+        self.value = value
+        self.n = n
+        self.reverse = reverse
+
+    def __iter__(self):
+        return itergrouptopn(self.source, self.key, self.value, self.n,
+                             self.reverse)
+
+
+def itergrouptopn(source, key, value, n, reverse):
+    it = iter(source)
+    hdr = next(it)
+    yield tuple(hdr)
+
+    getgroup = operator.itemgetter(*asindices(hdr, key))
+    getkey = comparable_itemgetter(*asindices(hdr, value))
+    if reverse:
+        select = heapq.nlargest
+    else:
+        select = heapq.nsmallest
+
+    # buffer rows for each group, and whenever a buffer reaches twice the
+    # number of rows needed, cut it back down to the first n rows, which
+    # keeps rows with equal values in input order
+    buffers = dict()
+    limit = max(2 * n, 1)
+    for row in it:
+        group = getgroup(row)
+        buf = buffers.get(group)
+        if buf is None:
+            buffers[group] = [row]
+        else:
+            buf.append(row)
+            if len(buf) >= limit:
+                buffers[group] = select(n, buf, key=getkey)
+
+    for group in sorted(buffers, key=Comparable):
+        for row in select(n, buffers[group], key=getkey):
+            yield tuple(row)
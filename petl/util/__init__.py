@@ -7,6 +7,10 @@ from petl.util.base import Table, Record, values, header, data, \
 from petl.util.lookups import lookup, lookupone, dictlookup, dictlookupone, \
     recordlookup, recordlookupone
 
+from petl.util.keyindex import keyindex, KeyIndex
+
+from petl.util.bloom import bloomfilter, BloomFilter
+
 from petl.util.parsers import dateparser, timeparser, datetimeparser, \
     numparser, boolparser
 
@@ -21,6 +25,8 @@ from petl.util.counting import parsecounter, parsecounts, typecounter, \
 from petl.util.materialise import listoflists, listoftuples, tupleoflists, \
     tupleoftuples, columns, facetcolumns
 
+from petl.util.columnar import columnar, ColumnarTable
+
 from petl.util.timing import progress, log_progress, clock
 
 from petl.util.statistics import limits, stats
@@ -0,0 +1,201 @@
+from __future__ import absolute_import, print_function, division
+
+
+import math
+import operator
+
+
+from petl.errors import ArgumentError
+from petl.util.base import Table, asindices
+
+
+def bloomfilter(table, key=None, fpp=0.01, capacity=None, maxbytes=None):
+    """
+    Construct a :class:`petl.util.bloom.BloomFilter` holding the values of
+    the given key field or fields from the given table, or whole rows (as
+    tuples) if no key is given. E.g.::
+
+        >>> import petl as etl
+        >>> table1 = [['id', 'colour'],
+        ...           [1, 'blue'],
+        ...           [3, 'red']]
+        >>> bf = etl.bloomfilter(table1, 'id')
+        >>> 1 in bf
+        True
+        >>> 2 in bf
+        False
+        >>> # select rows which may have a match, e.g., before a join
+        ... table2 = [['id', 'shape'],
+        ...           [1, 'circle'],
+        ...           [2, 'square'],
+        ...           [3, 'ellipse']]
+        >>> etl.selectin(table2, 'id', bf)
+        +----+-----------+
+        | id | shape     |
+        +====+===========+
+        |  1 | 'circle'  |
+        +----+-----------+
+        |  3 | 'ellipse' |
+        +----+-----------+
+
+    A Bloom filter may report that a value is present when it is not, with
+    probability no greater than `fpp` (the false positive probability), but
+    never reports that a value is absent when it is present. See
+    :class:`petl.util.bloom.BloomFilter` for the `capacity` and `maxbytes`
+    arguments.
+
+    """
+
+    it = iter(table)
+    hdr = next(it)
+    if key is None:
+        getkey = tuple
+    else:
+        keyindices = asindices(hdr, key)
+        assert len(keyindices) > 0, 'no key selected'
+        getkey = operator.itemgetter(*keyindices)
+    bloom = BloomFilter(capacity=capacity, fpp=fpp, maxbytes=maxbytes)
+    add = bloom.add
+    for row in it:
+        add(getkey(row))
+    return bloom
+
+
+Table.bloomfilter = bloomfilter
+
+
+# capacity of the first slice of a Bloom filter where no capacity is given
+_bloom_initialcapacity = 1024
+
+
+class BloomFilter(object):
+    """Set-like object holding hashes of values added to it in a bit array,
+    using little memory, but where membership tests may give false positives
+    with probability `fpp`. Values must be hashable. N.B., hashes of strings
+    differ between Python processes, so a filter should only be used within
+    the process where it is constructed.
+
+    The number of bits and hash functions are chosen for the given
+    `capacity`. If `capacity` is None, the filter grows as values are added
+    by adding slices of twice the capacity of the previous slice, with
+    tighter false positive probabilities so the overall probability stays
+    within `fpp`. If `maxbytes` is given, the filter doesn't grow beyond
+    that number of bytes, and the false positive probability then increases
+    as more values are added, see the :attr:`fpp` property.
+
+    """
+
+    def __init__(self, capacity=None, fpp=0.01, maxbytes=None):
+        if not 0 < fpp < 1:
+            raise ArgumentError('fpp must be between 0 and 1, found %r'
+                                % (fpp,))
+        self.capacity = capacity
+        self.maxbytes = maxbytes
+        self.count = 0
+        self._fpp = fpp
+        self._slices = list()
+        if capacity is None:
+            # the first slice gets half the error budget, the next a
+            # quarter, etc.
+            self._addslice(_bloom_initialcapacity, fpp / 2)
+        else:
+            self._addslice(capacity, fpp)
+
+    def _addslice(self, capacity, fpp):
+        nbits = _bloombits(capacity, fpp)
+        if self.maxbytes is not None:
+            nbits = max(8, min(nbits, (self.maxbytes - self.nbytes) * 8))
+        self._slices.append(_BloomSlice(capacity, nbits))
+
+    def add(self, value):
+        """Add a value to the filter."""
+
+        current = self._slices[-1]
+        if (current.count >= current.capacity and self.capacity is None
+                and not self._full()):
+            n = len(self._slices)
+            self._addslice(current.capacity * 2, self._fpp / 2 ** (n + 1))
+            current = self._slices[-1]
+        current.add(hash((value,)), hash((value, None)))
+        self.count += 1
+
+    def update(self, values):
+        """Add values to the filter."""
+
+        for v in values:
+            self.add(v)
+
+    def _full(self):
+        return self.maxbytes is not None and self.nbytes >= self.maxbytes
+
+    def __contains__(self, value):
+        h1 = hash((value,))
+        h2 = hash((value, None))
+        for s in self._slices:
+            if s.contains(h1, h2):
+                return True
+        return False
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        """Number of bytes held in bit arrays."""
+
+        return sum(len(s.bits) for s in self._slices)
+
+    @property
+    def fpp(self):
+        """Estimated probability of a false positive given the number of
+        values added."""
+
+        p = 1.0
+        for s in self._slices:
+            p *= 1 - s.fpp()
+        return 1 - p
+
+    def __repr__(self):
+        return '%s(count=%s, nbytes=%s, fpp=%.3g)' % (
+            type(self).__name__, self.count, self.nbytes, self.fpp
+        )
+
+
+def _bloombits(capacity, fpp):
+    # optimal number of bits for the given number of values
+    n = max(capacity, 1)
+    return max(8, int(math.ceil(-n * math.log(fpp) / math.log(2) ** 2)))
+
+
+class _BloomSlice(object):
+
+    __slots__ = ('capacity', 'count', 'nbits', 'nhashes', 'bits')
+
+    def __init__(self, capacity, nbits):
+        self.capacity = max(capacity, 1)
+        self.count = 0
+        self.nbits = nbits
+        # optimal number of hash functions for the number of bits
+        self.nhashes = max(1, int(round(nbits / self.capacity
+                                        * math.log(2))))
+        self.bits = bytearray((nbits + 7) // 8)
+
+    def add(self, h1, h2):
+        # N.B., derive hash functions by double hashing
+        bits, nbits = self.bits, self.nbits
+        for i in range(self.nhashes):
+            pos = (h1 + i * h2) % nbits
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def contains(self, h1, h2):
+        bits, nbits = self.bits, self.nbits
+        for i in range(self.nhashes):
+            pos = (h1 + i * h2) % nbits
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def fpp(self):
+        k = self.nhashes
+        return (1 - math.exp(-k * self.count / self.nbits)) ** k
@@ -0,0 +1,161 @@
+from __future__ import absolute_import, print_function, division
+
+
+from array import array
+from itertools import compress
+from petl.compat import izip, text_type, integer_types, PY2
+
+
+from petl.errors import ArgumentError, FieldSelectionError
+from petl.util.base import Table
+
+
+def columnar(table, header=None):
+    """
+    Load all values from the given table into a
+    :class:`petl.util.columnar.ColumnarTable`, storing the values of each
+    field in a single buffer. E.g.::
+
+        >>> import petl as etl
+        >>> table1 = [['foo', 'bar', 'baz'],
+        ...           ['a', 1, 2.5],
+        ...           ['b', 3, 4.4],
+        ...           ['c', 7, 0.1]]
+        >>> table2 = etl.columnar(table1)
+        >>> table2.column('bar')
+        array('q', [1, 3, 7])
+        >>> table2.column('baz')
+        array('d', [2.5, 4.4, 0.1])
+        >>> table2.column('foo')
+        ['a', 'b', 'c']
+
+    Fields where all values are of type :class:`int` (which fit in 64 bits) or
+    all values are of type :class:`float` are stored in typed :class:`array`
+    buffers, other fields are stored in lists. Short rows are padded with
+    None.
+
+    """
+
+    it = iter(table)
+    hdr = next(it)
+    if header is None:
+        header = hdr
+    cols = [list() for _ in hdr]
+    appends = [c.append for c in cols]
+    n = len(hdr)
+    for row in it:
+        if len(row) < n:
+            row = tuple(row) + (None,) * (n - len(row))
+        for append, v in izip(appends, row):
+            append(v)
+    return ColumnarTable([_tobuffer(c) for c in cols], header=header)
+
+
+Table.columnar = columnar
+
+
+_inttypecode = 'l' if PY2 else 'q'
+
+
+def _tobuffer(vals):
+    # store values in a typed array where this is lossless
+    if vals:
+        t = type(vals[0])
+        if t is int and all(type(v) is int for v in vals):
+            try:
+                return array(_inttypecode, vals)
+            except OverflowError:
+                pass
+        elif t is float and all(type(v) is float for v in vals):
+            return array('d', vals)
+    return vals
+
+
+class ColumnarTable(Table):
+    """Table holding the values of each field in a single buffer, which may
+    be a list, a typed :class:`array`, or a numpy array or pandas series.
+    Rows are constructed as tables are iterated, but some functions use the
+    buffers directly, e.g., :func:`petl.util.statistics.stats`,
+    :func:`petl.util.statistics.limits`,
+    :func:`petl.util.counting.valuecounts`, and
+    :func:`petl.transform.selects.select`,
+    :func:`petl.transform.conversions.convert` and
+    :func:`petl.transform.joins.join` where values are selected, converted or
+    joined field by field when the view is iterated.
+
+    All buffers must be of the same length. If `header` is not given, fields
+    are named 'f0', 'f1', etc.
+
+    """
+
+    def __init__(self, cols, header=None):
+        self.cols = list(cols)
+        if header is None:
+            header = ['f%s' % i for i in range(len(self.cols))]
+        self.hdr = tuple(header)
+        if len(self.hdr) != len(self.cols):
+            raise ArgumentError('expected %s fields in header, found %s'
+                                % (len(self.cols), len(self.hdr)))
+        if len(set(len(c) for c in self.cols)) > 1:
+            raise ArgumentError('columns must be of the same length')
+
+    def __iter__(self):
+        yield self.hdr
+        for row in izip(*self.cols):
+            yield row
+
+    def column(self, field):
+        """Return the buffer holding the values of the given field, which
+        can be a field name or index (starting from zero)."""
+
+        return self.cols[self._columnindex(field)]
+
+    def _columnindex(self, field):
+        hdr = self.hdr
+        if field in hdr:
+            return hdr.index(field)
+        elif field in list(map(text_type, hdr)):
+            return list(map(text_type, hdr)).index(field)
+        elif isinstance(field, integer_types) and field < len(hdr):
+            return field
+        else:
+            raise FieldSelectionError(field)
+
+    def take(self, selected):
+        """Return a new :class:`petl.util.columnar.ColumnarTable` holding the
+        rows where the corresponding value of `selected` is true."""
+
+        if getattr(selected, 'dtype', None) is None:
+            selected = list(map(bool, selected))
+        return ColumnarTable([_takebuffer(c, selected) for c in self.cols],
+                             header=self.hdr)
+
+    def withcolumns(self, replacements):
+        """Return a new :class:`petl.util.columnar.ColumnarTable` where the
+        buffers at the given indices are replaced."""
+
+        cols = list(self.cols)
+        for i, c in replacements.items():
+            cols[i] = c
+        return ColumnarTable(cols, header=self.hdr)
+
+
+def _takebuffer(buf, selected):
+    if isinstance(buf, array):
+        return array(buf.typecode, compress(buf, selected))
+    elif hasattr(buf, 'dtype'):
+        import numpy as np
+        # N.B., pandas series are indexed by position with boolean arrays
+        return buf[np.asarray(selected, dtype=bool)]
+    else:
+        return list(compress(buf, selected))
+
+
+def _numericbuffer(buf):
+    # does the buffer only hold integers or floats, not missing values?
+    if isinstance(buf, array):
+        return buf.typecode not in ('c', 'u')
+    else:
+        kind = getattr(getattr(buf, 'dtype', None), 'kind', None)
+        return kind in ('i', 'u', 'f')
+
@@ -6,6 +6,7 @@ from petl.compat import string_types, maketrans
 
 
 from petl.util.base import values, Table, data, wrap
+from petl.util.columnar import ColumnarTable
 
 
 def nrows(table):
@@ -75,6 +76,12 @@ def valuecounter(table, *field, **kwargs):
     """
 
     missing = kwargs.get('missing', None)
+    if isinstance(table, ColumnarTable):
+        # count values straight from the buffers
+        bufs = [table.column(f) for f in field]
+        if len(bufs) == 1:
+            return Counter(bufs[0])
+        return Counter(zip(*bufs))
     counter = Counter()
     for v in values(table, field, missing=missing):
         try:
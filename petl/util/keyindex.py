@@ -0,0 +1,277 @@
+from __future__ import absolute_import, print_function, division
+
+
+import mmap
+import struct
+import operator
+import itertools
+from bisect import bisect_left
+from collections import OrderedDict
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+from petl.compat import pickle, next
+
+
+from petl.comparison import Comparable
+from petl.errors import ArgumentError, FieldSelectionError
+from petl.util.base import Table, asindices
+
+
+# key index files hold pickled blocks of rows sorted by key, followed by a
+# pickled directory holding the first key and offset of each block, then a
+# footer holding the offset of the directory
+_magic = b'PETLKIX1'
+_footer = struct.Struct('<Q8s')
+
+
+def keyindex(table, key, path, blocksize=1024, cachesize=256, presorted=False,
+             buffersize=None, tempdir=None):
+    """
+    Build a persistent index of the rows of the given table by key, written
+    to the file at `path`, and return it opened as a
+    :class:`petl.util.keyindex.KeyIndex`. E.g.::
+
+        >>> import petl as etl
+        >>> table1 = [['foo', 'bar'],
+        ...           ['b', 2],
+        ...           ['a', 1],
+        ...           ['b', 3]]
+        >>> idx = etl.keyindex(table1, 'foo', 'example.idx')
+        >>> idx.get('b')
+        [('b', 2), ('b', 3)]
+        >>> idx.close()
+        >>> # the index can then be opened again later
+        ... idx = etl.KeyIndex('example.idx')
+        >>> lkp = etl.lookup(idx, 'foo', 'bar')
+        >>> lkp['b']
+        [2, 3]
+        >>> lkp = etl.lookupone(idx, 'foo')
+        >>> lkp['a']
+        ('a', 1)
+        >>> table2 = [['foo', 'baz'],
+        ...           ['a', True],
+        ...           ['c', False]]
+        >>> etl.lookupjoin(table2, idx, key='foo')
+        +-----+-------+------+
+        | foo | baz   | bar  |
+        +=====+=======+======+
+        | 'a' | True  |    1 |
+        +-----+-------+------+
+        | 'c' | False | None |
+        +-----+-------+------+
+
+        >>> idx.close()
+        >>> import os
+        >>> os.remove('example.idx')
+
+    Rows are sorted by key (unless `presorted` is True, see also the
+    discussion of the `buffersize` and `tempdir` arguments under the
+    :func:`petl.transform.sorts.sort` function), then written in blocks of
+    `blocksize` rows, and the first key of each block is held in memory when
+    the index is opened, so each lookup reads a single block where keys are
+    unique. The `cachesize` most recently read blocks are cached.
+
+    """
+
+    if not presorted:
+        from petl.transform.sorts import sort
+        table = sort(table, key, buffersize=buffersize, tempdir=tempdir,
+                     cache=False)
+
+    it = iter(table)
+    hdr = tuple(next(it))
+    keyindices = asindices(hdr, key)
+    assert len(keyindices) > 0, 'no key selected'
+    getkey = operator.itemgetter(*keyindices)
+
+    firstkeys = list()
+    offsets = list()
+    dupkeys = list()
+    nrows = nkeys = 0
+    prev = None
+    with open(path, 'wb') as f:
+        offset = 0
+        while True:
+            rows = [tuple(row) for row in itertools.islice(it, blocksize)]
+            if not rows:
+                break
+            keys = [getkey(row) for row in rows]
+            for k in keys:
+                ck = Comparable(k)
+                if nrows and ck < prev:
+                    raise ArgumentError('table is not sorted by key')
+                if not nrows or not ck == prev:
+                    nkeys += 1
+                elif not dupkeys:
+                    dupkeys.append(k)
+                prev = ck
+                nrows += 1
+            data = pickle.dumps((keys, rows), protocol=-1)
+            f.write(data)
+            firstkeys.append(keys[0])
+            offsets.append(offset)
+            offset += len(data)
+        offsets.append(offset)
+        directory = dict(header=hdr, key=keyindices, firstkeys=firstkeys,
+                         offsets=offsets, nrows=nrows, nkeys=nkeys,
+                         dupkeys=dupkeys)
+        f.write(pickle.dumps(directory, protocol=-1))
+        f.write(_footer.pack(offset, _magic))
+
+    return KeyIndex(path, cachesize=cachesize)
+
+
+Table.keyindex = keyindex
+
+
+class KeyIndex(Table):
+    """Table backed by a key index file written by
+    :func:`petl.util.keyindex.keyindex`, which is memory-mapped when opened.
+    Iterating yields rows sorted by key. Rows for a given key are found by
+    binary search via :meth:`get`, reading blocks through a cache of the
+    `cachesize` most recently used blocks, with hits and misses counted in
+    the `cachestats` attribute.
+
+    :func:`petl.util.lookups.lookup` and the other lookup functions return
+    read-only dictionaries backed by the index when called with a key index
+    and the key it was built on, instead of loading all rows into memory.
+    :func:`petl.transform.joins.lookupjoin` and
+    :func:`petl.transform.hashjoins.hashlookupjoin` look up each key of the
+    left table in the index when it is given as the right table.
+
+    """
+
+    def __init__(self, path, cachesize=256):
+        self.path = path
+        self.cachesize = cachesize
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0,
+                                 access=mmap.ACCESS_READ)
+            if len(self._mm) < _footer.size:
+                raise ArgumentError('not a key index: %r' % path)
+            end = len(self._mm) - _footer.size
+            offset, magic = _footer.unpack(self._mm[end:])
+            if magic != _magic:
+                raise ArgumentError('not a key index: %r' % path)
+            directory = pickle.loads(self._mm[offset:end])
+        except Exception:
+            self._file.close()
+            raise
+        self.hdr = directory['header']
+        self.keyindices = directory['key']
+        self.nrows = directory['nrows']
+        self.nkeys = directory['nkeys']
+        self.dupkeys = directory['dupkeys']
+        self._offsets = directory['offsets']
+        self._firstkeys = [Comparable(k) for k in directory['firstkeys']]
+        self._cache = OrderedDict()
+        self.cachestats = dict(hits=0, misses=0)
+
+    def __iter__(self):
+        yield self.hdr
+        for b in range(len(self._firstkeys)):
+            _, rows = self._readblock(b)
+            for row in rows:
+                yield row
+
+    def close(self):
+        """Close the index file."""
+
+        self._cache.clear()
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def haskey(self, key):
+        """Return True if the index is built on the given key field or
+        fields."""
+
+        try:
+            return asindices(self.hdr, key) == list(self.keyindices)
+        except FieldSelectionError:
+            return False
+
+    def get(self, key):
+        """Return a list of rows with the given key value."""
+
+        return list(self._iterrows(key))
+
+    def _readblock(self, b):
+        start, stop = self._offsets[b], self._offsets[b + 1]
+        return pickle.loads(self._mm[start:stop])
+
+    def _block(self, b):
+        cache = self._cache
+        if b in cache:
+            self.cachestats['hits'] += 1
+            block = cache.pop(b)
+        else:
+            self.cachestats['misses'] += 1
+            keys, rows = self._readblock(b)
+            block = [Comparable(k) for k in keys], rows
+            if len(cache) >= self.cachesize:
+                cache.popitem(last=False)
+        cache[b] = block
+        return block
+
+    def _iterrows(self, key):
+        ck = Comparable(key)
+        firstkeys = self._firstkeys
+        # rows with the key may start in the block before the first block
+        # starting with the key
+        b = max(bisect_left(firstkeys, ck) - 1, 0)
+        while b < len(firstkeys):
+            keys, rows = self._block(b)
+            i = bisect_left(keys, ck)
+            while i < len(keys):
+                if not keys[i] == ck:
+                    return
+                yield rows[i]
+                i += 1
+            b += 1
+            if b < len(firstkeys) and not firstkeys[b] == ck:
+                return
+
+
+class KeyIndexLookup(Mapping):
+    """Read-only dictionary backed by a :class:`petl.util.keyindex.KeyIndex`,
+    see :func:`petl.util.lookups.lookup`."""
+
+    def __init__(self, index, getvalue, one=False):
+        self.index = index
+        self.getvalue = getvalue
+        self.one = one
+
+    def __getitem__(self, key):
+        if self.one:
+            for row in self.index._iterrows(key):
+                return self.getvalue(row)
+            raise KeyError(key)
+        values = [self.getvalue(row) for row in self.index._iterrows(key)]
+        if not values:
+            raise KeyError(key)
+        return values
+
+    def __contains__(self, key):
+        for _ in self.index._iterrows(key):
+            return True
+        return False
+
+    def __iter__(self):
+        it = iter(self.index)
+        next(it)
+        getkey = operator.itemgetter(*self.index.keyindices)
+        for k, _ in itertools.groupby(it, key=getkey):
+            yield k
+
+    def __len__(self):
+        return self.index.nkeys
+
@@ -7,6 +7,7 @@ from petl.compat import text_type
 
 from petl.errors import DuplicateKeyError
 from petl.util.base import Table, asindices, asdict, Record, rowgetter
+from petl.util.keyindex import KeyIndex, KeyIndexLookup
 
 
 def _setup_lookup(table, key, value):
@@ -32,6 +33,28 @@ def _setup_lookup(table, key, value):
     return it, getkey, getvalue
 
 
+def _indexlookup(table, key, value=None, one=False, strict=False,
+                 rowtype=tuple):
+    # look up values directly in a key index built on the same key
+    if not isinstance(table, KeyIndex) or not table.haskey(key):
+        return None
+    if one and strict and table.dupkeys:
+        raise DuplicateKeyError(table.dupkeys[0])
+    hdr = table.hdr
+    if rowtype is dict:
+        getvalue = lambda row: asdict(hdr, row)
+    elif rowtype is Record:
+        flds = list(map(text_type, hdr))
+        getvalue = lambda row: Record(row, flds)
+    elif value is None:
+        getvalue = tuple
+    else:
+        valueindices = asindices(hdr, value)
+        assert len(valueindices) > 0, 'no value selected'
+        getvalue = operator.itemgetter(*valueindices)
+    return KeyIndexLookup(table, getvalue, one=one)
+
+
 def lookup(table, key, value=None, dictionary=None):
     """
     Load a dictionary with data from the given table. E.g.::
@@ -79,9 +102,17 @@ def lookup(table, key, value=None, dictionary=None):
         >>> lkp['b']
         [2, 3]
 
+    If `table` is a :class:`petl.util.keyindex.KeyIndex` built on the given
+    key and no `dictionary` is given, a read-only dictionary looking up values
+    in the index is returned rather than loading all rows into memory. The
+    same applies to the other lookup functions.
+
     """
 
     if dictionary is None:
+        indexed = _indexlookup(table, key, value)
+        if indexed is not None:
+            return indexed
         dictionary = dict()
 
     # setup
@@ -159,6 +190,9 @@ def lookupone(table, key, value=None, dictionary=None, strict=False):
     """
 
     if dictionary is None:
+        indexed = _indexlookup(table, key, value, one=True, strict=strict)
+        if indexed is not None:
+            return indexed
         dictionary = dict()
 
     # setup
@@ -222,6 +256,9 @@ def dictlookup(table, key, dictionary=None):
     """
 
     if dictionary is None:
+        indexed = _indexlookup(table, key, rowtype=dict)
+        if indexed is not None:
+            return indexed
         dictionary = dict()
 
     it = iter(table)
@@ -300,6 +337,10 @@ def dictlookupone(table, key, dictionary=None, strict=False):
     """
 
     if dictionary is None:
+        indexed = _indexlookup(table, key, one=True, strict=strict,
+                               rowtype=dict)
+        if indexed is not None:
+            return indexed
         dictionary = dict()
 
     it = iter(table)
@@ -328,6 +369,9 @@ def recordlookup(table, key, dictionary=None):
     """
 
     if dictionary is None:
+        indexed = _indexlookup(table, key, rowtype=Record)
+        if indexed is not None:
+            return indexed
         dictionary = dict()
 
     it = iter(table)
@@ -360,6 +404,10 @@ def recordlookupone(table, key, dictionary=None, strict=False):
     """
 
     if dictionary is None:
+        indexed = _indexlookup(table, key, one=True, strict=strict,
+                               rowtype=Record)
+        if indexed is not None:
+            return indexed
         dictionary = dict()
 
     it = iter(table)
@@ -8,6 +8,7 @@ from petl.compat import izip_longest, text_type, next
 
 
 from petl.util.base import asindices, Table
+from petl.util.columnar import ColumnarTable
 
 
 def listoflists(tbl):
@@ -59,6 +60,13 @@ def columns(table, missing=None):
     """
 
     cols = OrderedDict()
+    if isinstance(table, ColumnarTable):
+        flds = list(map(text_type, table.hdr))
+        if len(set(flds)) == len(flds):
+            # copy values straight from the buffers
+            for f, buf in zip(flds, table.cols):
+                cols[f] = list(buf)
+            return cols
     it = iter(table)
     hdr = next(it)
     flds = list(map(text_type, hdr))
@@ -5,6 +5,7 @@ from collections import namedtuple
 
 
 from petl.util.base import values, Table
+from petl.util.columnar import ColumnarTable, _numericbuffer
 
 
 def limits(table, field):
@@ -23,7 +24,17 @@ def limits(table, field):
 
     """
 
-    vals = iter(values(table, field))
+    if isinstance(table, ColumnarTable):
+        buf = table.column(field)
+        if len(buf) == 0:
+            return None, None
+        elif _numericbuffer(buf) and not _hasnan(buf):
+            if getattr(buf, 'dtype', None) is not None:
+                return buf.min(), buf.max()
+            return min(buf), max(buf)
+        vals = iter(buf)
+    else:
+        vals = iter(values(table, field))
     try:
         minv = maxv = next(vals)
     except StopIteration:
@@ -62,6 +73,12 @@ def stats(table, field):
 
     """
 
+    if isinstance(table, ColumnarTable):
+        vals = table.column(field)
+        if len(vals) and _numericbuffer(vals) and not _hasnan(vals):
+            return _numericstats(vals)
+    else:
+        vals = values(table, field)
     _min = None
     _max = None
     _sum = 0
@@ -69,7 +86,7 @@ def stats(table, field):
     _var = 0
     _count = 0
     _errors = 0
-    for v in values(table, field):
+    for v in vals:
         try:
             v = float(v)
         except (ValueError, TypeError):
@@ -89,6 +106,36 @@ def stats(table, field):
 Table.stats = stats
 
 
+def _hasnan(buf):
+    # N.B., comparisons with NaN are always False, so minimum and maximum
+    # depend on where NaN are found
+    if getattr(buf, 'dtype', None) is not None:
+        import numpy as np
+        return buf.dtype.kind == 'f' and bool(np.isnan(buf).any())
+    return getattr(buf, 'typecode', None) in ('f', 'd') and \
+        any(v != v for v in buf)
+
+
+def _numericstats(buf):
+    # statistics for a buffer of numbers, vectorized where possible, N.B.,
+    # mean and variance are computed in two passes rather than online
+    n = len(buf)
+    if getattr(buf, 'dtype', None) is not None:
+        import numpy as np
+        a = np.asarray(buf, dtype='f8')
+        _sum = float(a.sum())
+        _mean = float(a.mean())
+        _var = float(a.var())
+        _min, _max = float(a.min()), float(a.max())
+    else:
+        vals = list(map(float, buf))
+        _sum = sum(vals)
+        _mean = _sum / n
+        _var = sum((v - _mean)**2 for v in vals) / n
+        _min, _max = min(vals), max(vals)
+    return _stats(n, 0, _sum, _min, _max, _mean, _var, _var**.5)
+
+
 def onlinestats(xi, n, mean=0, variance=0):
     # function to calculate online mean and variance
     meanprv = mean